@@ -12,13 +12,13 @@ import uuid
 import models
 
 from python.helpers import extract_tools, files, errors, history, tokens, context as context_helper
-from python.helpers import dirty_json
+from python.helpers import dirty_json, state_events, call_scheduler
 from python.helpers.print_style import PrintStyle
 
 from langchain_core.prompts import (
     ChatPromptTemplate,
 )
-from langchain_core.messages import SystemMessage, BaseMessage
+from langchain_core.messages import SystemMessage, BaseMessage, get_buffer_string
 
 import python.helpers.log as Log
 from python.helpers.dirty_json import DirtyJson
@@ -82,6 +82,7 @@ class AgentContext:
         self.last_message = last_message or datetime.now(timezone.utc)
         self.data = data or {}
         self.output_data = output_data or {}
+        state_events.notify(state_events.CONTEXTS)
 
 
 
@@ -140,6 +141,7 @@ class AgentContext:
         context = AgentContext._contexts.pop(id, None)
         if context and context.task:
             context.task.kill()
+        state_events.notify(state_events.CONTEXTS)
         return context
 
     def get_data(self, key: str, recursive: bool = True):
@@ -509,9 +511,10 @@ class Agent:
         ).output()
         loop_data.extras_temporary.clear()
 
-        # convert history + extras to LLM format
+        # convert history + extras to LLM format, extras go last so the system prompt and
+        # history stay a stable prefix for provider prompt caching
         history_langchain: list[BaseMessage] = history.output_langchain(
-            loop_data.history_output + extras
+            loop_data.history_output + extras, cache=self.history.langchain_cache
         )
 
         # build full prompt from system prompt, message history and extrS
@@ -519,14 +522,17 @@ class Agent:
             SystemMessage(content=system_text),
             *history_langchain,
         ]
-        full_text = ChatPromptTemplate.from_messages(full_prompt).format()
+        # same text as ChatPromptTemplate.format(), counted per message so unchanged
+        # messages and system prompt are served from the token count memo
+        prompt_parts = [get_buffer_string([msg]) for msg in full_prompt]
+        full_text = "\n".join(prompt_parts)
 
         # store as last context window content
         self.set_data(
             Agent.DATA_NAME_CTX_WINDOW,
             {
                 "text": full_text,
-                "tokens": tokens.approximate_tokens(full_text),
+                "tokens": sum(tokens.approximate_tokens_many(prompt_parts)),
             },
         )
 
@@ -698,8 +704,15 @@ class Agent:
         message: str,
         callback: Callable[[str], Awaitable[None]] | None = None,
         background: bool = False,
+        priority: call_scheduler.Priority | None = None,
+        cache_ttl: float | None = None,
     ):
         model = self.get_utility_model()
+        # calls to the same utility model are queued by priority, see call_scheduler
+        scope = call_scheduler.get_scope(priority, background)
+        scheduler = call_scheduler.get_scheduler(
+            f"{self.config.utility_model.provider}\\{self.config.utility_model.name}"
+        )
 
         # call extensions
         call_data = {
@@ -716,11 +729,15 @@ class Agent:
             if call_data["callback"]:
                 await call_data["callback"](chunk)
 
-        response, _reasoning = await call_data["model"].unified_call(
-            system_message=call_data["system"],
-            user_message=call_data["message"],
-            response_callback=stream_callback if call_data["callback"] else None,
-            rate_limiter_callback=self.rate_limiter_callback if not call_data["background"] else None,
+        response, _reasoning = await scheduler.run(
+            lambda: call_data["model"].unified_call(
+                system_message=call_data["system"],
+                user_message=call_data["message"],
+                response_callback=stream_callback if call_data["callback"] else None,
+                rate_limiter_callback=self.rate_limiter_callback if not call_data["background"] else None,
+                cache_ttl=cache_ttl,
+            ),
+            scope,
         )
 
         return response
@@ -743,10 +760,17 @@ class Agent:
             reasoning_callback=reasoning_callback,
             response_callback=response_callback,
             rate_limiter_callback=self.rate_limiter_callback if not background else None,
+            usage_callback=self.usage_callback if not background else None,
         )
 
         return response, reasoning
 
+    async def usage_callback(self, usage: dict[str, int]):
+        # reported token usage incl. prompt cache hits, shown with the context window
+        window = self.get_data(Agent.DATA_NAME_CTX_WINDOW)
+        if isinstance(window, dict):
+            window["usage"] = usage
+
     async def rate_limiter_callback(
         self, message: str, key: str, total: int, limit: int
     ):
@@ -876,7 +900,7 @@ class Agent:
         try:
             if len(stream) < 25:
                 return  # no reason to try
-            response = DirtyJson.parse_string(stream)
+            response = self.parse_response_stream(stream)
             if isinstance(response, dict):
                 await self.call_extensions(
                     "response_stream",
@@ -886,7 +910,23 @@ class Agent:
                 )
 
         except Exception as e:
-            pass
+            # start over with a fresh parser on the next chunk
+            self.loop_data.params_temporary.pop("response_stream_parser", None)
+
+    def parse_response_stream(self, stream: str):
+        # one incremental parser per streamed response, only the new part of the text is fed to it
+        state = self.loop_data.params_temporary.get("response_stream_parser")
+        if (
+            not state
+            or len(stream) < state["length"]
+            or not stream.startswith(state["tail"], state["length"] - len(state["tail"]))
+        ):  # earlier text was rewritten (e.g. by masking), parse from the start
+            state = {"parser": DirtyJson(), "length": 0, "tail": ""}
+            self.loop_data.params_temporary["response_stream_parser"] = state
+        response = state["parser"].feed(stream[state["length"]:])
+        state["length"] = len(stream)
+        state["tail"] = stream[-64:]
+        return response
 
     def get_tool(
         self, name: str, method: str | None, args: dict, message: str, loop_data: LoopData | None, **kwargs
@@ -896,10 +936,11 @@ class Agent:
 
         classes = []
 
+        # tool classes are cached and only reloaded when their file changes
         # try agent tools first
         if self.config.profile:
             try:
-                classes = extract_tools.load_classes_from_file(
+                classes = extract_tools.load_classes_from_file_cached(
                     "agents/" + self.config.profile + "/tools/" + name + ".py", Tool  # type: ignore[arg-type]
                 )
             except Exception:
@@ -908,7 +949,7 @@ class Agent:
         # try default tools
         if not classes:
             try:
-                classes = extract_tools.load_classes_from_file(
+                classes = extract_tools.load_classes_from_file_cached(
                     "python/tools/" + name + ".py", Tool  # type: ignore[arg-type]
                 )
             except Exception as e:
@@ -1,7 +1,11 @@
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from enum import Enum
+import functools
+import hashlib
+import json
 import logging
 import os
+import threading
 from typing import (
     Any,
     Awaitable,
@@ -14,7 +18,7 @@ from typing import (
     TypedDict,
 )
 
-from litellm import completion, acompletion, embedding
+from litellm import completion, acompletion, embedding, aembedding
 import litellm
 import openai
 from litellm.types.utils import ModelResponse
@@ -23,9 +27,9 @@ from python.helpers import dotenv
 from python.helpers import settings, dirty_json
 from python.helpers.dotenv import load_dotenv
 from python.helpers.providers import get_provider_config
-from python.helpers.rate_limiter import RateLimiter
-from python.helpers.tokens import approximate_tokens
-from python.helpers import dirty_json, browser_use_monkeypatch
+from python.helpers.rate_limiter import RateLimiter, backoff_delay, get_retry_after
+from python.helpers.tokens import approximate_tokens, estimate_tokens
+from python.helpers import dirty_json, browser_use_monkeypatch, response_cache, embedding_registry, embedding_batcher, api_key_pool
 
 from langchain_core.language_models.chat_models import SimpleChatModel
 from langchain_core.outputs.chat_generation import ChatGenerationChunk
@@ -194,31 +198,85 @@ class ChatGenerationResult:
         return ChatChunk(response_delta=response, reasoning_delta=reasoning)
 
 
+# providers passing cache_control breakpoints through to anthropic models, other providers cache prefixes
+# automatically (openai, deepseek) or not at all, see LiteLLMChatWrapper._add_cache_breakpoints
+PROMPT_CACHE_PROVIDERS = ("anthropic", "bedrock", "vertex_ai", "openrouter")
+PROMPT_CACHE_MAX_BREAKPOINTS = 4  # anthropic limit per request
+
 rate_limiters: dict[str, RateLimiter] = {}
-api_keys_round_robin: dict[str, int] = {}
 
 
-def get_api_key(service: str) -> str:
-    # get api key for the service
-    key = (
+def _get_raw_api_key(service: str) -> str:
+    return (
         dotenv.get_dotenv_value(f"API_KEY_{service.upper()}")
         or dotenv.get_dotenv_value(f"{service.upper()}_API_KEY")
         or dotenv.get_dotenv_value(f"{service.upper()}_API_TOKEN")
-        or "None"
+        or ""
     )
-    # if the key contains a comma, use round-robin
-    if "," in key:
-        api_keys = [k.strip() for k in key.split(",") if k.strip()]
-        api_keys_round_robin[service] = api_keys_round_robin.get(service, -1) + 1
-        key = api_keys[api_keys_round_robin[service] % len(api_keys)]
+
+
+def get_api_key(service: str) -> str:
+    # get api key for the service
+    key = _get_raw_api_key(service) or "None"
+    # if the key contains a comma, take the least loaded healthy key of the pool
+    pool = _get_key_pool(service)
+    if pool:
+        key = pool.select()
     return key
 
 
+def _get_key_pool(service: str) -> api_key_pool.ApiKeyPool | None:
+    api_keys = [k.strip() for k in _get_raw_api_key(service).split(",") if k.strip()]
+    if len(api_keys) < 2:
+        return None
+    return api_key_pool.get_pool(service, api_keys)
+
+
+def _lease_api_key(
+    call_kwargs: dict, service: str | None, model_config: ModelConfig | None
+) -> api_key_pool.Lease | None:
+    # wrappers of pooled providers carry a0_key_pool instead of a key, the key is leased per call,
+    # preferring keys with rate limit headroom for the model
+    pool = _get_key_pool(service) if service else None
+    if not pool:
+        return None
+
+    def load(key: str) -> float:
+        if not model_config:
+            return 0.0
+        return get_rate_limiter(
+            model_config.provider,
+            model_config.name,
+            model_config.limit_requests,
+            model_config.limit_input,
+            model_config.limit_output,
+            key,
+        ).get_utilization()
+
+    lease = pool.acquire(load)
+    call_kwargs["api_key"] = lease.key
+    return lease
+
+
+def _prepare_call_kwargs(kwargs: dict, model_config: ModelConfig | None) -> dict:
+    # calls without outcome tracking only choose a pooled key
+    call_kwargs = dict(kwargs)
+    lease = _lease_api_key(call_kwargs, call_kwargs.pop("a0_key_pool", None), model_config)
+    if lease:
+        lease.release()
+    return call_kwargs
+
+
 def get_rate_limiter(
-    provider: str, name: str, requests: int, input: int, output: int
+    provider: str, name: str, requests: int, input: int, output: int, api_key: str = ""
 ) -> RateLimiter:
+    # provider limits apply per api key, limits learned from one key do not throttle the others
     key = f"{provider}\\{name}"
-    rate_limiters[key] = limiter = rate_limiters.get(key, RateLimiter(seconds=60))
+    if api_key:
+        key += "\\" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    limiter = rate_limiters.get(key)
+    if limiter is None:
+        rate_limiters[key] = limiter = RateLimiter(seconds=60)
     limiter.limits["requests"] = requests or 0
     limiter.limits["input"] = input or 0
     limiter.limits["output"] = output or 0
@@ -250,12 +308,40 @@ def _is_transient_litellm_error(exc: Exception) -> bool:
     return isinstance(exc, transient_types)
 
 
+def _is_rate_limit_error(exc: Exception) -> bool:
+    return getattr(exc, "status_code", None) == 429 or isinstance(
+        exc, getattr(openai, "RateLimitError", ())
+    )
+
+
+def _get_response_headers(response: Any) -> dict[str, Any]:
+    # litellm keeps provider headers of responses and streams in _hidden_params
+    hidden = getattr(response, "_hidden_params", None) or {}
+    return hidden.get("additional_headers") or {}
+
+
+def _get_status_code(exc: Exception) -> int | None:
+    status_code = getattr(exc, "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def _get_error_headers(exc: Exception) -> dict[str, Any]:
+    headers = getattr(exc, "litellm_response_headers", None)
+    if headers is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+    try:
+        return dict(headers or {})
+    except (TypeError, ValueError):
+        return {}
+
+
 async def apply_rate_limiter(
     model_config: ModelConfig | None,
     input_text: str,
     rate_limiter_callback: (
         Callable[[str, str, int, int], Awaitable[bool]] | None
     ) = None,
+    api_key: str | None = None,
 ):
     if not model_config:
         return
@@ -265,6 +351,7 @@ async def apply_rate_limiter(
         model_config.limit_requests,
         model_config.limit_input,
         model_config.limit_output,
+        api_key or "",
     )
     limiter.add(input=approximate_tokens(input_text))
     limiter.add(requests=1)
@@ -278,6 +365,7 @@ def apply_rate_limiter_sync(
     rate_limiter_callback: (
         Callable[[str, str, int, int], Awaitable[bool]] | None
     ) = None,
+    api_key: str | None = None,
 ):
     if not model_config:
         return
@@ -285,7 +373,7 @@ def apply_rate_limiter_sync(
 
     nest_asyncio.apply()
     return asyncio.run(
-        apply_rate_limiter(model_config, input_text, rate_limiter_callback)
+        apply_rate_limiter(model_config, input_text, rate_limiter_callback, api_key)
     )
 
 
@@ -362,8 +450,33 @@ class LiteLLMChatWrapper(SimpleChatModel):
                 message_dict["tool_call_id"] = tool_call_id
 
             result.append(message_dict)
+
+        if self._supports_cache_control():
+            self._add_cache_breakpoints(result)
         return result
 
+    def _supports_cache_control(self) -> bool:
+        return self.provider in PROMPT_CACHE_PROVIDERS and "claude" in self.model_name.lower()
+
+    def _add_cache_breakpoints(self, messages: list[dict]):
+        # cache the system prompt and the history up to the last message, the last message carries
+        # the volatile extras (date, recalled memories) and must stay outside the cached prefix
+        indices = [i for i, m in enumerate(messages) if m["role"] == "system"][-1:]
+        if len(messages) > 2 and messages[-2]["role"] != "system":
+            indices.append(len(messages) - 2)
+        for i in indices[:PROMPT_CACHE_MAX_BREAKPOINTS]:
+            content = messages[i]["content"]
+            if isinstance(content, str):
+                if not content:
+                    continue
+                content = [{"type": "text", "text": content}]
+            elif isinstance(content, list) and content and isinstance(content[-1], dict):
+                content = [*content[:-1], dict(content[-1])]
+            else:
+                continue
+            content[-1]["cache_control"] = {"type": "ephemeral"}
+            messages[i] = {**messages[i], "content": content}
+
     def _call(
         self,
         messages: List[BaseMessage],
@@ -374,13 +487,14 @@ class LiteLLMChatWrapper(SimpleChatModel):
         import asyncio
 
         msgs = self._convert_messages(messages)
+        call_kwargs = _prepare_call_kwargs({**self.kwargs, **kwargs}, self.a0_model_conf)
 
         # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, str(msgs))
+        apply_rate_limiter_sync(self.a0_model_conf, str(msgs), api_key=call_kwargs.get("api_key"))
 
         # Call the model
         resp = completion(
-            model=self.model_name, messages=msgs, stop=stop, **{**self.kwargs, **kwargs}
+            model=self.model_name, messages=msgs, stop=stop, **call_kwargs
         )
 
         # Parse output
@@ -398,9 +512,10 @@ class LiteLLMChatWrapper(SimpleChatModel):
         import asyncio
 
         msgs = self._convert_messages(messages)
+        call_kwargs = _prepare_call_kwargs({**self.kwargs, **kwargs}, self.a0_model_conf)
 
         # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, str(msgs))
+        apply_rate_limiter_sync(self.a0_model_conf, str(msgs), api_key=call_kwargs.get("api_key"))
 
         result = ChatGenerationResult()
 
@@ -409,7 +524,7 @@ class LiteLLMChatWrapper(SimpleChatModel):
             messages=msgs,
             stream=True,
             stop=stop,
-            **{**self.kwargs, **kwargs},
+            **call_kwargs,
         ):
             # parse chunk
             parsed = _parse_chunk(chunk) # chunk parsing
@@ -429,9 +544,10 @@ class LiteLLMChatWrapper(SimpleChatModel):
         **kwargs: Any,
     ) -> AsyncIterator[ChatGenerationChunk]:
         msgs = self._convert_messages(messages)
+        call_kwargs = _prepare_call_kwargs({**self.kwargs, **kwargs}, self.a0_model_conf)
 
         # Apply rate limiting if configured
-        await apply_rate_limiter(self.a0_model_conf, str(msgs))
+        await apply_rate_limiter(self.a0_model_conf, str(msgs), api_key=call_kwargs.get("api_key"))
 
         result = ChatGenerationResult()
 
@@ -440,7 +556,7 @@ class LiteLLMChatWrapper(SimpleChatModel):
             messages=msgs,
             stream=True,
             stop=stop,
-            **{**self.kwargs, **kwargs},
+            **call_kwargs,
         )
         async for chunk in response:  # type: ignore
             # parse chunk
@@ -464,6 +580,8 @@ class LiteLLMChatWrapper(SimpleChatModel):
         rate_limiter_callback: (
             Callable[[str, str, int, int], Awaitable[bool]] | None
         ) = None,
+        cache_ttl: float | None = None,
+        usage_callback: Callable[[dict[str, int]], Awaitable[None]] | None = None,
         **kwargs: Any,
     ) -> Tuple[str, str]:
 
@@ -480,24 +598,54 @@ class LiteLLMChatWrapper(SimpleChatModel):
         # convert to litellm format
         msgs_conv = self._convert_messages(messages)
 
-        # Apply rate limiting if configured
-        limiter = await apply_rate_limiter(
-            self.a0_model_conf, str(msgs_conv), rate_limiter_callback
-        )
+        # deterministic calls opt in to the response cache with cache_ttl
+        cache_key = None
+        if cache_ttl:
+            cache_key = response_cache.make_key(
+                self.model_name, {**self.kwargs, **kwargs}, msgs_conv
+            )
+            cached = response_cache.get(cache_key)
+            if cached:
+                response, reasoning = cached
+                if reasoning and reasoning_callback:
+                    await reasoning_callback(reasoning, reasoning)
+                if response and response_callback:
+                    await response_callback(response, response)
+                return response, reasoning
 
         # Prepare call kwargs and retry config (strip A0-only params before calling LiteLLM)
         call_kwargs: dict[str, Any] = {**self.kwargs, **kwargs}
         max_retries: int = int(call_kwargs.pop("a0_retry_attempts", 2))
         retry_delay_s: float = float(call_kwargs.pop("a0_retry_delay_seconds", 1.5))
+        key_pool: str | None = call_kwargs.pop("a0_key_pool", None)
         stream = reasoning_callback is not None or response_callback is not None or tokens_callback is not None
+        if (
+            usage_callback
+            and stream
+            and "stream_options" not in call_kwargs
+            and _supports_stream_usage(self.provider, self.model_name)
+        ):
+            call_kwargs["stream_options"] = {"include_usage": True}
+        usage: dict[str, int] | None = None
 
         # results
         result = ChatGenerationResult()
 
         attempt = 0
+        limiter = None
         while True:
             got_any_chunk = False
+            # pooled api keys are leased per attempt, a retry moves on to a healthy key
+            lease = _lease_api_key(call_kwargs, key_pool, self.a0_model_conf)
             try:
+                # Apply rate limiting if configured, every attempt is booked as a request
+                limiter = await apply_rate_limiter(
+                    self.a0_model_conf,
+                    str(msgs_conv),
+                    rate_limiter_callback,
+                    call_kwargs.get("api_key"),
+                )
+
                 # call model
                 _completion = await acompletion(
                     model=self.model_name,
@@ -510,6 +658,7 @@ class LiteLLMChatWrapper(SimpleChatModel):
                     # iterate over chunks
                     async for chunk in _completion:  # type: ignore
                         got_any_chunk = True
+                        usage = _parse_usage(chunk) or usage
                         # parse chunk
                         parsed = _parse_chunk(chunk)
                         output = result.add_chunk(parsed)
@@ -523,9 +672,9 @@ class LiteLLMChatWrapper(SimpleChatModel):
                                     output["reasoning_delta"],
                                     approximate_tokens(output["reasoning_delta"]),
                                 )
-                            # Add output tokens to rate limiter if configured
+                            # Add output tokens to rate limiter if configured, estimated as chunks are many and small
                             if limiter:
-                                limiter.add(output=approximate_tokens(output["reasoning_delta"]))
+                                limiter.add(output=estimate_tokens(output["reasoning_delta"]))
                         # collect response delta and call callbacks
                         if output["response_delta"]:
                             if response_callback:
@@ -535,12 +684,13 @@ class LiteLLMChatWrapper(SimpleChatModel):
                                     output["response_delta"],
                                     approximate_tokens(output["response_delta"]),
                                 )
-                            # Add output tokens to rate limiter if configured
+                            # Add output tokens to rate limiter if configured, estimated as chunks are many and small
                             if limiter:
-                                limiter.add(output=approximate_tokens(output["response_delta"]))
+                                limiter.add(output=estimate_tokens(output["response_delta"]))
 
                 # non-stream response
                 else:
+                    usage = _parse_usage(_completion)
                     parsed = _parse_chunk(_completion)
                     output = result.add_chunk(parsed)
                     if limiter:
@@ -549,17 +699,44 @@ class LiteLLMChatWrapper(SimpleChatModel):
                         if output["reasoning_delta"]:
                             limiter.add(output=approximate_tokens(output["reasoning_delta"]))
 
-                # Successful completion of stream
+                # Successful completion of stream, learn provider limits from its headers
+                if limiter:
+                    limiter.learn(_get_response_headers(_completion))
+                if lease:
+                    lease.success(
+                        (usage["input_tokens"] + usage["output_tokens"]) if usage
+                        else approximate_tokens(str(msgs_conv) + result.response + result.reasoning)
+                    )
+                if usage_callback and usage:
+                    await usage_callback(usage)
+                if cache_key and cache_ttl and result.response:
+                    response_cache.put(cache_key, result.response, result.reasoning, cache_ttl)
                 return result.response, result.reasoning
 
             except Exception as e:
                 import asyncio
 
                 # Retry only if no chunks received and error is transient
+                headers = _get_error_headers(e)
+                if lease:
+                    # eject failing keys for a while, errors of the request itself do not count
+                    status_code = _get_status_code(e)
+                    if status_code in (401, 403) or _is_transient_litellm_error(e):
+                        lease.failure(status_code, get_retry_after(headers))
+                    else:
+                        lease.release()
+
                 if got_any_chunk or not _is_transient_litellm_error(e) or attempt >= max_retries:
                     raise
+                if limiter and _is_rate_limit_error(e):
+                    # pause all calls sharing the limiter, honouring Retry-After, the retry waits in the limiter
+                    limiter.rate_limited(headers, attempt, retry_delay_s)
+                else:
+                    await asyncio.sleep(get_retry_after(headers) or backoff_delay(attempt, retry_delay_s))
                 attempt += 1
-                await asyncio.sleep(retry_delay_s)
+            finally:
+                if lease:
+                    lease.release()  # also when cancelled
 
 
 class AsyncAIChatReplacement:
@@ -614,13 +791,14 @@ class BrowserCompatibleChatWrapper(ChatOpenRouter):
         run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ):
+        model = kwargs.pop("model", None)
+        kwrgs = _prepare_call_kwargs({**self._wrapper.kwargs, **kwargs}, self._wrapper.a0_model_conf)
+
         # Apply rate limiting if configured
-        apply_rate_limiter_sync(self._wrapper.a0_model_conf, str(messages))
+        apply_rate_limiter_sync(self._wrapper.a0_model_conf, str(messages), api_key=kwrgs.get("api_key"))
 
         # Call the model
         try:
-            model = kwargs.pop("model", None)
-            kwrgs = {**self._wrapper.kwargs, **kwargs}
 
             # hack from browser-use to fix json schema for gemini (additionalProperties, $defs, $ref)
             if "response_format" in kwrgs and "json_schema" in kwrgs["response_format"] and model.startswith("gemini/"):
@@ -659,6 +837,7 @@ class BrowserCompatibleChatWrapper(ChatOpenRouter):
 
 class LiteLLMEmbeddingWrapper(Embeddings):
     model_name: str
+    provider: str = ""
     kwargs: dict = {}
     a0_model_conf: Optional[ModelConfig] = None
 
@@ -670,26 +849,45 @@ class LiteLLMEmbeddingWrapper(Embeddings):
         **kwargs: Any,
     ):
         self.model_name = f"{provider}/{model}" if provider != "openai" else model
+        self.provider = provider
         self.kwargs = kwargs
         self.a0_model_conf = model_config
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return _get_embedding_batcher(self).embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return _get_embedding_batcher(self).embed([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await _get_embedding_batcher(self).aembed(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await _get_embedding_batcher(self).aembed([text]))[0]
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        call_kwargs = _prepare_call_kwargs(self.kwargs, self.a0_model_conf)
+
         # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, " ".join(texts))
+        await apply_rate_limiter(self.a0_model_conf, " ".join(texts), api_key=call_kwargs.get("api_key"))
 
-        resp = embedding(model=self.model_name, input=texts, **self.kwargs)
+        resp = await aembedding(model=self.model_name, input=texts, **call_kwargs)
         return [
             item.get("embedding") if isinstance(item, dict) else item.embedding  # type: ignore
             for item in resp.data  # type: ignore
         ]
 
-    def embed_query(self, text: str) -> List[float]:
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        call_kwargs = _prepare_call_kwargs(self.kwargs, self.a0_model_conf)
+
         # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, text)
+        apply_rate_limiter_sync(self.a0_model_conf, " ".join(texts), api_key=call_kwargs.get("api_key"))
 
-        resp = embedding(model=self.model_name, input=[text], **self.kwargs)
-        item = resp.data[0]  # type: ignore
-        return item.get("embedding") if isinstance(item, dict) else item.embedding  # type: ignore
+        resp = embedding(model=self.model_name, input=texts, **call_kwargs)
+        return [
+            item.get("embedding") if isinstance(item, dict) else item.embedding  # type: ignore
+            for item in resp.data  # type: ignore
+        ]
 
 
 class LocalSentenceTransformerWrapper(Embeddings):
@@ -718,28 +916,47 @@ class LocalSentenceTransformerWrapper(Embeddings):
             "trust_remote_code",
             "model_kwargs",
         }
-        st_kwargs = {k: v for k, v in (kwargs or {}).items() if k in st_allowed_keys}
-
-        self.model = SentenceTransformer(model, **st_kwargs)
+        self.st_kwargs = {k: v for k, v in (kwargs or {}).items() if k in st_allowed_keys}
         self.model_name = model
+        self.provider = provider
+        self.kwargs = self.st_kwargs
         self.a0_model_conf = model_config
 
+    @property
+    def model(self) -> SentenceTransformer:
+        # loaded on first use and shared process-wide, see embedding_registry
+        return embedding_registry.get_model(self.model_name, **self.st_kwargs)
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return _get_embedding_batcher(self).embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return _get_embedding_batcher(self).embed([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # encoded in the batcher's worker threads, the event loop only awaits
+        return await _get_embedding_batcher(self).aembed(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await _get_embedding_batcher(self).aembed([text]))[0]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
         # Apply rate limiting if configured
         apply_rate_limiter_sync(self.a0_model_conf, " ".join(texts))
 
         embeddings = self.model.encode(texts, convert_to_tensor=False)  # type: ignore
         return embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings  # type: ignore
 
-    def embed_query(self, text: str) -> List[float]:
-        # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, text)
 
-        embedding = self.model.encode([text], convert_to_tensor=False)  # type: ignore
-        result = (
-            embedding[0].tolist() if hasattr(embedding[0], "tolist") else embedding[0]
-        )
-        return result  # type: ignore
+def _get_embedding_batcher(
+    wrapper: LiteLLMEmbeddingWrapper | LocalSentenceTransformerWrapper,
+) -> embedding_batcher.EmbeddingBatcher:
+    # concurrent requests of all wrappers with the same model and arguments share one batcher
+    serialized = json.dumps([wrapper.model_name, wrapper.kwargs], sort_keys=True, default=str)
+    key = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+    return embedding_batcher.get_batcher(
+        key, wrapper.provider, wrapper._embed_batch, getattr(wrapper, "_aembed_batch", None)
+    )
 
 
 def _get_litellm_chat(
@@ -749,12 +966,13 @@ def _get_litellm_chat(
     model_config: Optional[ModelConfig] = None,
     **kwargs: Any,
 ):
-    # use api key from kwargs or env
-    api_key = kwargs.pop("api_key", None) or get_api_key(provider_name)
+    # use api key from kwargs or env, unless pooled keys are leased per call
+    if "a0_key_pool" not in kwargs:
+        api_key = kwargs.pop("api_key", None) or get_api_key(provider_name)
 
-    # Only pass API key if key is not a placeholder
-    if api_key and api_key not in ("None", "NA"):
-        kwargs["api_key"] = api_key
+        # Only pass API key if key is not a placeholder
+        if api_key and api_key not in ("None", "NA"):
+            kwargs["api_key"] = api_key
 
     provider_name, model_name, kwargs = _adjust_call_args(
         provider_name, model_name, kwargs
@@ -785,12 +1003,13 @@ def _get_litellm_embedding(
             **kwargs,
         )
 
-    # use api key from kwargs or env
-    api_key = kwargs.pop("api_key", None) or get_api_key(provider_name)
+    # use api key from kwargs or env, unless pooled keys are leased per call
+    if "a0_key_pool" not in kwargs:
+        api_key = kwargs.pop("api_key", None) or get_api_key(provider_name)
 
-    # Only pass API key if key is not a placeholder
-    if api_key and api_key not in ("None", "NA"):
-        kwargs["api_key"] = api_key
+        # Only pass API key if key is not a placeholder
+        if api_key and api_key not in ("None", "NA"):
+            kwargs["api_key"] = api_key
 
     provider_name, model_name, kwargs = _adjust_call_args(
         provider_name, model_name, kwargs
@@ -828,6 +1047,35 @@ def _parse_chunk(chunk: Any) -> ChatChunk:
 
 
 
+def _parse_usage(chunk: Any) -> dict[str, int] | None:
+    # token usage incl. prompt cache reads and writes, reported by the last chunk if at all
+    usage = chunk.get("usage") if isinstance(chunk, dict) else getattr(chunk, "usage", None)
+    if not usage:
+        return None
+
+    def get(obj: Any, key: str) -> Any:
+        return obj.get(key) if isinstance(obj, dict) else getattr(obj, key, None)
+
+    details = get(usage, "prompt_tokens_details")
+    cached = (details and get(details, "cached_tokens")) or get(usage, "cache_read_input_tokens")
+    return {
+        "input_tokens": get(usage, "prompt_tokens") or 0,
+        "output_tokens": get(usage, "completion_tokens") or 0,
+        "cache_read_tokens": cached or 0,
+        "cache_write_tokens": get(usage, "cache_creation_input_tokens") or 0,
+    }
+
+
+@functools.lru_cache(maxsize=256)
+def _supports_stream_usage(provider: str, model_name: str) -> bool:
+    # looked up once per model, not on every streamed call
+    try:
+        params = litellm.get_supported_openai_params(model=model_name, custom_llm_provider=provider)
+    except Exception:
+        return False
+    return "stream_options" in (params or [])
+
+
 def _adjust_call_args(provider_name: str, model_name: str, kwargs: dict):
     # for openrouter add app reference
     if provider_name == "openrouter":
@@ -873,11 +1121,14 @@ def _merge_provider_defaults(
             for k, v in extra_kwargs.items():
                 kwargs.setdefault(k, v)
 
-    # Inject API key based on the *original* provider id if still missing
+    # Inject API key based on the *original* provider id if still missing, several keys are leased per call
     if "api_key" not in kwargs:
-        key = get_api_key(original_provider)
-        if key and key not in ("None", "NA"):
-            kwargs["api_key"] = key
+        if _get_key_pool(original_provider):
+            kwargs["a0_key_pool"] = original_provider
+        else:
+            key = get_api_key(original_provider)
+            if key and key not in ("None", "NA"):
+                kwargs["api_key"] = key
 
     # Merge LiteLLM global kwargs (timeouts, stream_timeout, etc.)
     try:
@@ -894,26 +1145,72 @@ def _merge_provider_defaults(
 def get_chat_model(
     provider: str, name: str, model_config: Optional[ModelConfig] = None, **kwargs: Any
 ) -> LiteLLMChatWrapper:
-    orig = provider.lower()
-    provider_name, kwargs = _merge_provider_defaults("chat", orig, kwargs)
-    return _get_litellm_chat(
-        LiteLLMChatWrapper, name, provider_name, model_config, **kwargs
-    )
+    def create():
+        orig = provider.lower()
+        provider_name, merged = _merge_provider_defaults("chat", orig, kwargs)
+        return _get_litellm_chat(
+            LiteLLMChatWrapper, name, provider_name, model_config, **merged
+        )
+
+    return _get_pooled_model("chat", provider, name, model_config, kwargs, create)
 
 
 def get_browser_model(
     provider: str, name: str, model_config: Optional[ModelConfig] = None, **kwargs: Any
 ) -> BrowserCompatibleChatWrapper:
-    orig = provider.lower()
-    provider_name, kwargs = _merge_provider_defaults("chat", orig, kwargs)
-    return _get_litellm_chat(
-        BrowserCompatibleChatWrapper, name, provider_name, model_config, **kwargs
-    )
+    def create():
+        orig = provider.lower()
+        provider_name, merged = _merge_provider_defaults("chat", orig, kwargs)
+        return _get_litellm_chat(
+            BrowserCompatibleChatWrapper, name, provider_name, model_config, **merged
+        )
+
+    return _get_pooled_model("browser", provider, name, model_config, kwargs, create)
 
 
 def get_embedding_model(
     provider: str, name: str, model_config: Optional[ModelConfig] = None, **kwargs: Any
 ) -> LiteLLMEmbeddingWrapper | LocalSentenceTransformerWrapper:
-    orig = provider.lower()
-    provider_name, kwargs = _merge_provider_defaults("embedding", orig, kwargs)
-    return _get_litellm_embedding(name, provider_name, model_config, **kwargs)
+    def create():
+        orig = provider.lower()
+        provider_name, merged = _merge_provider_defaults("embedding", orig, kwargs)
+        return _get_litellm_embedding(name, provider_name, model_config, **merged)
+
+    return _get_pooled_model("embedding", provider, name, model_config, kwargs, create)
+
+
+# model wrappers by configuration, building one validates pydantic models and resolves provider
+# defaults, settings and api keys, so wrappers are reused until settings change, see clear_model_pool
+_model_pool: dict[str, Any] = {}
+_model_pool_lock = threading.Lock()
+
+
+def _get_pooled_model(
+    kind: str,
+    provider: str,
+    name: str,
+    model_config: Optional[ModelConfig],
+    kwargs: dict,
+    create: Callable[[], Any],
+):
+    key = _model_pool_key(kind, provider, name, model_config, kwargs)
+    with _model_pool_lock:
+        model = _model_pool.get(key)
+    if model is None:
+        model = create()
+        with _model_pool_lock:
+            model = _model_pool.setdefault(key, model)
+    return model
+
+
+def _model_pool_key(
+    kind: str, provider: str, name: str, model_config: Optional[ModelConfig], kwargs: dict
+) -> str:
+    data = [kind, provider, name, asdict(model_config) if model_config else None, kwargs]
+    serialized = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def clear_model_pool():
+    with _model_pool_lock:
+        _model_pool.clear()
@@ -0,0 +1,17 @@
+from python.api import poll_stream
+
+
+class ApiPollStream(poll_stream.PollStream):
+    """Event stream for external API clients, authenticated by API key instead of web session."""
+
+    @classmethod
+    def requires_auth(cls) -> bool:
+        return False  # No web auth required
+
+    @classmethod
+    def requires_csrf(cls) -> bool:
+        return False  # No CSRF required
+
+    @classmethod
+    def requires_api_key(cls) -> bool:
+        return True  # Require API key
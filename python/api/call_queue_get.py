@@ -0,0 +1,14 @@
+from python.helpers.api import ApiHandler, Input, Output, Request, Response
+
+from python.helpers import api_key_pool, call_scheduler, response_cache
+
+
+class GetCallQueue(ApiHandler):
+    async def process(self, input: Input, request: Request) -> Output:
+        # running and queued utility model calls, wait times and drops by model, response cache hit rate,
+        # health and throughput of pooled api keys
+        return {
+            "schedulers": call_scheduler.get_stats(),
+            "response_cache": response_cache.get_stats(),
+            "api_keys": api_key_pool.get_stats(),
+        }
@@ -10,9 +10,11 @@ class GetCtxWindow(ApiHandler):
         agent = context.streaming_agent or context.agent0
         window = agent.get_data(agent.DATA_NAME_CTX_WINDOW)
         if not window or not isinstance(window, dict):
-            return {"content": "", "tokens": 0}
+            return {"content": "", "tokens": 0, "usage": None}
 
         text = window["text"]
         tokens = window["tokens"]
+        # provider reported tokens of the last call, incl. prompt cache reads and writes
+        usage = window.get("usage")
 
-        return {"content": text, "tokens": tokens}
+        return {"content": text, "tokens": tokens, "usage": usage}
@@ -1,5 +1,5 @@
 from python.helpers.api import ApiHandler, Request, Response
-from python.helpers.memory import Memory, get_existing_memory_subdirs, get_context_memory_subdir
+from python.helpers.memory import Memory, get_existing_memory_subdirs, get_context_memory_subdir, get_memory_usage
 from python.helpers import files
 from models import ModelConfig, ModelType
 from langchain_core.documents import Document
@@ -23,6 +23,8 @@ class MemoryDashboard(ApiHandler):
                 return await self._bulk_delete_memories(input)
             elif action == "update":
                 return await self._update_memory(input)
+            elif action == "get_memory_usage":
+                return await self._get_memory_usage()
             else:
                 return {
                     "success": False,
@@ -127,6 +129,13 @@ class MemoryDashboard(ApiHandler):
                 "memory_subdir": "default",
             }
 
+    async def _get_memory_usage(self) -> dict:
+        """Get estimated memory use of loaded memory databases by subdirectory."""
+        try:
+            return {"success": True, "usage": get_memory_usage()}
+        except Exception as e:
+            return {"success": False, "error": f"Failed to get memory usage: {str(e)}"}
+
     async def _get_memory_subdirs(self) -> dict:
         """Get available memory subdirectories."""
         try:
@@ -2,7 +2,7 @@ from python.helpers.api import ApiHandler, Request, Response
 
 from agent import AgentContext, AgentContextType
 
-from python.helpers.task_scheduler import TaskScheduler
+from python.helpers.task_scheduler import TaskScheduler, serialize_task
 from python.helpers.localization import Localization
 from python.helpers.dotenv import get_dotenv_value
 
@@ -18,6 +18,19 @@ class Poll(ApiHandler):
         timezone = input.get("timezone", get_dotenv_value("DEFAULT_USER_TIMEZONE", "UTC"))
         Localization.get().set_timezone(timezone)
 
+        return self.get_state(ctxid, from_no, notifications_from)
+
+    def get_state(
+        self,
+        ctxid: str,
+        from_no: int,
+        notifications_from: int,
+        log_guid: str | None = None,
+        notifications_guid: str | None = None,
+        logs: bool = True,
+        lists: bool = True,
+    ) -> dict:
+        # logs=False skips log changes (none since from_no), lists=False leaves out contexts and tasks
         # context instance - get or create only if ctxid is provided
         if ctxid:
             try:
@@ -28,20 +41,53 @@ class Poll(ApiHandler):
             context = None
 
         # Get logs only if we have a context
-        logs = context.log.output(start=from_no) if context else []
+        # publish pending updates first so the version sent matches the returned changes
+        if context and logs:
+            context.log.flush()
+            # offsets of another log (chat was reset) do not apply, start over
+            if log_guid is not None and log_guid != context.log.guid:
+                from_no = 0
+            log_version = len(context.log.updates)
+            log_output = context.log.output(start=from_no, end=log_version)
+        else:
+            log_version = from_no if context else 0
+            log_output = []
 
         # Get notifications from global notification manager
         notification_manager = AgentContext.get_notification_manager()
+        if notifications_guid is not None and notifications_guid != notification_manager.guid:
+            notifications_from = 0
         notifications = notification_manager.output(start=notifications_from)
 
-        # loop AgentContext._contexts
+        # data from this server
+        state = {
+            "deselect_chat": ctxid and not context,
+            "context": context.id if context else "",
+            "logs": log_output,
+            "log_from": from_no,
+            "log_guid": context.log.guid if context else "",
+            "log_version": log_version,
+            "log_progress": context.log.progress if context else 0,
+            "log_progress_active": context.log.progress_active if context else False,
+            "paused": context.paused if context else False,
+            "notifications": notifications,
+            "notifications_guid": notification_manager.guid,
+            "notifications_version": len(notification_manager.updates),
+        }
+        if lists:
+            state["contexts"], state["tasks"] = self.get_contexts_and_tasks()
+        return state
 
+    def get_contexts_and_tasks(self) -> tuple[list[dict], list[dict]]:
         # Get a task scheduler instance
         scheduler = TaskScheduler.get()
 
         # Always reload the scheduler on each poll to ensure we have the latest task state
         # await scheduler.reload() # does not seem to be needed
 
+        # index tasks once instead of searching the task list for every context
+        tasks_by_uuid = {task.uuid: task for task in scheduler.get_tasks()}
+
         # loop AgentContext._contexts and divide into contexts and tasks
 
         ctxs = []
@@ -63,7 +109,7 @@ class Poll(ApiHandler):
             # Create the base context data that will be returned
             context_data = ctx.output()
 
-            context_task = scheduler.get_task_by_uuid(ctx.id)
+            context_task = tasks_by_uuid.get(ctx.id)
             # Determine if this is a task-dedicated context by checking if a task with this UUID exists
             is_task_context = (
                 context_task is not None and context_task.context_id == ctx.id
@@ -73,7 +119,7 @@ class Poll(ApiHandler):
                 ctxs.append(context_data)
             else:
                 # If this is a task, get task details from the scheduler
-                task_details = scheduler.serialize_task(ctx.id)
+                task_details = serialize_task(context_task)  # type: ignore
                 if task_details:
                     # Add task details to context_data with the same field names
                     # as used in scheduler endpoints to maintain UI compatibility
@@ -107,19 +153,4 @@ class Poll(ApiHandler):
         ctxs.sort(key=lambda x: x["created_at"], reverse=True)
         tasks.sort(key=lambda x: x["created_at"], reverse=True)
 
-        # data from this server
-        return {
-            "deselect_chat": ctxid and not context,
-            "context": context.id if context else "",
-            "contexts": ctxs,
-            "tasks": tasks,
-            "logs": logs,
-            "log_guid": context.log.guid if context else "",
-            "log_version": len(context.log.updates) if context else 0,
-            "log_progress": context.log.progress if context else 0,
-            "log_progress_active": context.log.progress_active if context else False,
-            "paused": context.paused if context else False,
-            "notifications": notifications,
-            "notifications_guid": notification_manager.guid,
-            "notifications_version": len(notification_manager.updates),
-        }
+        return ctxs, tasks
@@ -0,0 +1,109 @@
+import json
+import time
+
+from python.api.poll import Poll
+from python.helpers.api import Request, Response
+from python.helpers import state_events
+from python.helpers.localization import Localization
+from python.helpers.dotenv import get_dotenv_value
+
+KEEPALIVE_INTERVAL: float = 15  # seconds, also rechecks state that does not emit change events
+MIN_INTERVAL: float = 0.05  # seconds, changes within the interval are sent as one event
+
+
+class PollStream(Poll):
+    """
+    Server-sent events version of poll. Pushes the poll state whenever logs, contexts,
+    notifications or tasks change. Every event id holds the log and notification offsets,
+    a reconnecting EventSource sends it back as Last-Event-ID and the stream resumes from there.
+    """
+
+    @classmethod
+    def get_methods(cls) -> list[str]:
+        return ["GET"]
+
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        args = request.args
+        ctxid = args.get("context", "")
+        offsets = {
+            "log_guid": args.get("log_guid", ""),
+            "log_from": args.get("log_from", 0, type=int),
+            "notifications_guid": args.get("notifications_guid", ""),
+            "notifications_from": args.get("notifications_from", 0, type=int),
+        }
+        if last_event_id := request.headers.get("Last-Event-ID"):
+            try:
+                offsets.update(json.loads(last_event_id))
+            except Exception:
+                pass  # malformed id, use offsets from query
+
+        timezone = args.get("timezone", get_dotenv_value("DEFAULT_USER_TIMEZONE", "UTC"))
+        Localization.get().set_timezone(timezone)
+
+        return Response(
+            self.stream(ctxid, offsets),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    def stream(self, ctxid: str, offsets: dict):
+        yield "retry: 1000\n\n"  # reconnect delay in ms
+        last_summary = ""
+        last_lists = ""
+        lists_at = 0.0
+        version = state_events.version()
+        changes: list[tuple[str, str]] | None = None  # None rebuilds everything
+        while True:
+            # rebuild context and task lists on their changes only, logs only on changes of this chat,
+            # everything at least once per keepalive interval for state that does not emit change events
+            full = changes is None or time.monotonic() - lists_at >= KEEPALIVE_INTERVAL
+            kinds = {kind for kind, _ in changes or []}
+            state = self.get_state(
+                ctxid,
+                offsets["log_from"],
+                offsets["notifications_from"],
+                log_guid=offsets["log_guid"],
+                notifications_guid=offsets["notifications_guid"],
+                logs=full or any(_is_log_change(kind, context_id, ctxid) for kind, context_id in changes or []),
+                lists=full or bool(kinds & _LIST_KINDS),
+            )
+
+            # send only when something changed, context and task lists only when they did
+            if "contexts" in state:
+                lists_at = time.monotonic()
+                lists = json.dumps([state["contexts"], state["tasks"]])
+                if lists == last_lists:
+                    del state["contexts"]
+                    del state["tasks"]
+                last_lists = lists
+            summary = json.dumps(
+                {k: v for k, v in state.items() if k not in ("contexts", "tasks", "logs", "notifications", "log_from")}
+            )
+            if "contexts" in state or summary != last_summary or state["logs"] or state["notifications"]:
+                offsets = {
+                    "log_guid": state["log_guid"],
+                    "log_from": state["log_version"],
+                    "notifications_guid": state["notifications_guid"],
+                    "notifications_from": state["notifications_version"],
+                }
+                yield f"id: {json.dumps(offsets)}\nevent: state\ndata: {json.dumps(state)}\n\n"
+                last_summary = summary
+                if state["deselect_chat"]:
+                    return
+
+            if state_events.wait(version, timeout=KEEPALIVE_INTERVAL) == version:
+                yield ": keepalive\n\n"
+                changes = []
+            else:
+                time.sleep(MIN_INTERVAL)
+                current = state_events.version()  # before changes(), so none are missed
+                changes = state_events.changes(version)
+                version = current
+
+
+# changes that need the context and task lists rebuilt, untagged changes may be anything
+_LIST_KINDS = {"", state_events.CONTEXTS, state_events.TASKS}
+
+
+def _is_log_change(kind: str, context_id: str, ctxid: str) -> bool:
+    return kind == "" or (kind == state_events.LOG and (not context_id or context_id == ctxid))
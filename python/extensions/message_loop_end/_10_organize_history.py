@@ -1,8 +1,10 @@
 import asyncio
 from python.helpers.extension import Extension
+from python.helpers import history, call_scheduler
 from agent import LoopData
 
 DATA_NAME_TASK = "_organize_history_task"
+DATA_NAME_PRIORITY = "_organize_history_priority"
 
 
 class OrganizeHistory(Extension):
@@ -12,7 +14,15 @@ class OrganizeHistory(Extension):
         if task and not task.done():
             return
 
-        # start task
-        task = asyncio.create_task(self.agent.history.compress())
+        # compress in background once the soft limit is passed, so the next loop rarely has to wait
+        if not self.agent.history.is_over_limit(history.COMPRESS_SOFT_RATIO):
+            return
+
+        # start task, the wait extension raises its priority when the loop has to wait for it
+        with call_scheduler.priority_scope(call_scheduler.Priority.NORMAL) as scope:
+            task = asyncio.create_task(
+                self.agent.history.compress(limit_ratio=history.COMPRESS_SOFT_RATIO)
+            )
         # set to agent to be able to wait for it
         self.agent.set_data(DATA_NAME_TASK, task)
+        self.agent.set_data(DATA_NAME_PRIORITY, scope)
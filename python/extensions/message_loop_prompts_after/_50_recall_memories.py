@@ -3,7 +3,7 @@ from python.helpers.extension import Extension
 from python.helpers.memory import Memory
 from agent import LoopData
 from python.tools.memory_load import DEFAULT_THRESHOLD as DEFAULT_MEMORY_THRESHOLD
-from python.helpers import dirty_json, errors, settings, log 
+from python.helpers import dirty_json, errors, settings, log, call_scheduler, response_cache
 
 
 DATA_NAME_TASK = "_recall_memories_task"
@@ -37,9 +37,11 @@ class RecallMemories(Extension):
                 heading="Searching memories...",
             )
 
-            task = asyncio.create_task(
-                self.search_memories(loop_data=loop_data, log_item=log_item, **kwargs)
-            )
+            # recall results are awaited before the prompt, utility calls go first
+            with call_scheduler.priority_scope(call_scheduler.Priority.FOREGROUND):
+                task = asyncio.create_task(
+                    self.search_memories(loop_data=loop_data, log_item=log_item, **kwargs)
+                )
         else:
             task = None
 
@@ -84,6 +86,7 @@ class RecallMemories(Extension):
                     system=system,
                     message=message,
                     callback=log_callback,
+                    cache_ttl=response_cache.DEFAULT_TTL,
                 )
                 query = query.strip()
             except Exception as e:
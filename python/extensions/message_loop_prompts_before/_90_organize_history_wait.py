@@ -1,6 +1,7 @@
 from python.helpers.extension import Extension
 from agent import LoopData
-from python.extensions.message_loop_end._10_organize_history import DATA_NAME_TASK
+from python.extensions.message_loop_end._10_organize_history import DATA_NAME_TASK, DATA_NAME_PRIORITY
+from python.helpers import call_scheduler
 import asyncio
 
 
@@ -16,6 +17,10 @@ class OrganizeHistoryWait(Extension):
             if task:
                 if not task.done():
                     self.agent.context.log.set_progress("Compressing history...")
+                    # the loop is blocked now, summarization calls go first
+                    scope = self.agent.get_data(DATA_NAME_PRIORITY)
+                    if scope:
+                        scope.escalate(call_scheduler.Priority.FOREGROUND)
 
                 # Wait for the task to complete
                 await task
@@ -25,5 +30,6 @@ class OrganizeHistoryWait(Extension):
             else:
                 # no task running, start and wait
                 self.agent.context.log.set_progress("Compressing history...")
-                await self.agent.history.compress()
+                with call_scheduler.priority_scope(call_scheduler.Priority.FOREGROUND):
+                    await self.agent.history.compress()
 
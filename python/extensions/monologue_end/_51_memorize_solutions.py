@@ -1,5 +1,5 @@
 import asyncio
-from python.helpers import settings
+from python.helpers import settings, call_scheduler
 from python.helpers.extension import Extension
 from python.helpers.memory import Memory
 from python.helpers.dirty_json import DirtyJson
@@ -43,12 +43,16 @@ class MemorizeSolutions(Extension):
             log_item.stream(content=content)
 
         # call util llm to find solutions in history
-        solutions_json = await self.agent.call_utility_model(
-            system=system,
-            message=msgs_text,
-            callback=log_callback,
-            background=True,
-        )
+        try:
+            solutions_json = await self.agent.call_utility_model(
+                system=system,
+                message=msgs_text,
+                callback=log_callback,
+                background=True,
+            )
+        except call_scheduler.CallDropped:
+            log_item.update(heading="Memorization skipped, utility model is busy.")
+            return
 
         # Add validation and error handling for solutions_json
         if not solutions_json or not isinstance(solutions_json, str):
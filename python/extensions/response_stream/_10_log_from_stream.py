@@ -10,6 +10,8 @@ from python.extensions.before_main_llm_call._10_log_for_stream import build_head
 
 class LogFromStream(Extension):
 
+    stateless = True
+
     async def execute(
         self,
         loop_data: LoopData = LoopData(),
@@ -4,6 +4,9 @@ from python.helpers.strings import replace_file_includes
 
 
 class ReplaceIncludeAlias(Extension):
+
+    stateless = True
+
     async def execute(
         self,
         loop_data=None,
@@ -14,15 +17,24 @@ class ReplaceIncludeAlias(Extension):
         if not parsed or not isinstance(parsed, dict):
             return
 
+        # parsed is updated in place by the stream parser, so replace in place as well
         def replace_placeholders(value: Any) -> Any:
             if isinstance(value, str):
-                new_val = value
-                new_val = replace_file_includes(new_val, r"§§include\(([^)]+)\)")
-                return new_val
+                if "§§include(" not in value:
+                    return value
+                return replace_file_includes(value, r"§§include\(([^)]+)\)")
             if isinstance(value, dict):
-                return {k: replace_placeholders(v) for k, v in value.items()}
+                for k, v in value.items():
+                    new_val = replace_placeholders(v)
+                    if new_val is not v:
+                        value[k] = new_val
+                return value
             if isinstance(value, list):
-                return [replace_placeholders(v) for v in value]
+                for i, v in enumerate(value):
+                    new_val = replace_placeholders(v)
+                    if new_val is not v:
+                        value[i] = new_val
+                return value
             if isinstance(value, tuple):
                 return tuple(replace_placeholders(v) for v in value)
             return value
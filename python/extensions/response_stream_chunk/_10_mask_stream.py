@@ -5,6 +5,8 @@ from python.helpers.secrets import get_secrets_manager
 
 class MaskResponseStreamChunk(Extension):
 
+    stateless = True
+
     async def execute(self, **kwargs):
         # Get stream data and agent from kwargs
         stream_data = kwargs.get("stream_data")
@@ -18,7 +20,7 @@ class MaskResponseStreamChunk(Extension):
             # Initialize filter if not exists
             filter_key = "_resp_stream_filter"
             filter_instance = agent.get_data(filter_key)
-            if not filter_instance:
+            if not filter_instance or stream_data["chunk"] == stream_data["full"]:  # new stream
                 filter_instance = secrets_mgr.create_streaming_filter()
                 agent.set_data(filter_key, filter_instance)
 
@@ -28,8 +30,8 @@ class MaskResponseStreamChunk(Extension):
             # Update the stream data with processed chunk
             stream_data["chunk"] = processed_chunk
 
-            # Also mask the full text for consistency
-            stream_data["full"] = secrets_mgr.mask_values(stream_data["full"])
+            # Also mask the full text for consistency, the filter only scans the new chunk
+            stream_data["full"] = filter_instance.masked_text()
 
             # Print the processed chunk (this is where printing should happen)
             if processed_chunk:
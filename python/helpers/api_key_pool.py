@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+# comma separated api keys of a provider (e.g. several org keys) form a pool, each call takes the least
+# loaded healthy key, keys failing with 401/403/429/5xx are ejected for a while and re-admitted after
+
+# seconds a key is ejected for on its first failure, doubled on each further failure in a row
+EJECT_AUTH = 300.0  # 401, 403
+EJECT_RATE_LIMIT = 30.0  # 429 without Retry-After
+EJECT_SERVER = 10.0  # 5xx, timeouts, connection errors
+EJECT_MAX = 600.0
+
+STATS_WINDOW = 60.0  # seconds of throughput reported by get_stats
+
+
+class _KeyState:
+    def __init__(self, key: str):
+        self.key = key
+        self.in_flight = 0
+        self.ejected_until = 0.0
+        self.failures = 0  # in a row, reset by a success
+        self.requests = 0
+        self.successes = 0
+        self.errors = 0
+        self.last_status: int | None = None
+        self.recent: deque[tuple[float, int]] = deque()  # (time, tokens) of recent successes
+        self.latency = 0.0  # sum of seconds of successful calls
+
+
+class Lease:
+    """One call on a pool key, report the outcome with success or failure, release when done."""
+
+    def __init__(self, pool: "ApiKeyPool", state: _KeyState):
+        self.pool = pool
+        self.key = state.key
+        self._state = state
+        self._start = time.monotonic()
+        self._released = False
+
+    def success(self, tokens: int = 0):
+        self.pool._success(self._state, tokens, time.monotonic() - self._start)
+        self.release()
+
+    def failure(self, status_code: int | None = None, retry_after: float | None = None):
+        self.pool._failure(self._state, status_code, retry_after)
+        self.release()
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self.pool._release(self._state)
+
+    def __enter__(self) -> "Lease":
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class ApiKeyPool:
+    def __init__(self, keys: list[str]):
+        self.keys = list(keys)
+        self._states = [_KeyState(key) for key in self.keys]
+        self._lock = threading.Lock()
+
+    def acquire(self, load: Callable[[str], float] | None = None) -> Lease:
+        """Lease the least loaded healthy key, load returns the rate limit utilization of a key (1.0 = full).
+        When all keys are ejected, the one re-admitted first is used."""
+        loads = {state.key: load(state.key) if load else 0.0 for state in self._states}
+        now = time.monotonic()
+        with self._lock:
+            healthy = [s for s in self._states if s.ejected_until <= now]
+            if healthy:
+                # keys with rate limit headroom first, then fewest calls running, then lowest utilization
+                state = min(
+                    healthy,
+                    key=lambda s: (loads[s.key] >= 1.0, s.in_flight, loads[s.key], s.requests),
+                )
+            else:
+                state = min(self._states, key=lambda s: s.ejected_until)
+            state.in_flight += 1
+            state.requests += 1
+        return Lease(self, state)
+
+    def select(self, load: Callable[[str], float] | None = None) -> str:
+        """Least loaded healthy key without tracking the call."""
+        with self.acquire(load) as lease:
+            return lease.key
+
+    def _release(self, state: _KeyState):
+        with self._lock:
+            state.in_flight -= 1
+
+    def _success(self, state: _KeyState, tokens: int, latency: float):
+        now = time.monotonic()
+        with self._lock:
+            state.successes += 1
+            state.failures = 0
+            state.last_status = 200
+            state.latency += latency
+            state.recent.append((now, tokens))
+            self._trim(state, now)
+
+    def _failure(self, state: _KeyState, status_code: int | None, retry_after: float | None):
+        if status_code in (401, 403):
+            base = EJECT_AUTH
+        elif status_code == 429:
+            base = EJECT_RATE_LIMIT
+        elif status_code is None or status_code == 408 or status_code >= 500:
+            base = EJECT_SERVER
+        else:
+            # bad request and similar, the key is not at fault
+            with self._lock:
+                state.errors += 1
+                state.last_status = status_code
+            return
+        now = time.monotonic()
+        with self._lock:
+            state.errors += 1
+            state.last_status = status_code
+            duration = retry_after or min(EJECT_MAX, base * 2**state.failures)
+            state.failures += 1
+            state.ejected_until = max(state.ejected_until, now + duration)
+
+    def _trim(self, state: _KeyState, now: float):
+        while state.recent and state.recent[0][0] < now - STATS_WINDOW:
+            state.recent.popleft()
+
+    def get_stats(self) -> list[dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            result = []
+            for state in self._states:
+                self._trim(state, now)
+                result.append(
+                    {
+                        "key": _mask(state.key),
+                        "in_flight": state.in_flight,
+                        "requests": state.requests,
+                        "successes": state.successes,
+                        "errors": state.errors,
+                        "last_status": state.last_status,
+                        "ejected_for": max(0.0, state.ejected_until - now),
+                        "requests_per_minute": len(state.recent) * 60 / STATS_WINDOW,
+                        "tokens_per_minute": sum(t for _, t in state.recent) * 60 / STATS_WINDOW,
+                        "avg_latency": state.latency / state.successes if state.successes else 0.0,
+                    }
+                )
+            return result
+
+
+_pools: dict[str, ApiKeyPool] = {}
+_lock = threading.Lock()
+
+
+def get_pool(service: str, keys: list[str]) -> ApiKeyPool:
+    """Pool of the service, recreated when its keys change."""
+    with _lock:
+        pool = _pools.get(service)
+        if pool is None or pool.keys != keys:
+            pool = _pools[service] = ApiKeyPool(keys)
+        return pool
+
+
+def get_stats() -> dict[str, list[dict[str, Any]]]:
+    with _lock:
+        pools = dict(_pools)
+    return {service: pool.get_stats() for service, pool in pools.items()}
+
+
+def _mask(key: str) -> str:
+    return f"{key[:3]}...{key[-4:]}" if len(key) > 10 else "***"
@@ -0,0 +1,194 @@
+import asyncio
+import contextvars
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Awaitable, Callable
+
+# utility model calls are shared by work the user waits on (memory recall, blocking history compression)
+# and work nobody waits on (memorization, consolidation, chat renaming), the scheduler runs a bounded
+# number of calls per model and hands free slots to the most urgent waiting call first
+
+CONCURRENCY = 4  # parallel calls per model
+MAX_QUEUE = 32  # waiting calls per model, background calls over this are dropped
+
+
+class Priority(IntEnum):
+    FOREGROUND = 0  # the user waits for the result
+    NORMAL = 1
+    BACKGROUND = 2  # deferred behind other calls, dropped under pressure
+
+
+class CallDropped(Exception):
+    """Raised for background calls dropped because the model is overloaded."""
+
+
+class PriorityScope:
+    """Priority shared by all calls of one piece of work, can be raised while the calls wait."""
+
+    def __init__(self, priority: Priority):
+        self.priority = priority
+
+    def escalate(self, priority: Priority):
+        self.priority = min(self.priority, priority)
+
+
+_scope: contextvars.ContextVar[PriorityScope | None] = contextvars.ContextVar(
+    "call_priority_scope", default=None
+)
+
+
+@contextmanager
+def priority_scope(priority: Priority):
+    """Calls made inside, including tasks created inside, use the yielded scope."""
+    scope = PriorityScope(priority)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def get_scope(priority: Priority | None = None, background: bool = False) -> PriorityScope:
+    # explicit priority first, then the surrounding scope, then the background flag
+    if priority is not None:
+        return PriorityScope(priority)
+    scope = _scope.get()
+    if scope:
+        return scope
+    return PriorityScope(Priority.BACKGROUND if background else Priority.NORMAL)
+
+
+class _Waiter:
+    def __init__(self, scope: PriorityScope, seq: int):
+        self.scope = scope
+        self.seq = seq
+        self.since = time.monotonic()
+        self.loop = asyncio.get_running_loop()
+        self.future: asyncio.Future = self.loop.create_future()
+        self.granted = False
+
+    def wake(self, error: Exception | None = None):
+        # waiters may belong to event loops of other threads
+        def set_future():
+            if self.future.done():
+                return
+            if error:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(None)
+
+        self.loop.call_soon_threadsafe(set_future)
+
+
+class CallScheduler:
+    def __init__(self, concurrency: int = CONCURRENCY, max_queue: int = MAX_QUEUE):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.running = 0
+        self.dropped = 0
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        # number of calls and total seconds waited by priority
+        self._waited: dict[Priority, tuple[int, float]] = {}
+
+    async def run(self, call: Callable[[], Awaitable[Any]], scope: PriorityScope) -> Any:
+        await self._acquire(scope)
+        try:
+            return await call()
+        finally:
+            self._release()
+
+    async def _acquire(self, scope: PriorityScope):
+        start = time.monotonic()
+        with self._lock:
+            if self.running < self.concurrency and not self._waiters:
+                self.running += 1
+                self._record_wait(scope.priority, 0.0)
+                return
+            if len(self._waiters) >= self.max_queue:
+                self._make_room(scope)
+            waiter = _Waiter(scope, next(self._seq))
+            self._waiters.append(waiter)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    waiter = None
+            if waiter and waiter.granted:
+                # slot was already handed over, pass it on
+                self._release()
+            raise
+        with self._lock:
+            self._record_wait(scope.priority, time.monotonic() - start)
+
+    def _make_room(self, scope: PriorityScope):
+        # drop the newest waiting background call, or this one if it is background itself
+        if scope.priority >= Priority.BACKGROUND:
+            self.dropped += 1
+            raise CallDropped("Utility model is busy, background call dropped.")
+        for waiter in reversed(self._waiters):
+            if waiter.scope.priority >= Priority.BACKGROUND:
+                self._waiters.remove(waiter)
+                self.dropped += 1
+                waiter.wake(CallDropped("Utility model is busy, background call dropped."))
+                return
+
+    def _release(self):
+        # hand the slot to the most urgent waiter, oldest first within the same priority
+        with self._lock:
+            if self._waiters:
+                waiter = min(self._waiters, key=lambda w: (w.scope.priority, w.seq))
+                self._waiters.remove(waiter)
+                waiter.granted = True
+                waiter.wake()
+            else:
+                self.running -= 1
+
+    def _record_wait(self, priority: Priority, seconds: float):
+        count, total = self._waited.get(priority, (0, 0.0))
+        self._waited[priority] = (count + 1, total + seconds)
+
+    def get_stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        queued = {p.name.lower(): 0 for p in Priority}
+        oldest = {p.name.lower(): 0.0 for p in Priority}
+        with self._lock:
+            for waiter in self._waiters:
+                name = Priority(waiter.scope.priority).name.lower()
+                queued[name] += 1
+                oldest[name] = max(oldest[name], now - waiter.since)
+            waited = dict(self._waited)
+        return {
+            "running": self.running,
+            "queued": queued,
+            "oldest_wait": oldest,
+            "average_wait": {
+                Priority(p).name.lower(): (total / count if count else 0.0)
+                for p, (count, total) in waited.items()
+            },
+            "dropped": self.dropped,
+        }
+
+
+_schedulers: dict[str, CallScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(key: str) -> CallScheduler:
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = CallScheduler()
+        return scheduler
+
+
+def get_stats() -> dict[str, dict[str, Any]]:
+    """Queue depth and wait times of all schedulers by model key."""
+    return {key: scheduler.get_stats() for key, scheduler in _schedulers.items()}
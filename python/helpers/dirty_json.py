@@ -1,4 +1,5 @@
 import json
+import re
 
 def try_parse(json_string: str):
     try:
@@ -25,6 +26,7 @@ class DirtyJson:
         self.current_char = None
         self.result = None
         self.stack = []
+        self._stream: _StreamState | None = None
 
     @staticmethod
     def parse_string(json_string):
@@ -52,10 +54,19 @@ class DirtyJson:
         return self.result
 
     def feed(self, chunk):
-        self.json_string += chunk
-        if not self.current_char and self.json_string:
-            self.current_char = self.json_string[0]
-        self._parse()
+        """Incrementally parse the next chunk of a streamed JSON string.
+
+        The parser keeps its position between calls and only consumes new
+        characters, so feeding a stream chunk by chunk costs O(total length)
+        instead of re-parsing the whole text on every chunk. The returned
+        result is the same object on every call and is updated in place,
+        strings and numbers still being received hold their partial value.
+        """
+        if self._stream is None:
+            self._stream = _StreamState()
+        if chunk:
+            self._stream.buffer += chunk
+            _resume_stream(self, self._stream)
         return self.result
 
     def _advance(self, count=1):
@@ -333,3 +344,384 @@ class DirtyJson:
         chars = ["{", "[", '"']
         indices = [input_str.find(char) for char in chars if input_str.find(char) != -1]
         return min(indices) if indices else 0
+
+
+# incremental (streaming) parsing mode used by DirtyJson.feed()
+# mirrors the recursive parser above, but keeps its state in explicit frames so it can
+# stop whenever the input runs out and continue from the same place on the next chunk
+
+_PHASE_KEY = 0
+_PHASE_COLON = 1
+_PHASE_VALUE = 2
+_PHASE_AFTER = 3
+_PHASE_AFTER_COMMA = 4
+
+_TOKEN_STRING = 0
+_TOKEN_MULTILINE = 1
+_TOKEN_NUMBER = 2
+_TOKEN_UNQUOTED = 3
+_TOKEN_KEY = 4
+
+_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_LITERALS = {"t": ("true", True), "f": ("false", False), "n": ("null", None), "u": ("undefined", None)}
+_STRING_STOP = {q: re.compile("[\\\\" + q + "]") for q in ['"', "'", "`"]}
+_UNQUOTED_STOP = re.compile(r"[:,}\]]")
+_UNQUOTED_KEY_STOP = re.compile(r"[\s:,}\]]")
+_WHITESPACE = re.compile(r"\s*")
+_START = re.compile(r'[{\["]')
+
+
+class _Frame:
+    __slots__ = ("container", "phase", "key")
+
+    def __init__(self, container: dict | list, phase: int):
+        self.container = container
+        self.phase = phase
+        self.key = None
+
+
+class _Token:
+    __slots__ = ("kind", "quote", "parts", "escape", "unicode", "frame", "index", "is_key")
+
+    def __init__(self, kind: int, frame: "_Frame | None", quote: str = ""):
+        self.kind = kind
+        self.quote = quote
+        self.parts: list[str] = []
+        self.escape = False
+        self.unicode: str | None = None
+        self.frame = frame
+        self.index = -1
+        self.is_key = kind == _TOKEN_KEY
+
+
+class _StreamState:
+    __slots__ = ("buffer", "pos", "frames", "token", "started", "done")
+
+    def __init__(self):
+        self.buffer = ""  # unconsumed input only, consumed text is dropped
+        self.pos = 0
+        self.frames: list[_Frame] = []
+        self.token: _Token | None = None
+        self.started = False
+        self.done = False
+
+
+def _resume_stream(self: DirtyJson, st: "_StreamState"):
+    try:
+        while not st.done:
+            if st.token:
+                if not _step_token(self, st):
+                    break
+                continue
+            if not st.started:
+                match = _START.search(st.buffer, st.pos)
+                if not match:
+                    st.pos = len(st.buffer)
+                    break
+                st.pos = match.start()
+                if not _start_value(self, st, None):
+                    break
+                st.started = True
+                continue
+            if not st.frames:
+                st.done = True
+                break
+            if not _step_frame(self, st, st.frames[-1]):
+                break
+        if st.token and not st.token.is_key:
+            _place(self, st.token.frame, st.token, _token_partial(st, st.token))
+    finally:
+        # drop consumed input, positions may point past the buffer after multi-char skips
+        consumed = min(st.pos, len(st.buffer))
+        st.buffer = st.buffer[consumed:]
+        st.pos -= consumed
+
+
+def _peek_available(st: _StreamState, count: int) -> bool:
+    return st.pos + count < len(st.buffer)
+
+
+def _skip_whitespace(st: _StreamState) -> bool:
+    # returns False when more input is needed to decide
+    buf = st.buffer
+    while True:
+        if st.pos >= len(buf):
+            return False
+        st.pos = _WHITESPACE.match(buf, st.pos).end()  # type: ignore[union-attr]
+        if st.pos >= len(buf):
+            return False
+        if buf[st.pos] != "/":
+            return True
+        if not _peek_available(st, 1):
+            return False
+        nxt = buf[st.pos + 1]
+        if nxt == "/":
+            end = buf.find("\n", st.pos + 2)
+            if end == -1:
+                return False
+            st.pos = end + 1
+        elif nxt == "*":
+            end = buf.find("*/", st.pos + 2)
+            if end == -1:
+                return False
+            st.pos = end + 2
+        else:
+            return True
+
+
+def _close_frame(self: DirtyJson, st: _StreamState):
+    st.frames.pop()
+    _value_done(st)
+
+
+def _value_done(st: _StreamState):
+    if st.frames:
+        st.frames[-1].phase = _PHASE_AFTER
+    else:
+        st.done = True
+
+
+def _step_frame(self: DirtyJson, st: _StreamState, frame: _Frame) -> bool:
+    if frame.phase in (_PHASE_VALUE, _PHASE_COLON) and isinstance(frame.container, dict):
+        if frame.phase == _PHASE_COLON:
+            if not _skip_whitespace(st):
+                return False
+            if st.buffer[st.pos] == ":":
+                st.pos += 1
+            frame.phase = _PHASE_VALUE
+        return _start_value(self, st, frame)
+
+    if not _skip_whitespace(st):
+        return False
+    char = st.buffer[st.pos]
+
+    if isinstance(frame.container, dict):
+        if frame.phase == _PHASE_AFTER:
+            if char == ",":
+                st.pos += 1
+            frame.phase = _PHASE_KEY
+            return True
+        # _PHASE_KEY
+        if char == "}":
+            if not _peek_available(st, 1):
+                return False
+            st.pos += 2 if st.buffer[st.pos + 1] == "}" else 1
+            _close_frame(self, st)
+            return True
+        if char in ['"', "'"]:
+            st.pos += 1
+            st.token = _Token(_TOKEN_STRING, frame, char)
+            st.token.is_key = True
+        else:
+            st.token = _Token(_TOKEN_KEY, frame)
+        return True
+
+    # list container
+    if frame.phase == _PHASE_AFTER:
+        if char == ",":
+            st.pos += 1
+            frame.phase = _PHASE_AFTER_COMMA
+        elif char != "]":
+            _close_frame(self, st)
+        else:
+            frame.phase = _PHASE_VALUE
+        return True
+    if char == "]":
+        st.pos += 1
+        _close_frame(self, st)
+        return True
+    if frame.phase == _PHASE_AFTER_COMMA:
+        frame.phase = _PHASE_VALUE
+        return True
+    return _start_value(self, st, frame)
+
+
+def _start_value(self: DirtyJson, st: _StreamState, frame: _Frame | None) -> bool:
+    if not _skip_whitespace(st):
+        return False
+    buf = st.buffer
+    char = buf[st.pos]
+
+    if char == "{":
+        if not _peek_available(st, 1):
+            return False
+        # {{ is skipped together with the following character, same as the recursive parser
+        st.pos += 3 if buf[st.pos + 1] == "{" else 1
+        obj: dict = {}
+        _place(self, frame, None, obj)
+        st.frames.append(_Frame(obj, _PHASE_KEY))
+        return True
+    if char == "[":
+        st.pos += 1
+        arr: list = []
+        _place(self, frame, None, arr)
+        st.frames.append(_Frame(arr, _PHASE_VALUE))
+        return True
+    if char in ['"', "'", "`"]:
+        if not _peek_available(st, 2):
+            return False
+        if buf[st.pos + 1 : st.pos + 3] == char * 2:
+            st.pos += 3
+            st.token = _Token(_TOKEN_MULTILINE, frame, char)
+        else:
+            st.pos += 1
+            st.token = _Token(_TOKEN_STRING, frame, char)
+    elif char.isdigit() or char in ["-", "+"]:
+        st.token = _Token(_TOKEN_NUMBER, frame)
+    else:
+        literal = _LITERALS.get(char.lower())
+        if literal:
+            word, value = literal
+            available = buf[st.pos : st.pos + len(word)].lower()
+            if available == word:
+                st.pos += len(word)
+                _place(self, frame, None, value)
+                _value_done(st)
+                return True
+            if len(available) < len(word) and word.startswith(available):
+                return False  # can't tell yet
+        st.token = _Token(_TOKEN_UNQUOTED, frame)
+
+    if frame and isinstance(frame.container, list):
+        frame.container.append(None)
+        st.token.index = len(frame.container) - 1
+    return True
+
+
+def _place(self: DirtyJson, frame: _Frame | None, token: _Token | None, value):
+    if frame is None:
+        self.result = value
+    elif isinstance(frame.container, dict):
+        frame.container[frame.key] = value
+    elif token is not None and token.index >= 0:
+        frame.container[token.index] = value
+    else:
+        frame.container.append(value)
+
+
+def _finish_token(self: DirtyJson, st: _StreamState, token: _Token, value):
+    st.token = None
+    if token.is_key:
+        assert token.frame is not None
+        token.frame.key = value
+        token.frame.phase = _PHASE_COLON
+        return
+    _place(self, token.frame, token, value)
+    _value_done(st)
+
+
+def _token_partial(st: _StreamState, token: _Token):
+    text = "".join(token.parts)
+    token.parts[:] = [text]  # keep joins linear across feeds
+    if token.kind == _TOKEN_MULTILINE:
+        return (text + st.buffer[st.pos :]).strip()
+    if token.kind == _TOKEN_UNQUOTED:
+        return text.strip()
+    if token.kind == _TOKEN_NUMBER:
+        try:
+            return int(text)
+        except ValueError:
+            try:
+                return float(text)
+            except ValueError:
+                return None
+    return text
+
+
+def _step_token(self: DirtyJson, st: _StreamState) -> bool:
+    token = st.token
+    assert token is not None
+    buf = st.buffer
+    kind = token.kind
+
+    if kind == _TOKEN_STRING:
+        return _step_string(self, st, token)
+
+    if kind == _TOKEN_MULTILINE:
+        end = buf.find(token.quote * 3, st.pos)
+        if end == -1:
+            # keep the last two characters, they may start the closing quotes
+            safe = max(st.pos, len(buf) - 2)
+            token.parts.append(buf[st.pos : safe])
+            st.pos = safe
+            return False
+        token.parts.append(buf[st.pos : end])
+        st.pos = end + 3
+        _finish_token(self, st, token, "".join(token.parts).strip())
+        return True
+
+    if kind == _TOKEN_NUMBER:
+        start = st.pos
+        while st.pos < len(buf) and (buf[st.pos].isdigit() or buf[st.pos] in ["-", "+", ".", "e", "E"]):
+            st.pos += 1
+        token.parts.append(buf[start : st.pos])
+        if st.pos >= len(buf):
+            return False
+        number_str = "".join(token.parts)
+        try:
+            value = int(number_str)
+        except ValueError:
+            value = float(number_str)
+        _finish_token(self, st, token, value)
+        return True
+
+    stop = _UNQUOTED_KEY_STOP if kind == _TOKEN_KEY else _UNQUOTED_STOP
+    match = stop.search(buf, st.pos)
+    if not match:
+        token.parts.append(buf[st.pos :])
+        st.pos = len(buf)
+        return False
+    token.parts.append(buf[st.pos : match.start()])
+    if kind == _TOKEN_KEY:
+        st.pos = match.start()
+        _finish_token(self, st, token, "".join(token.parts))
+    else:
+        st.pos = match.start() + 1  # terminator is consumed like in _parse_unquoted_string
+        _finish_token(self, st, token, "".join(token.parts).strip())
+    return True
+
+
+def _step_string(self: DirtyJson, st: _StreamState, token: _Token) -> bool:
+    buf = st.buffer
+    stop = _STRING_STOP[token.quote]
+    while True:
+        if token.unicode is not None:
+            while len(token.unicode) < 4:
+                if st.pos >= len(buf):
+                    return False
+                char = buf[st.pos]
+                if not char.isalnum():
+                    # not a valid \u sequence, the string ends here (character is not consumed)
+                    _finish_token(self, st, token, "".join(token.parts) + "\\u" + token.unicode)
+                    return True
+                token.unicode += char
+                st.pos += 1
+            try:
+                token.parts.append(chr(int(token.unicode, 16)))
+            except ValueError:
+                token.parts.append("\\u" + token.unicode)
+            token.unicode = None
+        if token.escape:
+            if st.pos >= len(buf):
+                return False
+            char = buf[st.pos]
+            token.escape = False
+            if char == "u":
+                st.pos += 1
+                token.unicode = ""
+                continue
+            if char in ['"', "'", "\\", "/", "b", "f", "n", "r", "t"]:
+                token.parts.append(_ESCAPES.get(char, char))
+            st.pos += 1
+        match = stop.search(buf, st.pos)
+        if not match:
+            token.parts.append(buf[st.pos :])
+            st.pos = len(buf)
+            return False
+        token.parts.append(buf[st.pos : match.start()])
+        st.pos = match.end()
+        if match.group() == "\\":
+            token.escape = True
+            continue
+        _finish_token(self, st, token, "".join(token.parts))
+        return True
@@ -23,7 +23,7 @@ from langchain_core.documents import Document
 from langchain.schema import SystemMessage, HumanMessage
 
 from python.helpers.print_style import PrintStyle
-from python.helpers import files, errors
+from python.helpers import files, errors, response_cache
 from agent import Agent
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -384,7 +384,9 @@ class DocumentQueryHelper:
 
             optimized_query = (
                 await self.agent.call_utility_model(
-                    system=system_content, message=human_content
+                    system=system_content,
+                    message=human_content,
+                    cache_ttl=response_cache.DEFAULT_TTL,
                 )
             ).strip()
 
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Sequence
+
+from python.helpers.defer import EventLoopThread
+
+# concurrent embedding requests for the same model (memory recall, consolidation searches, knowledge
+# import, document query) are coalesced into batches, identical texts in flight are embedded once
+
+MAX_WAIT = 0.005  # seconds to wait for more requests before a batch is sent
+DEFAULT_LIMITS = (256, 2)  # max texts per batch, max batches in flight
+
+# per provider limits, local models run on the same machine, remote apis accept large batches
+PROVIDER_LIMITS: dict[str, tuple[int, int]] = {
+    "huggingface": (64, 1),
+    "ollama": (64, 1),
+    "lm_studio": (64, 1),
+    "openai": (1024, 4),
+    "azure": (1024, 4),
+    "mistral": (512, 2),
+    "google": (100, 2),
+    "gemini": (100, 2),
+}
+
+Vector = list[float]
+
+# async batches run on their own event loop, chat loops are never blocked by embedding calls
+LOOP_THREAD_NAME = "Embeddings"
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embed: Callable[[list[str]], list[Vector]],
+        max_batch: int = DEFAULT_LIMITS[0],
+        max_concurrency: int = DEFAULT_LIMITS[1],
+        max_wait: float = MAX_WAIT,
+        aembed: Callable[[list[str]], Awaitable[list[Vector]]] | None = None,
+    ):
+        self.embed_batch = embed
+        self.aembed_batch = aembed
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: dict[str, Future] = {}  # queued texts in arrival order
+        self._in_flight: dict[str, Future] = {}
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="EmbeddingBatch"
+        )
+        self._slots = threading.Semaphore(max_concurrency)
+        self._collector: threading.Thread | None = None
+
+    def submit(self, texts: Sequence[str]) -> list[Future]:
+        """Futures of the vectors of texts, identical texts share one future."""
+        futures = []
+        with self._condition:
+            for text in texts:
+                future = self._pending.get(text) or self._in_flight.get(text)
+                if future is None:
+                    future = self._pending[text] = Future()
+                futures.append(future)
+            self._ensure_collector()
+            self._condition.notify()
+        return futures
+
+    def embed(self, texts: Sequence[str]) -> list[Vector]:
+        return [future.result() for future in self.submit(texts)]
+
+    async def aembed(self, texts: Sequence[str]) -> list[Vector]:
+        futures = self.submit(texts)
+        return list(await asyncio.gather(*[asyncio.wrap_future(f) for f in futures]))
+
+    def _ensure_collector(self):
+        if not self._collector or not self._collector.is_alive():
+            self._collector = threading.Thread(
+                target=self._collect, daemon=True, name="EmbeddingBatcher"
+            )
+            self._collector.start()
+
+    def _collect(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                # give concurrent callers a moment to join the batch
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = dict(list(self._pending.items())[: self.max_batch])
+                for text in batch:
+                    del self._pending[text]
+                self._in_flight.update(batch)
+            self._slots.acquire()
+            if self.aembed_batch:
+                EventLoopThread(LOOP_THREAD_NAME).run_coroutine(self._arun(batch))
+            else:
+                self._executor.submit(self._run, batch)
+
+    def _run(self, batch: dict[str, Future]):
+        try:
+            texts = list(batch)
+            try:
+                vectors = self.embed_batch(texts)
+            except BaseException as e:
+                self._fail(batch, e)
+            else:
+                self._resolve(batch, vectors)
+        finally:
+            self._done(batch)
+
+    async def _arun(self, batch: dict[str, Future]):
+        try:
+            texts = list(batch)
+            try:
+                vectors = await self.aembed_batch(texts)  # type: ignore[misc]
+            except BaseException as e:
+                self._fail(batch, e)
+            else:
+                self._resolve(batch, vectors)
+        finally:
+            self._done(batch)
+
+    def _resolve(self, batch: dict[str, Future], vectors: list[Vector]):
+        # a vector per text or none, zip would leave callers of the missing ones waiting forever
+        if len(vectors) != len(batch):
+            self._fail(batch, ValueError(f"Embedding model returned {len(vectors)} vectors for {len(batch)} texts"))
+            return
+        for text, vector in zip(batch, vectors):
+            batch[text].set_result(vector)
+
+    def _fail(self, batch: dict[str, Future], error: BaseException):
+        for future in batch.values():
+            future.set_exception(error)
+
+    def _done(self, batch: dict[str, Future]):
+        with self._condition:
+            for text, future in batch.items():
+                if self._in_flight.get(text) is future:
+                    del self._in_flight[text]
+        self._slots.release()
+
+
+_batchers: dict[str, EmbeddingBatcher] = {}
+_lock = threading.Lock()
+
+
+def get_batcher(
+    key: str,
+    provider: str,
+    embed: Callable[[list[str]], list[Vector]],
+    aembed: Callable[[list[str]], Awaitable[list[Vector]]] | None = None,
+) -> EmbeddingBatcher:
+    """Batcher for the model key, embed functions are only used when the batcher is created.
+    With aembed batches run as coroutines, otherwise embed runs in worker threads."""
+    with _lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            max_batch, max_concurrency = PROVIDER_LIMITS.get(provider, DEFAULT_LIMITS)
+            batcher = _batchers[key] = EmbeddingBatcher(
+                embed, max_batch, max_concurrency, aembed=aembed
+            )
+        return batcher
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+import uuid
+from typing import Iterator, Sequence
+
+import numpy as np
+from langchain_core.stores import BaseStore
+
+from python.helpers import dotenv
+from python.helpers.print_style import PrintStyle
+
+# cached embeddings of texts, one file per model namespace instead of one file per text (LocalFileStore):
+# fixed size rows of text key and float32 or float16 vector, read through a memory map and appended in
+# batches, the hash index of keys to rows is built from the key column when the file is opened
+
+ENV_DTYPE = "EMBEDDING_CACHE_DTYPE"  # float32 (default) or float16, half the size at ~1e-3 precision
+
+FILE_SUFFIX = ".vectors"
+COMPACT_RATIO = 0.3  # share of replaced or deleted rows that triggers compaction on open
+COMPACT_MIN_ROWS = 1000
+MIGRATE_BATCH = 1000
+
+_MAGIC = b"A0EMB"
+_VERSION = 1
+_HEADER = struct.Struct("<5sBBxI")  # magic, version, dtype code, dimension
+_HEADER_SIZE = 64  # rows start here
+_DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f2")}
+_DTYPE_CODES = {"float32": 1, "float16": 2}
+_NAMESPACE_UUID = uuid.UUID(int=1985)  # as CacheBackedEmbeddings, so files of LocalFileStore can be migrated
+
+
+def text_key(text: str) -> bytes:
+    # the default key encoder of CacheBackedEmbeddings without the namespace prefix
+    sha1_hex = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return uuid.uuid5(_NAMESPACE_UUID, sha1_hex).bytes
+
+
+def get_configured_dtype() -> int:
+    return _DTYPE_CODES.get((dotenv.get_dotenv_value(ENV_DTYPE) or "float32").lower(), 1)
+
+
+class EmbeddingStore(BaseStore[str, list[float]]):
+    """Embedding cache of one model namespace, keys are texts, for CacheBackedEmbeddings."""
+
+    def __init__(self, folder: str, namespace: str):
+        self.folder = folder
+        self.namespace = namespace
+        self.path = os.path.join(folder, namespace + FILE_SUFFIX)
+        self._lock = threading.RLock()
+        self._rows: dict[bytes, int] = {}  # hash index, row by text key
+        self._dim = 0
+        self._dtype_code = 0
+        self._count = 0  # rows in the file, live or not
+        self._map: np.memmap | None = None
+        with self._lock:
+            self._open()
+            self.migrate()
+            if self._needs_compaction():
+                self.compact()
+
+    def mget(self, keys: Sequence[str]) -> list[list[float] | None]:
+        result: list[list[float] | None] = [None] * len(keys)
+        with self._lock:
+            rows = [self._rows.get(text_key(key), -1) for key in keys]
+            found = [i for i, row in enumerate(rows) if row >= 0]
+            if not found:
+                return result
+            vectors = self._get_map()["vector"][[rows[i] for i in found]].astype(np.float32)
+        for i, vector in zip(found, vectors):
+            result[i] = vector.tolist()
+        return result
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, list[float]]]):
+        self._append([text_key(key) for key, _ in key_value_pairs], [value for _, value in key_value_pairs])
+
+    def mdelete(self, keys: Sequence[str]):
+        with self._lock:
+            deleted = [key for key in map(text_key, keys) if key in self._rows]
+            if deleted:
+                # rows of nan mark deleted keys until the next compaction
+                self._append(deleted, [np.full(self._dim, np.nan)] * len(deleted))
+
+    def yield_keys(self, *, prefix: str | None = None) -> Iterator[str]:
+        # texts are not stored, keys are given as in the files of LocalFileStore
+        with self._lock:
+            keys = list(self._rows)
+        for key in keys:
+            name = self.namespace + str(uuid.UUID(bytes=key))
+            if prefix is None or name.startswith(prefix):
+                yield name
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def compact(self):
+        """Rewrite the file with live rows only, in the configured dtype."""
+        with self._lock:
+            if not self._dim:
+                return
+            dtype_code = get_configured_dtype()
+            keys = list(self._rows)
+            rows = np.array([self._rows[key] for key in keys], dtype=np.int64)
+            order = np.argsort(rows)  # keep the file order, reads stay sequential
+            source = self._get_map()
+            data = np.zeros(len(keys), dtype=_row_dtype(dtype_code, self._dim))
+            if len(keys):
+                data["key"] = _keys_to_array(keys)[order]
+                data["vector"] = source["vector"][rows[order]]
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_header(dtype_code, self._dim))
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._map = None  # release the old file before replacing it
+            os.replace(tmp_path, self.path)
+            self._dtype_code = dtype_code
+            self._count = len(keys)
+            self._rows = {key: row for row, key in enumerate(_array_to_keys(data["key"]))}
+
+    def migrate(self):
+        """Move embeddings of this namespace from files of LocalFileStore in the folder into the store."""
+        if not os.path.isdir(self.folder):
+            return
+        legacy = []
+        for name in os.listdir(self.folder):
+            if name.startswith(self.namespace) and len(name) == len(self.namespace) + 36:
+                try:
+                    legacy.append((name, uuid.UUID(name[len(self.namespace) :]).bytes))
+                except ValueError:
+                    pass
+        if not legacy:
+            return
+        PrintStyle.standard(f"Migrating {len(legacy)} cached embeddings of {self.namespace}...")
+        for start in range(0, len(legacy), MIGRATE_BATCH):
+            batch = legacy[start : start + MIGRATE_BATCH]
+            keys, vectors, names = [], [], []
+            for name, key in batch:
+                try:
+                    with open(os.path.join(self.folder, name), "rb") as f:
+                        vectors.append(json.loads(f.read()))
+                    keys.append(key)
+                except (OSError, ValueError):
+                    pass  # unreadable, embedded again when needed
+                names.append(name)
+            if keys:
+                self._append(keys, vectors)
+            # appended durably, the files are not needed anymore
+            for name in names:
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+
+    def _open(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            header = f.read(_HEADER_SIZE)
+        magic, version, dtype_code, dim = (b"", 0, 0, 0)
+        if len(header) == _HEADER_SIZE:
+            magic, version, dtype_code, dim = _HEADER.unpack(header[: _HEADER.size])
+        if magic != _MAGIC or version != _VERSION or dtype_code not in _DTYPES or not dim:
+            PrintStyle.error(f"Embedding cache {self.path} is damaged, starting a new one")
+            os.remove(self.path)
+            return
+        self._dim, self._dtype_code = dim, dtype_code
+        row_size = _row_dtype(dtype_code, dim).itemsize
+        size = os.path.getsize(self.path)
+        self._count = (size - _HEADER_SIZE) // row_size
+        if _HEADER_SIZE + self._count * row_size != size:
+            os.truncate(self.path, _HEADER_SIZE + self._count * row_size)  # torn last row
+        if not self._count:
+            return
+        data = self._get_map()
+        self._index(_array_to_keys(data["key"]), np.isnan(data["vector"][:, 0]), 0)
+
+    def _needs_compaction(self) -> bool:
+        dead = self._count - len(self._rows)
+        if self._dim and self._dtype_code != get_configured_dtype():
+            return True
+        return dead >= COMPACT_MIN_ROWS and dead > COMPACT_RATIO * self._count
+
+    def _append(self, keys: list[bytes], vectors: Sequence):
+        if not keys:
+            return
+        with self._lock:
+            if not self._dim:
+                self._dim = len(vectors[0])
+                self._dtype_code = get_configured_dtype()
+                os.makedirs(self.folder, exist_ok=True)
+                with open(self.path, "wb") as f:
+                    f.write(_header(self._dtype_code, self._dim))
+            valid = [i for i, vector in enumerate(vectors) if len(vector) == self._dim]
+            if len(valid) < len(keys):
+                PrintStyle.error(f"Embeddings of another dimension not cached in {self.path}")
+            if not valid:
+                return
+            keys = [keys[i] for i in valid]
+            data = np.zeros(len(valid), dtype=_row_dtype(self._dtype_code, self._dim))
+            data["key"] = _keys_to_array(keys)
+            data["vector"] = np.asarray([vectors[i] for i in valid], dtype=np.float32)
+            with open(self.path, "ab") as f:
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._index(keys, np.isnan(data["vector"][:, 0]), self._count)
+            self._count += len(keys)
+
+    def _index(self, keys: list[bytes], deleted: np.ndarray, start: int):
+        # later rows of a key replace earlier ones, rows of nan delete it
+        for row, (key, gone) in enumerate(zip(keys, deleted.tolist()), start=start):
+            if gone:
+                self._rows.pop(key, None)
+            else:
+                self._rows[key] = row
+
+    def _get_map(self) -> np.memmap:
+        # mapped again when rows were appended after the last mapping
+        if self._map is None or len(self._map) < self._count:
+            self._map = np.memmap(
+                self.path,
+                dtype=_row_dtype(self._dtype_code, self._dim),
+                mode="r",
+                offset=_HEADER_SIZE,
+                shape=(self._count,),
+            )
+        return self._map
+
+
+def _row_dtype(dtype_code: int, dim: int) -> np.dtype:
+    return np.dtype([("key", np.uint8, (16,)), ("vector", _DTYPES[dtype_code], (dim,))])
+
+
+def _keys_to_array(keys: list[bytes]) -> np.ndarray:
+    return np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, 16)
+
+
+def _array_to_keys(array: np.ndarray) -> list[bytes]:
+    raw = np.ascontiguousarray(array).tobytes()
+    return [raw[i : i + 16] for i in range(0, len(raw), 16)]
+
+
+def _header(dtype_code: int, dim: int) -> bytes:
+    return _HEADER.pack(_MAGIC, _VERSION, dtype_code, dim).ljust(_HEADER_SIZE, b"\0")
+
+
+_stores: dict[str, EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(folder: str, namespace: str) -> EmbeddingStore:
+    """Shared store of the namespace, memory databases using the same model append to one file."""
+    path = os.path.join(os.path.abspath(folder), namespace)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = EmbeddingStore(folder, namespace)
+        return store
@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Any
+
+from python.helpers import dotenv
+
+# local sentence-transformers models by name and load arguments, loaded on first use and shared by all
+# embedding wrappers (memory, knowledge, document query), loading one takes seconds and hundreds of MB
+
+# optional .env configuration
+ENV_DEVICE = "EMBEDDING_DEVICE"  # e.g. cpu, cuda, mps, default is chosen by sentence-transformers
+ENV_THREADS = "EMBEDDING_THREADS"  # torch cpu threads, default is chosen by torch
+ENV_IDLE_TTL = "EMBEDDING_IDLE_TTL"  # seconds without use before a model is unloaded, 0 keeps it loaded
+
+
+class _Entry:
+    def __init__(self):
+        self.model: Any = None
+        self.last_used: float = 0.0
+        self.lock = threading.Lock()
+
+
+_entries: dict[tuple[str, str], _Entry] = {}
+_lock = threading.Lock()
+_threads_applied = False
+
+
+def get_model(name: str, **kwargs: Any) -> Any:
+    """Shared SentenceTransformer for the name and load arguments, loaded on first call."""
+    if "device" not in kwargs and dotenv.get_dotenv_value(ENV_DEVICE):
+        kwargs["device"] = dotenv.get_dotenv_value(ENV_DEVICE)
+    key = (name, repr(sorted(kwargs.items())))
+
+    evict_idle()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            entry = _entries[key] = _Entry()
+
+    # load outside of the registry lock, other models stay available meanwhile
+    with entry.lock:
+        if entry.model is None:
+            _apply_threads()
+            entry.model = _load(name, kwargs)
+        entry.last_used = time.monotonic()
+        return entry.model
+
+
+def evict_idle():
+    ttl = _get_idle_ttl()
+    if ttl <= 0:
+        return
+    now = time.monotonic()
+    with _lock:
+        for key, entry in list(_entries.items()):
+            if entry.model is not None and now - entry.last_used > ttl:
+                # encoders running now keep their own reference until done
+                del _entries[key]
+
+
+def unload(name: str | None = None):
+    with _lock:
+        for key in [key for key in _entries if name is None or key[0] == name]:
+            del _entries[key]
+
+
+def get_stats() -> list[dict[str, Any]]:
+    now = time.monotonic()
+    with _lock:
+        return [
+            {"model": key[0], "kwargs": key[1], "idle": now - entry.last_used}
+            for key, entry in _entries.items()
+            if entry.model is not None
+        ]
+
+
+def _load(name: str, kwargs: dict[str, Any]) -> Any:
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(name, **kwargs)
+
+
+def _apply_threads():
+    global _threads_applied
+    if _threads_applied:
+        return
+    _threads_applied = True
+    threads = int(dotenv.get_dotenv_value(ENV_THREADS, 0) or 0)
+    if threads > 0:
+        import torch
+
+        torch.set_num_threads(threads)
+
+
+def _get_idle_ttl() -> float:
+    try:
+        return float(dotenv.get_dotenv_value(ENV_IDLE_TTL, 0) or 0)
+    except ValueError:
+        return 0.0
@@ -1,12 +1,21 @@
 from abc import abstractmethod
+import os
+import time
+import weakref
 from typing import Any
-from python.helpers import extract_tools, files 
+from python.helpers import extract_tools, files
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from agent import Agent
 
+PIPELINE_CHECK_INTERVAL: float = 1.0  # seconds between checks of extension folders for changes
+
+
 class Extension:
 
+    # stateless extensions keep nothing between calls, one instance per agent is reused
+    stateless: bool = False
+
     def __init__(self, agent: "Agent|None", **kwargs):
         self.agent: "Agent" = agent # type: ignore < here we ignore the type check as there are currently no extensions without an agent
         self.kwargs = kwargs
@@ -16,45 +25,115 @@ class Extension:
         pass
 
 
+class ExtensionPipeline:
+    """Extensions of one extension point for one agent profile, merged and sorted once."""
+
+    def __init__(self, extension_point: str, profile: str | None):
+        self.extension_point = extension_point
+        self.folders = [files.get_abs_path("python/extensions", extension_point)]
+        if profile:
+            self.folders.append(files.get_abs_path("agents", profile, "extensions", extension_point))
+        self.classes: list[type[Extension]] = []
+        self._snapshot: list[tuple[str, int | None]] = []
+        self._checked_at: float = 0.0
+        self._instances: weakref.WeakKeyDictionary[Any, list[Extension | None]] = weakref.WeakKeyDictionary()
+        self._instances_no_agent: list[Extension | None] | None = None
+        self._load()
+
+    def _load(self):
+        self._snapshot = self._take_snapshot()
+        self._checked_at = time.monotonic()
+
+        # merge them, agent profile extensions overwrite defaults
+        unique = {}
+        for folder in self.folders:
+            if files.exists(folder):
+                for cls in extract_tools.load_classes_from_folder(folder, "*", Extension):
+                    unique[_get_file_from_module(cls.__module__)] = cls
+
+        # sort by name
+        self.classes = [unique[name] for name in sorted(unique)]
+        self._instances = weakref.WeakKeyDictionary()
+        self._instances_no_agent = None
+
+    def _take_snapshot(self) -> list[tuple[str, int | None]]:
+        # folder and file modification times, any change reloads the pipeline
+        snapshot = []
+        for folder in self.folders:
+            try:
+                snapshot.append((folder, os.stat(folder).st_mtime_ns))
+                for entry in os.scandir(folder):
+                    if entry.name.endswith(".py"):
+                        snapshot.append((entry.path, entry.stat().st_mtime_ns))
+            except OSError:
+                snapshot.append((folder, None))
+        return snapshot
+
+    def refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < PIPELINE_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        if self._take_snapshot() != self._snapshot:
+            self._load()
+
+    def get_instances(self, agent: "Agent|None") -> list[Extension | None]:
+        # reused instances of stateless extensions, None for extensions created per call
+        if agent is None:
+            if self._instances_no_agent is None:
+                self._instances_no_agent = self._create_instances(agent)
+            return self._instances_no_agent
+        instances = self._instances.get(agent)
+        if instances is None:
+            instances = self._create_instances(agent)
+            self._instances[agent] = instances
+        return instances
+
+    def _create_instances(self, agent: "Agent|None") -> list[Extension | None]:
+        return [cls(agent=agent) if cls.stateless else None for cls in self.classes]
+
+    async def execute(self, agent: "Agent|None", **kwargs):
+        self.refresh()
+        classes = self.classes
+        instances = self.get_instances(agent)
+        for cls, instance in zip(classes, instances):
+            extension = instance or cls(agent=agent)
+            if _timing is None:
+                await extension.execute(**kwargs)
+                continue
+            start = time.perf_counter()
+            try:
+                await extension.execute(**kwargs)
+            finally:
+                key = (self.extension_point, _get_file_from_module(cls.__module__))
+                count, total = _timing.get(key, (0, 0.0))
+                _timing[key] = (count + 1, total + time.perf_counter() - start)
+
+
+_pipelines: dict[tuple[str, str | None], ExtensionPipeline] = {}
+
+
 async def call_extensions(extension_point: str, agent: "Agent|None" = None, **kwargs) -> Any:
+    profile = agent.config.profile if agent else None
+    key = (extension_point, profile or None)
+    pipeline = _pipelines.get(key)
+    if pipeline is None:
+        pipeline = _pipelines[key] = ExtensionPipeline(extension_point, profile)
+    await pipeline.execute(agent, **kwargs)
 
-    # get default extensions
-    defaults = await _get_extensions("python/extensions/" + extension_point)
-    classes = defaults
 
-    # get agent extensions
-    if agent and agent.config.profile:
-        agentics = await _get_extensions("agents/" + agent.config.profile + "/extensions/" + extension_point)
-        if agentics:
-            # merge them, agentics overwrite defaults
-            unique = {}
-            for cls in defaults + agentics:
-                unique[_get_file_from_module(cls.__module__)] = cls
+# per extension call count and total seconds by (extension point, file), None when disabled
+_timing: dict[tuple[str, str], tuple[int, float]] | None = None
 
-            # sort by name
-            classes = sorted(unique.values(), key=lambda cls: _get_file_from_module(cls.__module__))
 
-    # call extensions
-    for cls in classes:
-        await cls(agent=agent).execute(**kwargs)
+def set_timing(enabled: bool):
+    global _timing
+    _timing = {} if enabled else None
 
 
-def _get_file_from_module(module_name: str) -> str:
-    return module_name.split(".")[-1]
+def get_timing() -> dict[tuple[str, str], tuple[int, float]]:
+    return dict(_timing or {})
 
-_cache: dict[str, list[type[Extension]]] = {}
-async def _get_extensions(folder:str):
-    global _cache
-    folder = files.get_abs_path(folder)
-    if folder in _cache:
-        classes = _cache[folder]
-    else:
-        if not files.exists(folder):
-            return []
-        classes = extract_tools.load_classes_from_folder(
-            folder, "*", Extension
-        )
-        _cache[folder] = classes
-
-    return classes
 
+def _get_file_from_module(module_name: str) -> str:
+    return module_name.split(".")[-1]
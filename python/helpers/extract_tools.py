@@ -118,3 +118,21 @@ def load_classes_from_file(file: str, base_class: type[T], one_per_file: bool =
                 break
                 
     return classes
+
+
+# classes loaded by load_classes_from_file_cached, by (file, base class, one per file)
+_class_cache: dict[tuple[str, type, bool], tuple[int, list]] = {}
+
+
+def load_classes_from_file_cached(file: str, base_class: type[T], one_per_file: bool = True) -> list[type[T]]:
+    """Like load_classes_from_file, but the module is executed only again when the file changes.
+    Raises FileNotFoundError when the file does not exist."""
+    abs_path = get_abs_path(file)
+    mtime = os.stat(abs_path).st_mtime_ns
+    key = (abs_path, base_class, one_per_file)
+    cached = _class_cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    classes = load_classes_from_file(abs_path, base_class, one_per_file)
+    _class_cache[key] = (mtime, classes)
+    return classes
@@ -41,40 +41,27 @@ def load_plugin_variables(
         plugin_file = None
 
     if plugin_file and exists(plugin_file):
+        cls = _get_plugin_class(plugin_file)
+        if cls:
+            return cls().get_variables(file, backup_dirs, **kwargs)  # type: ignore < abstract class here is ok, it is always a subclass
+    return {}
 
-        from python.helpers import extract_tools
 
-        classes = extract_tools.load_classes_from_file(
-            plugin_file, VariablesPlugin, one_per_file=False
-        )
-        for cls in classes:
-            return cls().get_variables(file, backup_dirs, **kwargs)  # type: ignore < abstract class here is ok, it is always a subclass
+def _get_plugin_class(plugin_file: str) -> type[VariablesPlugin] | None:
+    from python.helpers import extract_tools
 
-        # load python code and extract variables variables from it
-        # module = None
-        # module_name = dirname(plugin_file).replace("/", ".") + "." + basename(plugin_file, '.py')
-
-        # try:
-        #     spec = importlib.util.spec_from_file_location(module_name, plugin_file)
-        #     if not spec:
-        #         return {}
-        #     module = importlib.util.module_from_spec(spec)
-        #     sys.modules[spec.name] = module
-        #     spec.loader.exec_module(module)  # type: ignore
-        # except ImportError:
-        #     return {}
-
-        # if module is None:
-        #     return {}
-
-        # # Get all classes in the module
-        # class_list = inspect.getmembers(module, inspect.isclass)
-        # # Filter for classes that are subclasses of VariablesPlugin
-        # # iterate backwards to skip imported superclasses
-        # for cls in reversed(class_list):
-        #     if cls[1] is not VariablesPlugin and issubclass(cls[1], VariablesPlugin):
-        #         return cls[1]().get_variables()  # type: ignore
-    return {}
+    # plugin modules are executed again only when the file changes
+    classes = extract_tools.load_classes_from_file_cached(
+        plugin_file, VariablesPlugin, one_per_file=False
+    )
+    return classes[0] if classes else None
+
+
+def _mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
 
 from python.helpers.strings import sanitize_string
@@ -86,33 +73,17 @@ def parse_file(
     if _directories is None:
         _directories = []
 
-    # Find the file in the directories
-    absolute_path = find_file_in_dirs(_filename, _directories)
+    # Find, read and compile the file, cached until the file or its lookup changes
+    template = _get_prompt_template(_filename, _directories, _encoding, parse=True)
 
-    # Read the file content
-    with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
-        content = f.read()
-
-    is_json = is_full_json_template(content)
-    content = remove_code_fences(content)
-    variables = load_plugin_variables(absolute_path, _directories, **kwargs) or {}  # type: ignore
+    variables = template.get_variables(_directories, **kwargs)
     variables.update(kwargs)
-    if is_json:
-        content = replace_placeholders_json(content, **variables)
+    content = template.render(variables, _directories, **kwargs)
+    if template.is_json:
         obj = json.loads(content)
         # obj = replace_placeholders_dict(obj, **variables)
         return obj
-    else:
-        content = replace_placeholders_text(content, **variables)
-        # Process include statements
-        content = process_includes(
-            # here we use kwargs, the plugin variables are not inherited
-            content,
-            _directories,
-            **kwargs,
-        )
-        return content
+    return content
 
 
 def read_prompt_file(
@@ -127,29 +98,173 @@ def read_prompt_file(
         _file = os.path.basename(_file)
         _directories = [folder_path] + _directories
 
+    # Find, read and compile the file, cached until the file or its lookup changes
+    template = _get_prompt_template(_file, _directories, _encoding, parse=False)
+
+    variables = template.get_variables(_directories, **kwargs)
+    variables.update(kwargs)
+
+    # Replace placeholders and process include statements in one pass
+    return template.render(variables, _directories, **kwargs)
+
+
+_INCLUDE_PATTERN = r"{{\s*include\s*['\"](.*?)['\"]\s*}}"
+_PLACEHOLDER_PATTERN = r"{{([^{}]+)}}"
+_text_template_pattern = re.compile(_INCLUDE_PATTERN + "|" + _PLACEHOLDER_PATTERN)
+_placeholder_pattern = re.compile(_PLACEHOLDER_PATTERN)
+
+
+class _PromptTemplate:
+    """
+    Prompt file split into literal text, placeholders and includes. Valid as long as
+    the files and directories it was looked up in keep their modification times.
+    """
+
+    def __init__(
+        self,
+        parts: list[str | tuple[bool, str, str]],
+        is_json: bool,
+        plugin_source: str,
+        plugin_file: str | None,
+        dependencies: list[tuple[str, int | None]],
+    ):
+        self.parts = parts  # literal text or (is_include, name or path, original text)
+        self.is_json = is_json
+        self.plugin_source = plugin_source  # file name the variables plugin is called with
+        self.plugin_file = plugin_file
+        self.dependencies = dependencies
+
+    def is_current(self) -> bool:
+        return all(_mtime(path) == mtime for path, mtime in self.dependencies)
+
+    def get_variables(self, _directories: list[str], **kwargs) -> dict[str, Any]:
+        if not self.plugin_file:
+            return {}
+        cls = _get_plugin_class(self.plugin_file)
+        if not cls:
+            return {}
+        return dict(cls().get_variables(self.plugin_source, _directories, **kwargs) or {})  # type: ignore < abstract class here is ok, it is always a subclass
+
+    def render(self, variables: dict[str, Any], _directories: list[str], **kwargs) -> str:
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            is_include, value, text = part
+            if is_include:
+                # here we use kwargs, the plugin variables are not inherited
+                out.append(_render_include(value, text, variables, _directories, **kwargs))
+            elif value not in variables:
+                out.append(text)
+            elif self.is_json:
+                out.append(json.dumps(variables[value]))
+            else:
+                strval = str(variables[value])
+                if "{{" in strval:
+                    strval = process_includes(strval, _directories, **kwargs)
+                out.append(strval)
+        return "".join(out)
+
+
+def _render_include(
+    path: str, text: str, variables: dict[str, Any], _directories: list[str], **kwargs
+) -> str:
+    if "{{" in path:
+        path = _placeholder_pattern.sub(
+            lambda m: str(variables[m.group(1)]) if m.group(1) in variables else m.group(0),
+            path,
+        )
+    # if the path is absolute, do not process it
+    if os.path.isabs(path):
+        return text
+    # Search for the include file in the directories
+    try:
+        return read_prompt_file(path, _directories, **kwargs)
+    except FileNotFoundError:
+        return text  # Return original if file not found
+
+
+# compiled prompt templates by (parse mode, file name, directories, encoding)
+_prompt_templates: dict[tuple, _PromptTemplate] = {}
+
+
+def _get_prompt_template(
+    _filename: str, _directories: list[str], _encoding: str, parse: bool
+) -> _PromptTemplate:
+    key = (parse, _filename, tuple(_directories), _encoding)
+    template = _prompt_templates.get(key)
+    if template and template.is_current():
+        return template
+    template = _compile_prompt_template(_filename, _directories, _encoding, parse)
+    _prompt_templates[key] = template
+    return template
+
+
+def _compile_prompt_template(
+    _filename: str, _directories: list[str], _encoding: str, parse: bool
+) -> _PromptTemplate:
+    dependencies: list[tuple[str, int | None]] = []
+
     # Find the file in the directories
-    absolute_path = find_file_in_dirs(_file, _directories)
+    absolute_path = _find_file_tracked(_filename, _directories, dependencies)
+    if not absolute_path:
+        raise FileNotFoundError(
+            f"File '{_filename}' not found in any of the provided directories."
+        )
 
     # Read the file content
     with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
         content = f.read()
 
-    variables = load_plugin_variables(_file, _directories, **kwargs) or {}  # type: ignore
-    variables.update(kwargs)
+    is_json = False
+    if parse:
+        is_json = is_full_json_template(content)
+        content = remove_code_fences(content)
+
+    # parse_file passes the found file to the variables plugin, read_prompt_file the file name
+    plugin_source = absolute_path if parse else _filename
+    plugin_file = None
+    if plugin_source.endswith(".md"):
+        plugin_file = _find_file_tracked(
+            basename(plugin_source, ".md") + ".py",
+            [dirname(plugin_source)] + _directories,
+            dependencies,
+        )
 
-    # Replace placeholders with values from kwargs
-    content = replace_placeholders_text(content, **variables)
-
-    # Process include statements
-    content = process_includes(
-        # here we use kwargs, the plugin variables are not inherited
-        content,
-        _directories,
-        **kwargs,
-    )
+    # json templates get placeholders only, text templates also includes
+    parts: list[str | tuple[bool, str, str]] = []
+    pattern = _placeholder_pattern if is_json else _text_template_pattern
+    pos = 0
+    for match in pattern.finditer(content):
+        if match.start() > pos:
+            parts.append(content[pos : match.start()])
+        if is_json:
+            parts.append((False, match.group(1), match.group(0)))
+        elif match.group(1) is not None:
+            parts.append((True, match.group(1), match.group(0)))
+        else:
+            parts.append((False, match.group(2), match.group(0)))
+        pos = match.end()
+    if pos < len(content):
+        parts.append(content[pos:])
 
-    return content
+    return _PromptTemplate(parts, is_json, plugin_source, plugin_file, dependencies)
+
+
+def _find_file_tracked(
+    _filename: str, _directories: list[str], dependencies: list[tuple[str, int | None]]
+) -> str | None:
+    # same lookup as find_file_in_dirs, records modification times of everything checked
+    for directory in _directories:
+        full_path = get_abs_path(directory, _filename)
+        folder = os.path.dirname(full_path)
+        dependencies.append((folder, _mtime(folder)))
+        mtime = _mtime(full_path)
+        if mtime is not None:
+            dependencies.append((full_path, mtime))
+            return full_path
+    return None
 
 
 def read_file(relative_path: str, encoding="utf-8"):
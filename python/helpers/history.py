@@ -5,7 +5,7 @@ from collections.abc import Mapping
 import json
 import math
 from typing import Coroutine, Literal, TypedDict, cast, Union, Dict, List, Any
-from python.helpers import messages, tokens, settings, call_llm
+from python.helpers import messages, tokens, settings, call_llm, response_cache
 from enum import Enum
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
 
@@ -17,6 +17,8 @@ HISTORY_BULK_RATIO = 0.2
 TOPIC_COMPRESS_RATIO = 0.65
 LARGE_MESSAGE_TO_TOPIC_RATIO = 0.25
 RAW_MESSAGE_OUTPUT_TEXT_TRIM = 100
+COMPRESS_SOFT_RATIO = 0.8  # background compression starts at this share of the history limit
+COMPRESS_CONCURRENCY = 4  # max parallel utility model calls of one compression pass
 
 
 class RawMessage(TypedDict):
@@ -41,7 +43,40 @@ class OutputMessage(TypedDict):
 
 class Record:
     def __init__(self):
-        pass
+        # version changes with every change of the record or records it contains,
+        # cached outputs are valid while the version they were created at is current
+        self.version: int = 0
+        self.parent: "Record | None" = None
+        self._summary: str = ""
+        self._cache: dict[str, tuple[int, Any]] = {}
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, value: str):
+        self._summary = value
+        self.touch()
+
+    def touch(self):
+        record = self
+        while record:
+            record.version += 1
+            record = record.parent
+
+    def adopt(self, records: "list[Record]"):
+        for record in records:
+            record.parent = self
+        self.touch()
+
+    def _cached(self, name: str, factory):
+        hit = self._cache.get(name)
+        if hit and hit[0] == self.version:
+            return hit[1]
+        value = factory()
+        self._cache[name] = (self.version, value)
+        return value
 
     @abstractmethod
     def get_tokens(self) -> int:
@@ -77,9 +112,9 @@ class Record:
 
 class Message(Record):
     def __init__(self, ai: bool, content: MessageContent, tokens: int = 0):
+        super().__init__()
         self.ai = ai
         self.content = content
-        self.summary: str = ""
         self.tokens: int = tokens or self.calculate_tokens()
 
     def get_tokens(self) -> int:
@@ -99,7 +134,13 @@ class Message(Record):
         return False
 
     def output(self):
-        return [OutputMessage(ai=self.ai, content=self.summary or self.content)]
+        # the same OutputMessage is returned until the message changes, see output_langchain cache
+        return list(
+            self._cached(
+                "output",
+                lambda: [OutputMessage(ai=self.ai, content=self.summary or self.content)],
+            )
+        )
 
     def output_langchain(self):
         return output_langchain(self.output())
@@ -119,7 +160,11 @@ class Message(Record):
     @staticmethod
     def from_dict(data: dict, history: "History"):
         content = data.get("content", "Content lost")
-        msg = Message(ai=data["ai"], content=content)
+        # skip __init__ to not count tokens that are stored or counted in batch by History.from_dict
+        msg = Message.__new__(Message)
+        Record.__init__(msg)
+        msg.ai = data["ai"]
+        msg.content = content
         msg.summary = data.get("summary", "")
         msg.tokens = data.get("tokens", 0)
         return msg
@@ -127,11 +172,15 @@ class Message(Record):
 
 class Topic(Record):
     def __init__(self, history: "History"):
+        super().__init__()
         self.history = history
-        self.summary: str = ""
+        self.parent = history
         self.messages: list[Message] = []
 
     def get_tokens(self):
+        return self._cached("tokens", self._calculate_tokens)
+
+    def _calculate_tokens(self):
         if self.summary:
             return tokens.approximate_tokens(self.summary)
         else:
@@ -142,9 +191,13 @@ class Topic(Record):
     ) -> Message:
         msg = Message(ai=ai, content=content, tokens=tokens)
         self.messages.append(msg)
+        self.adopt([msg])
         return msg
 
     def output(self) -> list[OutputMessage]:
+        return list(self._cached("output", self._output))
+
+    def _output(self) -> list[OutputMessage]:
         if self.summary:
             return [OutputMessage(ai=False, content=self.summary)]
         else:
@@ -211,17 +264,20 @@ class Topic(Record):
             )
             sum_msg = Message(False, sum_msg_content)
             self.messages[1 : cnt_to_sum + 1] = [sum_msg]
+            self.adopt([sum_msg])
             return True
         return False
 
     async def summarize_messages(self, messages: list[Message]):
         # FIXME: vision bytes are sent to utility LLM, send summary instead
         msg_txt = [m.output_text() for m in messages]
+        # summaries of unchanged messages are served from cache after reloads and retries
         summary = await self.history.agent.call_utility_model(
             system=self.history.agent.read_prompt("fw.topic_summary.sys.md"),
             message=self.history.agent.read_prompt(
                 "fw.topic_summary.msg.md", content=msg_txt
             ),
+            cache_ttl=response_cache.DEFAULT_TTL,
         )
         return summary
 
@@ -239,16 +295,21 @@ class Topic(Record):
         topic.messages = [
             Message.from_dict(m, history=history) for m in data.get("messages", [])
         ]
+        topic.adopt(topic.messages)
         return topic
 
 
 class Bulk(Record):
     def __init__(self, history: "History"):
+        super().__init__()
         self.history = history
-        self.summary: str = ""
+        self.parent = history
         self.records: list[Record] = []
 
     def get_tokens(self):
+        return self._cached("tokens", self._calculate_tokens)
+
+    def _calculate_tokens(self):
         if self.summary:
             return tokens.approximate_tokens(self.summary)
         else:
@@ -257,6 +318,9 @@ class Bulk(Record):
     def output(
         self, human_label: str = "user", ai_label: str = "ai"
     ) -> list[OutputMessage]:
+        return list(self._cached("output", self._output))
+
+    def _output(self) -> list[OutputMessage]:
         if self.summary:
             return [OutputMessage(ai=False, content=self.summary)]
         else:
@@ -288,6 +352,7 @@ class Bulk(Record):
         bulk.summary = data["summary"]
         cls = data["_cls"]
         bulk.records = [Record.from_dict(r, history=history) for r in data["records"]]
+        bulk.adopt(bulk.records)
         return bulk
 
 
@@ -295,21 +360,26 @@ class History(Record):
     def __init__(self, agent):
         from agent import Agent
 
+        super().__init__()
         self.counter = 0
         self.bulks: list[Bulk] = []
         self.topics: list[Topic] = []
         self.current = Topic(history=self)
         self.agent: Agent = agent
+        # langchain messages by OutputMessage, reused by output_langchain while messages are unchanged
+        self.langchain_cache: dict[int, tuple[OutputMessage, BaseMessage]] = {}
 
     def get_tokens(self) -> int:
-        return (
-            self.get_bulks_tokens()
+        # running total, recalculated only from records that changed
+        return self._cached(
+            "tokens",
+            lambda: self.get_bulks_tokens()
             + self.get_topics_tokens()
-            + self.get_current_topic_tokens()
+            + self.get_current_topic_tokens(),
         )
 
-    def is_over_limit(self):
-        limit = _get_ctx_size_for_history()
+    def is_over_limit(self, limit_ratio: float = 1.0):
+        limit = _get_ctx_size_for_history() * limit_ratio
         total = self.get_tokens()
         return total > limit
 
@@ -332,8 +402,12 @@ class History(Record):
         if self.current.messages:
             self.topics.append(self.current)
             self.current = Topic(history=self)
+            self.touch()
 
     def output(self) -> list[OutputMessage]:
+        return list(self._cached("output", self._output))
+
+    def _output(self) -> list[OutputMessage]:
         result: list[OutputMessage] = []
         result += [m for b in self.bulks for m in b.output()]
         result += [m for t in self.topics for m in t.output()]
@@ -346,8 +420,13 @@ class History(Record):
         history.bulks = [Bulk.from_dict(b, history=history) for b in data["bulks"]]
         history.topics = [Topic.from_dict(t, history=history) for t in data["topics"]]
         history.current = Topic.from_dict(data["current"], history=history)
+        history.adopt([*history.bulks, *history.topics, history.current])
+        _calculate_tokens(history.get_messages())
         return history
 
+    def get_messages(self) -> list[Message]:
+        return _collect_messages([*self.bulks, *self.topics, self.current])
+
     def to_dict(self):
         return {
             "_cls": "History",
@@ -361,7 +440,8 @@ class History(Record):
         data = self.to_dict()
         return _json_dumps(data)
 
-    async def compress(self):
+    async def compress(self, limit_ratio: float = 1.0):
+        # limit_ratio below 1 compresses ahead of time, see COMPRESS_SOFT_RATIO
         compressed = False
         while True:
             curr, hist, bulk = (
@@ -369,7 +449,7 @@ class History(Record):
                 self.get_topics_tokens(),
                 self.get_bulks_tokens(),
             )
-            total = _get_ctx_size_for_history()
+            total = _get_ctx_size_for_history() * limit_ratio
             ratios = [
                 (curr, CURRENT_TOPIC_RATIO, "current_topic"),
                 (hist, HISTORY_TOPIC_RATIO, "history_topic"),
@@ -383,7 +463,9 @@ class History(Record):
                     if over_part == "current_topic":
                         compressed_part = await self.current.compress()
                     elif over_part == "history_topic":
-                        compressed_part = await self.compress_topics()
+                        # plan all topics needed to get under the limit in one pass
+                        excess = int(ratio[0] - ratio[1] * total)
+                        compressed_part = await self.compress_topics(excess)
                     else:
                         compressed_part = await self.compress_bulks()
                     if compressed_part:
@@ -395,23 +477,32 @@ class History(Record):
             else:
                 return compressed
 
-    async def compress_topics(self) -> bool:
-        # summarize topics one by one
+    async def compress_topics(self, excess: int = 0) -> bool:
+        # summarize oldest topics concurrently until their tokens cover the excess, at least one
+        to_summarize: list[Topic] = []
+        covered = 0
         for topic in self.topics:
             if not topic.summary:
-                await topic.summarize()
-                return True
+                to_summarize.append(topic)
+                covered += topic.get_tokens()
+                if covered >= excess:
+                    break
+        if to_summarize:
+            await gather_limited([topic.summarize() for topic in to_summarize])
+            return True
 
         # move oldest topic to bulks and summarize
         for topic in self.topics:
             bulk = Bulk(history=self)
             bulk.records.append(topic)
+            bulk.adopt([topic])
             if topic.summary:
                 bulk.summary = topic.summary
             else:
                 await bulk.summarize()
             self.bulks.append(bulk)
             self.topics.remove(topic)
+            self.touch()
             return True
         return False
 
@@ -421,6 +512,7 @@ class History(Record):
         # remove oldest bulk if necessary
         if not compressed:
             self.bulks.pop(0)
+            self.touch()
             return True
         return compressed
 
@@ -429,22 +521,35 @@ class History(Record):
         if len(self.bulks) == 0:
             return False
         # merge bulks in groups of count, even if there are fewer than count
-        bulks = await asyncio.gather(
-            *[
+        bulks = await gather_limited(
+            [
                 self.merge_bulks(self.bulks[i : i + count])
                 for i in range(0, len(self.bulks), count)
             ]
         )
         self.bulks = bulks
+        self.adopt(bulks)
         return True
 
     async def merge_bulks(self, bulks: list[Bulk]) -> Bulk:
         bulk = Bulk(history=self)
         bulk.records = cast(list[Record], bulks)
+        bulk.adopt(bulk.records)
         await bulk.summarize()
         return bulk
 
 
+async def gather_limited(coros: list[Coroutine], limit: int = COMPRESS_CONCURRENCY) -> list:
+    # asyncio.gather with at most limit coroutines running at once, results keep order
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro: Coroutine):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*[run(coro) for coro in coros])
+
+
 def deserialize_history(json_data: str, agent) -> History:
     history = History(agent=agent)
     if json_data:
@@ -453,6 +558,27 @@ def deserialize_history(json_data: str, agent) -> History:
     return history
 
 
+def _collect_messages(records: list[Record]) -> list[Message]:
+    result: list[Message] = []
+    for record in records:
+        if isinstance(record, Message):
+            result.append(record)
+        elif isinstance(record, Topic):
+            result.extend(record.messages)
+        elif isinstance(record, Bulk):
+            result.extend(_collect_messages(record.records))
+    return result
+
+
+def _calculate_tokens(messages: list[Message]):
+    # count tokens of messages without a count in one batch
+    missing = [m for m in messages if not m.tokens]
+    if missing:
+        counts = tokens.approximate_tokens_many([m.output_text() for m in missing])
+        for msg, count in zip(missing, counts):
+            msg.tokens = count
+
+
 def _get_ctx_size_for_history() -> int:
     set = settings.get_settings()
     return int(set["chat_model_ctx_length"] * set["chat_model_ctx_history"])
@@ -516,15 +642,32 @@ def group_messages_abab(messages: list[BaseMessage]) -> list[BaseMessage]:
     return result
 
 
-def output_langchain(messages: list[OutputMessage]):
+def output_langchain(
+    messages: list[OutputMessage],
+    cache: dict[int, tuple[OutputMessage, BaseMessage]] | None = None,
+):
+    # with cache (History.langchain_cache) only messages not converted before are converted
     result = []
     for m in messages:
+        if cache is not None:
+            hit = cache.get(id(m))
+            if hit and hit[0] is m:
+                result.append(hit[1])
+                continue
         if m["ai"]:
             # result.append(AIMessage(content=serialize_content(m["content"])))
-            result.append(AIMessage(_output_content_langchain(content=m["content"])))  # type: ignore
+            converted = AIMessage(_output_content_langchain(content=m["content"]))  # type: ignore
         else:
             # result.append(HumanMessage(content=serialize_content(m["content"])))
-            result.append(HumanMessage(_output_content_langchain(content=m["content"])))  # type: ignore
+            converted = HumanMessage(_output_content_langchain(content=m["content"]))  # type: ignore
+        if cache is not None:
+            cache[id(m)] = (m, converted)
+        result.append(converted)
+    # drop converted messages no longer in history
+    if cache is not None and len(cache) > len(messages) * 2:
+        current = {id(m) for m in messages}
+        for key in [key for key in cache if key not in current]:
+            del cache[key]
     # ensure message type alternation
     result = group_messages_abab(result)
     return result
@@ -1,5 +1,6 @@
-from dataclasses import dataclass, field
 import json
+import threading
+import time
 from typing import Any, Literal, Optional, Dict, TypeVar, TYPE_CHECKING
 
 T = TypeVar("T")
@@ -9,6 +10,7 @@ from python.helpers.strings import truncate_text_by_ratio
 import copy
 from typing import TypeVar
 from python.helpers.secrets import get_secrets_manager
+from python.helpers import state_events
 
 
 if TYPE_CHECKING:
@@ -41,6 +43,7 @@ RESPONSE_CONTENT_MAX_LEN: int = 250_000
 KEY_MAX_LEN: int = 60
 VALUE_MAX_LEN: int = 5000
 PROGRESS_MAX_LEN: int = 120
+UPDATE_WINDOW: float = 0.05  # seconds, updates of the same item within the window are coalesced
 
 
 def _truncate_heading(text: str | None) -> str:
@@ -119,22 +122,71 @@ def _truncate_content(text: str | None, type: Type) -> str:
 
 
 
-@dataclass
 class LogItem:
-    log: "Log"
-    no: int
-    type: Type
-    heading: str = ""
-    content: str = ""
-    temp: bool = False
-    update_progress: Optional[ProgressUpdate] = "persistent"
-    kvps: Optional[OrderedDict] = None  # Use OrderedDict for kvps
-    id: Optional[str] = None  # Add id field
-    guid: str = ""
-
-    def __post_init__(self):
+
+    def __init__(
+        self,
+        log: "Log",
+        no: int,
+        type: Type,
+        heading: str = "",
+        content: str = "",
+        temp: bool = False,
+        update_progress: Optional[ProgressUpdate] = "persistent",
+        kvps: Optional[OrderedDict] = None,  # Use OrderedDict for kvps
+        id: Optional[str] = None,  # Add id field
+        guid: str = "",
+    ):
+        self.log = log
+        self.no = no
+        self.type = type
+        self._heading = heading
+        self._content = content
+        self.temp = temp
+        self.update_progress = update_progress
+        self._kvps = kvps
+        self.id = id
         self.guid = self.log.guid
 
+        # raw values of updates not yet published (coalesced within Log.update_window)
+        self._pending: dict[str, Any] | None = None
+        self._published_at: float = 0.0
+        # log version the item was created at and [version, content_from, kvps_from, kvps_full] per published update
+        self._created: int = len(log.updates)
+        self._marks: list[list] = []
+
+    # reading published values flushes pending updates first so callers always see the latest state
+    @property
+    def heading(self) -> str:
+        self.flush()
+        return self._heading
+
+    @heading.setter
+    def heading(self, value: str):
+        self._heading = value
+
+    @property
+    def content(self) -> str:
+        self.flush()
+        return self._content
+
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+
+    @property
+    def kvps(self) -> Optional[OrderedDict]:
+        self.flush()
+        return self._kvps
+
+    @kvps.setter
+    def kvps(self, value: Optional[OrderedDict]):
+        self._kvps = value
+
+    def flush(self):
+        if self._pending is not None:
+            self.log._publish_item(self)
+
     def update(
         self,
         type: Type | None = None,
@@ -163,34 +215,91 @@ class LogItem:
         content: str | None = None,
         **kwargs,
     ):
+        # append to pending values when there are any so streaming does not force publishing
+        pending = self._pending or {}
         if heading is not None:
-            self.update(heading=self.heading + heading)
+            self.update(heading=pending.get("heading", self._heading) + heading)
         if content is not None:
-            self.update(content=self.content + content)
+            self.update(content=pending.get("content", self._content) + content)
 
         for k, v in kwargs.items():
-            prev = self.kvps.get(k, "") if self.kvps else ""
+            pending = self._pending or {}
+            if k in pending.get("kwargs", {}):
+                prev = pending["kwargs"][k]
+            elif "kvps" in pending:
+                prev = pending["kvps"].get(k, "")
+            else:
+                prev = self._kvps.get(k, "") if self._kvps else ""
             self.update(**{k: prev + v})
 
     def output(self):
+        self.flush()
         return {
             "no": self.no,
             "id": self.id,  # Include id in output
             "type": self.type,
-            "heading": self.heading,
-            "content": self.content,
+            "heading": self._heading,
+            "content": self._content,
+            "temp": self.temp,
+            "kvps": self._kvps,
+        }
+
+    def output_delta(self, start: int):
+        """Output only what changed since log version start, strings that were appended to
+        are sent as the appended part with their previous length in "delta"."""
+        if self._created >= start:
+            return self.output()
+
+        content_from: int | None = None
+        kvps_from: dict[str, int] = {}
+        kvps_full = False
+        for version, c_from, k_from, k_full in reversed(self._marks):
+            if version < start:
+                break
+            if c_from is not None:
+                content_from = c_from if content_from is None else min(content_from, c_from)
+            for key, offset in k_from.items():
+                kvps_from[key] = min(kvps_from.get(key, offset), offset)
+            kvps_full = kvps_full or k_full
+
+        out: dict[str, Any] = {
+            "no": self.no,
+            "id": self.id,
+            "type": self.type,
+            "heading": self._heading,
             "temp": self.temp,
-            "kvps": self.kvps,
         }
+        delta: dict[str, Any] = {}
+        if content_from is not None:
+            out["content"] = self._content[content_from:]
+            delta["content"] = content_from
+        kvps = self._kvps or {}
+        if kvps_full:
+            out["kvps"] = kvps
+        else:
+            out["kvps"] = {}
+            delta["kvps"] = {}
+            for key, offset in kvps_from.items():
+                if key not in kvps:
+                    continue
+                value = kvps[key]
+                out["kvps"][key] = value[offset:] if offset and isinstance(value, str) else value
+                delta["kvps"][key] = offset
+        out["delta"] = delta
+        return out
 
 
 class Log:
 
-    def __init__(self):
+    def __init__(self, update_window: float = UPDATE_WINDOW):
         self.context: "AgentContext|None" = None # set from outside
         self.guid: str = str(uuid.uuid4())
         self.updates: list[int] = []
         self.logs: list[LogItem] = []
+        self.update_window = update_window  # seconds to coalesce updates of the same item
+        self._lock = threading.RLock()
+        self._dirty: set[int] = set()  # items with pending updates
+        self._observed: int = 0  # highest version handed out by output()
         self.set_initial_progress()
 
     def log(
@@ -241,42 +350,113 @@ class Log:
     ):
         item = self.logs[no]
 
-        if id is not None:
-            item.id = id
-
-        if type is not None:
-            item.type = type
-
-        if temp is not None:
-            item.temp = temp
+        with self._lock:
+            # merge raw values into pending update, processing is deferred until publishing
+            pending = item._pending if item._pending is not None else {}
+            for key, value in (
+                ("id", id),
+                ("type", type),
+                ("temp", temp),
+                ("update_progress", update_progress),
+                ("heading", heading),
+                ("content", content),
+            ):
+                if value is not None:
+                    pending[key] = value
+            if kvps is not None:
+                pending["kvps"] = dict(kvps)
+                pending.pop("kwargs", None)  # replaced kvps override earlier kwargs
+            if kwargs:
+                pending.setdefault("kwargs", {}).update(kwargs)
+            item._pending = pending
+            self._dirty.add(no)
+
+            if time.monotonic() - item._published_at >= self.update_window:
+                self._publish_item(item)
+
+        self._notify()
+
+    def _publish_item(self, item: LogItem):
+        with self._lock:
+            pending = item._pending
+            if pending is None:
+                return
+            item._pending = None
+            self._dirty.discard(item.no)
+            item._published_at = time.monotonic()
+
+            if "id" in pending:
+                item.id = pending["id"]
+            if "type" in pending:
+                item.type = pending["type"]
+            if "temp" in pending:
+                item.temp = pending["temp"]
+            if "update_progress" in pending:
+                item.update_progress = pending["update_progress"]
+
+            # adjust all content before processing
+            if "heading" in pending:
+                heading = self._mask_recursive(pending["heading"])
+                heading = _truncate_heading(heading)
+                item._heading = heading
+
+            content_from = None
+            if "content" in pending:
+                content = self._mask_recursive(pending["content"])
+                content = _truncate_content(content, item.type)
+                previous = item._content
+                content_from = len(previous) if previous and content.startswith(previous) else 0
+                item._content = content
+
+            previous_kvps = dict(item._kvps) if item._kvps else {}
+            if "kvps" in pending:
+                kvps = OrderedDict(copy.deepcopy(pending["kvps"]))
+                kvps = self._mask_recursive(kvps)
+                kvps = _truncate_value(kvps)
+                item._kvps = kvps
+            elif item._kvps is None:
+                item._kvps = OrderedDict()
+            if "kwargs" in pending:
+                kwargs = copy.deepcopy(pending["kwargs"])
+                kwargs = self._mask_recursive(kwargs)
+                item._kvps.update(kwargs)
+
+            # record which values changed and whether strings were only appended to
+            kvps_from: dict[str, int] = {}
+            kvps_full = any(key not in item._kvps for key in previous_kvps)
+            for key, value in item._kvps.items():
+                old = previous_kvps.get(key, None)
+                if old is value or (key in previous_kvps and old == value):
+                    continue
+                if isinstance(value, str) and isinstance(old, str) and old and value.startswith(old):
+                    kvps_from[key] = len(old)
+                else:
+                    kvps_from[key] = 0
+
+            # an update nobody has read yet is merged into the previous mark of the same item
+            if (
+                item._marks
+                and self.updates
+                and self.updates[-1] == item.no
+                and len(self.updates) > self._observed
+            ):
+                mark = item._marks[-1]
+                if content_from is not None:
+                    mark[1] = content_from if mark[1] is None else min(mark[1], content_from)
+                for key, offset in kvps_from.items():
+                    mark[2][key] = min(mark[2].get(key, offset), offset)
+                mark[3] = mark[3] or kvps_full
+            else:
+                item._marks.append([len(self.updates), content_from, kvps_from, kvps_full])
+                self.updates.append(item.no)
 
-        if update_progress is not None:
-            item.update_progress = update_progress
+            self._update_progress_from_item(item)
 
-
-        # adjust all content before processing
-        if heading is not None:
-            heading = self._mask_recursive(heading)
-            heading = _truncate_heading(heading)
-            item.heading = heading
-        if content is not None:
-            content = self._mask_recursive(content)
-            content = _truncate_content(content, item.type)
-            item.content = content
-        if kvps is not None:
-            kvps = OrderedDict(copy.deepcopy(kvps))
-            kvps = self._mask_recursive(kvps)
-            kvps = _truncate_value(kvps)
-            item.kvps = kvps
-        elif item.kvps is None:
-            item.kvps = OrderedDict()
-        if kwargs:
-            kwargs = copy.deepcopy(kwargs)
-            kwargs = self._mask_recursive(kwargs)
-            item.kvps.update(kwargs)
-
-        self.updates += [item.no]
-        self._update_progress_from_item(item)
+    def flush(self):
+        """Publish all pending updates."""
+        with self._lock:
+            for no in list(self._dirty):
+                self._publish_item(self.logs[no])
 
     def set_progress(self, progress: str, no: int = 0, active: bool = True):
         progress = self._mask_recursive(progress)
@@ -291,31 +471,49 @@ class Log:
         self.set_progress("Waiting for input", 0, False)
 
     def output(self, start=None, end=None):
-        if start is None:
-            start = 0
-        if end is None:
-            end = len(self.updates)
-
-        out = []
-        seen = set()
-        for update in self.updates[start:end]:
-            if update not in seen:
-                out.append(self.logs[update].output())
-                seen.add(update)
-
-        return out
+        """Output changes since log version start, items created since then are sent whole,
+        older items only with their changed parts (see LogItem.output_delta)."""
+        with self._lock:
+            self.flush()
+            if start is None:
+                start = 0
+            if end is None:
+                end = len(self.updates)
+            self._observed = max(self._observed, end)
+
+            out = []
+            seen = set()
+            for update in self.updates[start:end]:
+                if update not in seen:
+                    out.append(self.logs[update].output_delta(start))
+                    seen.add(update)
+
+            return out
+
+    def output_items(self, start: int = 0):
+        """Output whole log items starting at item number start."""
+        with self._lock:
+            return [item.output() for item in self.logs[start:]]
 
     def reset(self):
-        self.guid = str(uuid.uuid4())
-        self.updates = []
-        self.logs = []
-        self.set_initial_progress()
+        with self._lock:
+            self.guid = str(uuid.uuid4())
+            self.updates = []
+            self.logs = []
+            self._dirty = set()
+            self._observed = 0
+            self.set_initial_progress()
+        self._notify()
+        state_events.notify(state_events.CONTEXTS)  # log guid in the context list
+
+    def _notify(self):
+        state_events.notify(state_events.LOG, self.context.id if self.context else "")
 
     def _update_progress_from_item(self, item: LogItem):
-        if item.heading and item.update_progress != "none":
+        if item._heading and item.update_progress != "none":
             if item.no >= self.progress_no:
                 self.set_progress(
-                    item.heading,
+                    item._heading,
                     (item.no if item.update_progress == "persistent" else -1),
                 )
 
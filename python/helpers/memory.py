@@ -1,6 +1,7 @@
+import asyncio
 from datetime import datetime
-from typing import Any, List, Sequence
-from langchain.storage import InMemoryByteStore, LocalFileStore
+from typing import Any, Iterable, List, Sequence
+from langchain.storage import InMemoryByteStore
 from langchain.embeddings import CacheBackedEmbeddings
 from python.helpers import guids
 
@@ -18,7 +19,7 @@ from langchain_community.vectorstores.utils import (
 )
 from langchain_core.embeddings import Embeddings
 
-import os, json
+import os, sys, json, pickle, weakref
 
 import numpy as np
 
@@ -26,19 +27,42 @@ from python.helpers.print_style import PrintStyle
 from . import files
 from langchain_core.documents import Document
 from python.helpers import knowledge_import
+from python.helpers import memory_wal
+from python.helpers.memory_wal import MemoryWal
+from python.helpers.memory_index import MemoryIndex
+from python.helpers import memory_filter
+from python.helpers.memory_cache import MemoryCache
+from python.helpers import embedding_cache
 from python.helpers.log import Log, LogItem
 from enum import Enum
 from agent import Agent, AgentContext
 import models
 import logging
-from simpleeval import simple_eval
 
 
 # Raise the log level so WARNING messages aren't shown
 logging.getLogger("langchain_core.vectorstores.base").setLevel(logging.ERROR)
 
 
+# metadata fields memory vectors are partitioned by, searches filtered on them only scan matching partitions,
+# e.g. add "knowledge_source" to separate imported knowledge from memories
+PARTITION_KEYS = ("area",)
+
+
+def partition_key(metadata: dict[str, Any]) -> tuple:
+    return tuple(_partition_value(metadata.get(name)) for name in PARTITION_KEYS)
+
+
+def _partition_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        value = value.value
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+
 class MyFaiss(FAISS):
+    wal: MemoryWal | None = None  # log of changes since the last checkpoint, see Memory._write
+    unloaded: bool = False  # dropped from Memory.index, a newer instance of the folder may be loaded
+
     # override aget_by_ids
     def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
         # return all self.docstore._dict[id] in ids
@@ -50,6 +74,173 @@ class MyFaiss(FAISS):
     def get_all_docs(self):
         return self.docstore._dict  # type: ignore
 
+    # adds go to the index partition of their metadata, otherwise the same as FAISS.__add
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[tuple[str, list[float]]],
+        metadatas: Iterable[dict] | None = None,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        if not isinstance(self.index, MemoryIndex):
+            return super().add_embeddings(text_embeddings, metadatas=metadatas, ids=ids, **kwargs)
+        pairs = list(text_embeddings)
+        if not pairs:
+            return []
+        metadatas = list(metadatas) if metadatas else [{} for _ in pairs]
+        ids = list(ids) if ids else [guids.generate_id(10) for _ in pairs]
+        vectors = np.array([vector for _, vector in pairs], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vectors)
+        start = len(self.index_to_docstore_id)
+        self.index.add(vectors, [partition_key(metadata) for metadata in metadatas])
+        self.docstore.add(  # type: ignore
+            {id: Document(text, metadata=metadata) for id, (text, _), metadata in zip(ids, pairs, metadatas)}
+        )
+        self.index_to_docstore_id.update({start + i: id for i, id in enumerate(ids)})
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        vectors = self.embedding_function.embed_documents(texts)  # type: ignore
+        return self.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids, **kwargs)
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        vectors = await self.embedding_function.aembed_documents(texts)  # type: ignore
+        return self.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids, **kwargs)
+
+    def update_partitions(self) -> bool:
+        # regroup a memory indexed before partitioning or with other partition keys
+        if not isinstance(self.index, MemoryIndex) or self.index.key_names == PARTITION_KEYS:
+            return False
+        docs = self.get_all_docs()
+        keys = [partition_key(docs[self.index_to_docstore_id[i]].metadata) for i in range(self.index.ntotal)]
+        self.index.partition(keys, PARTITION_KEYS)
+        return True
+
+    def search_filtered(
+        self, embedding: list[float], k: int, threshold: float, condition: memory_filter.Filter | None = None
+    ) -> list[Document]:
+        """Documents most similar to the embedding with relevance over threshold that match the condition."""
+        partitions = self._get_partitions(condition)
+        total = self.index.count(partitions) if isinstance(self.index, MemoryIndex) else self.index.ntotal
+        relevance = self._select_relevance_score_fn()
+        vector = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+        fetch = k if condition is None else 4 * k
+        while total:
+            fetch = min(fetch, total)
+            if isinstance(self.index, MemoryIndex):
+                scores, positions = self.index.search(vector, fetch, partitions=partitions)
+            else:
+                scores, positions = self.index.search(vector, fetch)
+            docs: list[Document] = []
+            exhausted = fetch >= total
+            for score, position in zip(scores[0], positions[0]):
+                if position < 0:
+                    break
+                if relevance(float(score)) < threshold:
+                    exhausted = True  # ordered by score, the rest is below the threshold too
+                    break
+                doc = self.docstore.search(self.index_to_docstore_id[int(position)])
+                if isinstance(doc, Document) and (condition is None or condition(doc.metadata)):
+                    docs.append(doc)
+                    if len(docs) >= k:
+                        return docs
+            if exhausted:
+                return docs
+            fetch *= 4  # too many candidates filtered out, search deeper
+        return []
+
+    def _get_partitions(self, condition: memory_filter.Filter | None) -> list | None:
+        # partitions that can hold matches of the condition, None for all
+        if condition is None or not isinstance(self.index, MemoryIndex) or self.index.key_names != PARTITION_KEYS:
+            return None
+        allowed = [condition.get_values(name) for name in PARTITION_KEYS]
+        if all(values is None for values in allowed):
+            return None
+        return [
+            key
+            for key in self.index.get_partitions()
+            if all(values is None or value in values for value, values in zip(key, allowed))
+        ]
+
+    def apply_change(self, record: dict[str, Any]):
+        # changes are idempotent, a log replayed over a checkpoint that already contains them is harmless
+        if record["op"] == "delete":
+            ids = [id for id in record["ids"] if id in self.docstore._dict]  # type: ignore
+            if ids:
+                self.delete(ids=ids)
+        elif record["op"] == "add":
+            new = [i for i, id in enumerate(record["ids"]) if id not in self.docstore._dict]  # type: ignore
+            if not new:
+                return
+            texts = [record["texts"][i] for i in new]
+            vectors = record["vectors"][new]
+            if vectors.shape[1] != self.index.d:
+                # logged before an embedding model change, embed again
+                vectors = self.embedding_function.embed_documents(texts)  # type: ignore
+            self.add_embeddings(
+                text_embeddings=list(zip(texts, list(vectors))),
+                metadatas=[record["metadatas"][i] for i in new],
+                ids=[record["ids"][i] for i in new],
+            )
+
+    def replay(self, wal: MemoryWal) -> int:
+        count = 0
+        for record in wal.records():
+            self.apply_change(record)
+            count += 1
+        return count
+
+    def snapshot(self) -> dict[str, bytes]:
+        # the files of save_local, serialized in memory so they can be written without holding the lock
+        return {
+            **self.index.serialize(),  # type: ignore
+            "index.pkl": pickle.dumps((self.docstore, self.index_to_docstore_id)),
+        }
+
+    def get_memory_size(self) -> int:
+        # estimate, python objects of the docstore are counted roughly by content
+        size = self.index.memory_size() if isinstance(self.index, MemoryIndex) else self.index.ntotal * self.index.d * 4
+        for doc in list(self.get_all_docs().values()):
+            size += sys.getsizeof(doc.page_content) + 100 * len(doc.metadata) + 500
+        return size
+
+    def add_user(self, memory: "Memory"):
+        if not hasattr(self, "_users"):
+            self._users: weakref.WeakSet = weakref.WeakSet()
+        self._users.add(memory)
+
+    def in_use(self) -> bool:
+        # Memory wrappers still referenced, e.g. by a memorizing task after its context finished
+        return bool(getattr(self, "_users", None))
+
+    def unload(self):
+        # no longer cached, logged changes stay on disk and are replayed on the next load
+        self.unloaded = True
+        if self.wal:
+            self.wal.close()
+
+    def update_index(self):
+        # promote to another index type by size or drop removed vectors, searches continue meanwhile
+        if isinstance(self.index, MemoryIndex) and self.index.needs_rebuild():
+            self.index.rebuild_in_background()
+
 
 class Memory:
 
@@ -59,7 +250,13 @@ class Memory:
         SOLUTIONS = "solutions"
         INSTRUMENTS = "instruments"
 
-    index: dict[str, "MyFaiss"] = {}
+    # loaded databases by memory subdir, see memory_cache
+    index: MemoryCache["MyFaiss"] = MemoryCache(
+        size_fn=lambda db: db.get_memory_size(),
+        pinned_fn=lambda: get_running_memory_subdirs(),
+        evict_fn=lambda memory_subdir, db: db.unload(),
+        in_use_fn=lambda db: db.in_use(),
+    )
 
     @staticmethod
     async def get(agent: Agent):
@@ -69,12 +266,18 @@ class Memory:
                 type="util",
                 heading=f"Initializing VectorDB in '/{memory_subdir}'",
             )
-            db, created = Memory.initialize(
+            # loading the index and embedding probes block, keep them off the event loop
+            db, created = await asyncio.to_thread(
+                Memory.initialize,
                 log_item,
                 agent.config.embeddings_model,
                 memory_subdir,
                 False,
             )
+            if Memory.index.get(memory_subdir) is not None:
+                # initialized by a concurrent call meanwhile
+                db.unload()
+                return Memory(db=Memory.index[memory_subdir], memory_subdir=memory_subdir)
             Memory.index[memory_subdir] = db
             wrap = Memory(db, memory_subdir=memory_subdir)
             knowledge_subdirs = get_knowledge_subdirs_by_memory_subdir(
@@ -95,17 +298,22 @@ class Memory:
         log_item: LogItem | None = None,
         preload_knowledge: bool = True,
     ):
-        if not Memory.index.get(memory_subdir):
+        if Memory.index.get(memory_subdir) is None:
             import initialize
 
             agent_config = initialize.initialize_agent()
             model_config = agent_config.embeddings_model
-            db, _created = Memory.initialize(
+            db, _created = await asyncio.to_thread(
+                Memory.initialize,
                 log_item=log_item,
                 model_config=model_config,
                 memory_subdir=memory_subdir,
                 in_memory=False,
             )
+            if Memory.index.get(memory_subdir) is not None:
+                # initialized by a concurrent call meanwhile
+                db.unload()
+                return Memory(db=Memory.index[memory_subdir], memory_subdir=memory_subdir)
             wrap = Memory(db, memory_subdir=memory_subdir)
             if preload_knowledge:
                 knowledge_subdirs = get_knowledge_subdirs_by_memory_subdir(
@@ -121,7 +329,7 @@ class Memory:
     @staticmethod
     async def reload(agent: Agent):
         memory_subdir = get_agent_memory_subdir(agent)
-        if Memory.index.get(memory_subdir):
+        if Memory.index.get(memory_subdir) is not None:
             del Memory.index[memory_subdir]
         return await Memory.get(agent)
 
@@ -146,12 +354,6 @@ class Memory:
         # make sure embeddings and database directories exist
         os.makedirs(db_dir, exist_ok=True)
 
-        if in_memory:
-            store = InMemoryByteStore()
-        else:
-            os.makedirs(em_dir, exist_ok=True)
-            store = LocalFileStore(em_dir)
-
         embeddings_model = models.get_embedding_model(
             model_config.provider,
             model_config.name,
@@ -162,9 +364,16 @@ class Memory:
         )
 
         # here we setup the embeddings model with the chosen cache storage
-        embedder = CacheBackedEmbeddings.from_bytes_store(
-            embeddings_model, store, namespace=embeddings_model_id
-        )
+        if in_memory:
+            embedder = CacheBackedEmbeddings.from_bytes_store(
+                embeddings_model, InMemoryByteStore(), namespace=embeddings_model_id
+            )
+        else:
+            # one file per model, embeddings cached by earlier versions in one file per text are migrated
+            os.makedirs(em_dir, exist_ok=True)
+            embedder = CacheBackedEmbeddings(
+                embeddings_model, embedding_cache.get_store(em_dir, embeddings_model_id)
+            )
 
         # initial DB and docs variables
         db: MyFaiss | None = None
@@ -172,6 +381,9 @@ class Memory:
 
         created = False
 
+        # changes since the last checkpoint, finishes an interrupted checkpoint first
+        wal = memory_wal.get_wal(db_dir)
+
         # if db folder exists and is not empty:
         if os.path.exists(db_dir) and files.exists(db_dir, "index.faiss"):
             db = MyFaiss.load_local(
@@ -182,6 +394,14 @@ class Memory:
                 # normalize_L2=True,
                 relevance_score_fn=Memory._cosine_normalizer,
             )  # type: ignore
+            index = MemoryIndex.load(db.index, db_dir, len(db.index_to_docstore_id))
+            db.wal = wal
+            if index:
+                db.index = index
+                if wal.has_records():
+                    if log_item:
+                        log_item.stream(progress="\nReplaying memory log")
+                    db.replay(wal)
 
             # if there is a mismatch in embeddings used, re-index the whole DB
             emb_ok = False
@@ -195,14 +415,16 @@ class Memory:
                     # model matches
                     emb_ok = True
 
-            # re-index -  create new DB and insert existing docs
-            if db and not emb_ok:
+            # re-index -  create new DB and insert existing docs, also if the index files are damaged
+            if db and (not emb_ok or not index):
                 docs = db.get_all_docs()
                 db = None
+            elif db.update_partitions():
+                Memory._save_db_file(db, memory_subdir)  # partitioned once
 
         # DB not loaded, create one
         if not db:
-            index = faiss.IndexFlatIP(len(embedder.embed_query("example")))
+            index = MemoryIndex.create(len(embedder.embed_query("example")), PARTITION_KEYS)
 
             db = MyFaiss(
                 embedding_function=embedder,
@@ -220,8 +442,11 @@ class Memory:
                 if log_item:
                     log_item.stream(progress="\nIndexing memories")
                 db.add_documents(documents=list(docs.values()), ids=list(docs.keys()))
+            if wal.has_records():
+                db.replay(wal)  # changes not in the loaded documents, replaying is idempotent
 
-            # save DB
+            # save DB, the checkpoint includes and drops any logged changes
+            db.wal = wal
             Memory._save_db_file(db, memory_subdir)
             # save meta file
             meta_file_path = files.get_abs_path(db_dir, "embedding.json")
@@ -237,6 +462,7 @@ class Memory:
 
             created = True
 
+        db.update_index()
         return db, created
 
     def __init__(
@@ -246,6 +472,7 @@ class Memory:
     ):
         self.db = db
         self.memory_subdir = memory_subdir
+        db.add_user(self)  # not evicted while referenced
 
     async def preload_knowledge(
         self, log_item: LogItem | None, kn_dirs: list[str], memory_subdir: str
@@ -342,14 +569,8 @@ class Memory:
         self, query: str, limit: int, threshold: float, filter: str = ""
     ):
         comparator = Memory._get_comparator(filter) if filter else None
-
-        return await self.db.asearch(
-            query,
-            search_type="similarity_score_threshold",
-            k=limit,
-            score_threshold=threshold,
-            filter=comparator,
-        )
+        embedding = await self.db.embedding_function.aembed_query(query)  # type: ignore
+        return await asyncio.to_thread(self.db.search_filtered, embedding, limit, threshold, comparator)
 
     async def delete_documents_by_query(
         self, query: str, threshold: float, filter: str = ""
@@ -374,15 +595,13 @@ class Memory:
                 # fnd = self.db.get(where={"id": {"$in": document_ids}})
                 # if fnd["ids"]: self.db.delete(ids=fnd["ids"])
                 # tot += len(fnd["ids"])
-                await self.db.adelete(ids=document_ids)
+                await self._write(delete_ids=document_ids)  # persist
                 tot += len(document_ids)
 
             # If fewer than K document IDs, break the loop
             if len(document_ids) < k:
                 break
 
-        if tot:
-            self._save_db()  # persist
         return removed
 
     async def delete_documents_by_ids(self, ids: list[str]):
@@ -392,10 +611,7 @@ class Memory:
         )  # existing docs to remove (prevents error)
         if rem_docs:
             rem_ids = [doc.metadata["id"] for doc in rem_docs]  # ids to remove
-            await self.db.adelete(ids=rem_ids)
-
-        if rem_docs:
-            self._save_db()  # persist
+            await self._write(delete_ids=rem_ids)  # persist
         return rem_docs
 
     async def insert_text(self, text, metadata: dict = {}):
@@ -414,16 +630,53 @@ class Memory:
                 if not doc.metadata.get("area", ""):
                     doc.metadata["area"] = Memory.Area.MAIN.value
 
-            await self.db.aadd_documents(documents=docs, ids=ids)
-            self._save_db()  # persist
+            await self._write(docs=docs, ids=ids)  # persist
         return ids
 
     async def update_documents(self, docs: list[Document]):
         ids = [doc.metadata["id"] for doc in docs]
-        await self.db.adelete(ids=ids)  # delete originals
-        ins = await self.db.aadd_documents(documents=docs, ids=ids)  # add updated
-        self._save_db()  # persist
-        return ins
+        # delete originals, add updated
+        await self._write(delete_ids=ids, docs=docs, ids=ids)  # persist
+        return ids
+
+    async def _write(
+        self,
+        delete_ids: list[str] | None = None,
+        docs: list[Document] | None = None,
+        ids: list[str] | None = None,
+    ):
+        # changes are applied and appended to the memory log, the whole index is only written by checkpoints
+        records: list[dict[str, Any]] = []
+        if delete_ids:
+            records.append({"op": "delete", "ids": list(delete_ids)})
+        if docs and ids:
+            texts = [doc.page_content for doc in docs]
+            vectors = await self.db.embedding_function.aembed_documents(texts)  # type: ignore
+            records.append(
+                {
+                    "op": "add",
+                    "ids": list(ids),
+                    "texts": texts,
+                    "metadatas": [doc.metadata for doc in docs],
+                    "vectors": np.asarray(vectors, dtype=np.float32),
+                }
+            )
+        if not records:
+            return
+        if self.db.unloaded:
+            # another instance may own the folder now, its checkpoints would drop these changes
+            raise RuntimeError(f"Memory '{self.memory_subdir}' was unloaded, get it again with Memory.get")
+
+        if not self.db.wal:
+            self.db.wal = memory_wal.get_wal(abs_db_dir(self.memory_subdir))
+        wal = self.db.wal
+        with wal.lock:
+            for record in records:
+                self.db.apply_change(record)
+                wal.append(record)
+        if wal.should_checkpoint():
+            wal.checkpoint_in_background(self.db.snapshot)
+        self.db.update_index()
 
     def _save_db(self):
         Memory._save_db_file(self.db, self.memory_subdir)
@@ -436,20 +689,13 @@ class Memory:
 
     @staticmethod
     def _save_db_file(db: MyFaiss, memory_subdir: str):
-        abs_dir = abs_db_dir(memory_subdir)
-        db.save_local(folder_path=abs_dir)
+        if not db.wal:
+            db.wal = memory_wal.get_wal(abs_db_dir(memory_subdir))
+        db.wal.checkpoint(db.snapshot)
 
     @staticmethod
     def _get_comparator(condition: str):
-        def comparator(data: dict[str, Any]):
-            try:
-                result = simple_eval(condition, names=data)
-                return result
-            except Exception as e:
-                PrintStyle.error(f"Error evaluating condition: {e}")
-                return False
-
-        return comparator
+        return memory_filter.compile_filter(condition)
 
     @staticmethod
     def _score_normalizer(val: float) -> float:
@@ -489,7 +735,23 @@ def get_custom_knowledge_subdir_abs(agent: Agent) -> str:
 
 def reload():
     # clear the memory index, this will force all DBs to reload
-    Memory.index = {}
+    Memory.index.clear()
+
+
+def get_memory_usage() -> dict[str, Any]:
+    return Memory.index.get_usage()
+
+
+def get_running_memory_subdirs() -> set[str]:
+    # memory used by contexts with a running task stays loaded
+    subdirs = set()
+    for context in AgentContext.all():
+        if context.task and context.task.is_alive():
+            try:
+                subdirs.add(get_context_memory_subdir(context))
+            except Exception:
+                pass  # e.g. project removed meanwhile
+    return subdirs
 
 
 def abs_db_dir(memory_subdir: str) -> str:
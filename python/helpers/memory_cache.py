@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, TypeVar
+
+from python.helpers import dotenv
+from python.helpers.print_style import PrintStyle
+
+# loaded memory databases by memory subdir, bounded by count and estimated size with LRU eviction,
+# databases in use by running contexts are pinned, evicted ones are loaded again on next access
+
+ENV_MAX_DBS = "MEMORY_CACHE_MAX_DBS"
+ENV_MAX_MB = "MEMORY_CACHE_MAX_MB"
+
+MAX_DBS = 8
+MAX_MB = 2048
+MIN_IDLE = 60  # seconds, recently used databases are kept as requests may still hold them
+ENFORCE_INTERVAL = 30  # seconds, limits are also checked on lookups, databases too recent before may be due
+
+T = TypeVar("T")
+
+
+class _Entry(Generic[T]):
+    def __init__(self, value: T, size: int):
+        self.value = value
+        self.size = size
+        self.last_used = time.monotonic()
+
+
+class MemoryCache(Generic[T]):
+    """Dict like LRU cache, values are evicted when over the limits unless pinned, in use or recently used."""
+
+    def __init__(
+        self,
+        size_fn: Callable[[T], int],
+        pinned_fn: Callable[[], set[str]] = lambda: set(),
+        evict_fn: Callable[[str, T], None] = lambda key, value: None,
+        in_use_fn: Callable[[T], bool] = lambda value: False,
+    ):
+        self._size_fn = size_fn
+        self._pinned_fn = pinned_fn
+        self._evict_fn = evict_fn
+        self._in_use_fn = in_use_fn
+        self._enforced_at = 0.0
+        self._entries: OrderedDict[str, _Entry[T]] = OrderedDict()
+        self._lock = threading.RLock()
+        self.evictions = 0
+
+    def get(self, key: str, default: T | None = None) -> T | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used = time.monotonic()
+            due = time.monotonic() - self._enforced_at >= ENFORCE_INTERVAL
+        if due:
+            self.enforce()
+        return entry.value if entry is not None else default
+
+    def __getitem__(self, key: str) -> T:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: T):
+        with self._lock:
+            replaced = self._entries.pop(key, None)
+            self._entries[key] = _Entry(value, 0)  # sized by enforce
+        if replaced is not None and replaced.value is not value:
+            self._evict(key, replaced.value)
+        self.enforce()
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key)
+        self._evict(key, entry.value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+        for key, entry in entries:
+            self._evict(key, entry.value)
+
+    def enforce(self) -> list[str]:
+        """Evict least recently used databases while over the limits, returns their keys."""
+        max_dbs, max_bytes = get_limits()
+        pinned = self._pinned_fn()
+        evicted: list[tuple[str, T]] = []
+        with self._lock:
+            self._enforced_at = time.monotonic()
+            self._update_sizes()
+            count = len(self._entries)
+            total = sum(entry.size for entry in self._entries.values())
+            now = time.monotonic()
+            for key, entry in list(self._entries.items()):  # least recently used first
+                if count <= max_dbs and total <= max_bytes:
+                    break
+                if key in pinned or now - entry.last_used < MIN_IDLE or self._in_use_fn(entry.value):
+                    continue
+                del self._entries[key]
+                evicted.append((key, entry.value))
+                count -= 1
+                total -= entry.size
+            self.evictions += len(evicted)
+        for key, value in evicted:
+            self._evict(key, value)
+        return [key for key, _ in evicted]
+
+    def get_usage(self) -> dict[str, Any]:
+        """Estimated memory use of loaded databases, most recently used first."""
+        max_dbs, max_bytes = get_limits()
+        pinned = self._pinned_fn()
+        with self._lock:
+            self._update_sizes()
+            now = time.monotonic()
+            dbs = [
+                {
+                    "memory_subdir": key,
+                    "bytes": entry.size,
+                    "pinned": key in pinned,
+                    "in_use": self._in_use_fn(entry.value),
+                    "idle_seconds": round(now - entry.last_used, 1),
+                }
+                for key, entry in reversed(self._entries.items())
+            ]
+        return {
+            "bytes": sum(db["bytes"] for db in dbs),
+            "max_bytes": max_bytes,
+            "max_dbs": max_dbs,
+            "evictions": self.evictions,
+            "dbs": dbs,
+        }
+
+    def _update_sizes(self):
+        # sizes change with every write, estimated again when needed
+        for entry in self._entries.values():
+            try:
+                entry.size = self._size_fn(entry.value)
+            except Exception:
+                pass  # keep the last estimate
+
+    def _evict(self, key: str, value: T):
+        try:
+            self._evict_fn(key, value)
+        except Exception as e:
+            PrintStyle.error(f"Failed to unload memory '{key}': {e}")
+
+
+def get_limits() -> tuple[int, int]:
+    max_dbs = int(dotenv.get_dotenv_value(ENV_MAX_DBS) or MAX_DBS)
+    max_mb = float(dotenv.get_dotenv_value(ENV_MAX_MB) or MAX_MB)
+    return max_dbs, int(max_mb * 1024 * 1024)
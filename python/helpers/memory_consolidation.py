@@ -11,6 +11,7 @@ from python.helpers.memory import Memory
 from python.helpers.dirty_json import DirtyJson
 from python.helpers.log import LogItem
 from python.helpers.print_style import PrintStyle
+from python.helpers import response_cache
 from python.tools.memory_load import DEFAULT_THRESHOLD as DEFAULT_MEMORY_THRESHOLD
 from agent import Agent
 
@@ -433,7 +434,8 @@ class MemoryConsolidator:
             keywords_response = await self.agent.call_utility_model(
                 system=system_prompt,
                 message=message_prompt,
-                background=True
+                background=True,
+                cache_ttl=response_cache.DEFAULT_TTL,
             )
 
             # Parse the response - expect JSON array of strings
@@ -0,0 +1,147 @@
+import ast
+import operator
+from functools import lru_cache
+from typing import Any, Callable
+
+from simpleeval import simple_eval
+
+from python.helpers.print_style import PrintStyle
+
+# memory filter expressions like "area == 'main' or area == 'fragments'" are compiled once into python
+# predicates over document metadata, instead of being parsed by simpleeval for every candidate document,
+# equality conditions also tell which memory partitions can hold matches at all
+
+_COMPARE = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+_BINARY = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+}
+_UNARY = {ast.Not: operator.not_, ast.USub: operator.neg, ast.UAdd: operator.pos}
+_FUNCTIONS = {"int": int, "float": float, "str": str}  # as allowed by simpleeval
+
+Evaluator = Callable[[dict[str, Any]], Any]
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class Filter:
+    """Compiled filter, called with document metadata."""
+
+    def __init__(self, condition: str, evaluate: Evaluator, constraints: dict[str, set]):
+        self.condition = condition
+        self._evaluate = evaluate
+        self.constraints = constraints  # values a metadata field must have for a match, by field
+
+    def __call__(self, metadata: dict[str, Any]) -> bool:
+        try:
+            return bool(self._evaluate(metadata))
+        except Exception:
+            return False  # e.g. a field missing in this document
+
+    def get_values(self, name: str) -> set | None:
+        """Values of the metadata field that can match, None if any value can."""
+        return self.constraints.get(name)
+
+
+@lru_cache(maxsize=256)
+def compile_filter(condition: str) -> Filter:
+    try:
+        node = ast.parse(condition.strip(), mode="eval").body
+    except SyntaxError as e:
+        PrintStyle.error(f"Error evaluating condition: {e}")
+        return Filter(condition, lambda data: False, {})
+    try:
+        return Filter(condition, _compile(node), _constraints(node))
+    except _Unsupported:
+        # syntax beyond the compiled subset, evaluated per document like before
+        return Filter(condition, lambda data: simple_eval(condition, names=data), {})
+
+
+def _compile(node: ast.AST) -> Evaluator:
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda data: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda data: data[name]
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        items = [_compile(item) for item in node.elts]
+        kind = set if isinstance(node, ast.Set) else tuple if isinstance(node, ast.Tuple) else list
+        return lambda data: kind(item(data) for item in items)
+    if isinstance(node, ast.BoolOp):
+        values = [_compile(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda data: all(value(data) for value in values)
+        return lambda data: any(value(data) for value in values)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+        unary, operand = _UNARY[type(node.op)], _compile(node.operand)
+        return lambda data: unary(operand(data))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        binary, left, right = _BINARY[type(node.op)], _compile(node.left), _compile(node.right)
+        return lambda data: binary(left(data), right(data))
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+        operands = [_compile(node.left)] + [_compile(c) for c in node.comparators]
+        compares = [_COMPARE[type(op)] for op in node.ops]
+
+        def compare(data: dict[str, Any]) -> bool:
+            left = operands[0](data)
+            for compare_op, operand in zip(compares, operands[1:]):
+                right = operand(data)
+                if not compare_op(left, right):
+                    return False
+                left = right
+            return True
+
+        return compare
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS
+        and not node.keywords
+    ):
+        function, args = _FUNCTIONS[node.func.id], [_compile(arg) for arg in node.args]
+        return lambda data: function(*(arg(data) for arg in args))
+    raise _Unsupported(type(node).__name__)
+
+
+def _constraints(node: ast.AST) -> dict[str, set]:
+    # fields restricted to a set of constants by every match: name == 'x', name in ['x', 'y'], and / or of those
+    if isinstance(node, ast.Compare) and len(node.ops) == 1:
+        left, right, op = node.left, node.comparators[0], node.ops[0]
+        if isinstance(op, ast.Eq):
+            if isinstance(right, ast.Name) and isinstance(left, ast.Constant):
+                left, right = right, left
+            if isinstance(left, ast.Name) and isinstance(right, ast.Constant):
+                return {left.id: {right.value}}
+        if isinstance(op, ast.In) and isinstance(left, ast.Name) and isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+            if all(isinstance(item, ast.Constant) for item in right.elts):
+                return {left.id: {item.value for item in right.elts}}  # type: ignore[attr-defined]
+        return {}
+    if isinstance(node, ast.BoolOp):
+        children = [_constraints(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            result: dict[str, set] = {}
+            for child in children:
+                for name, values in child.items():
+                    result[name] = result[name] & values if name in result else set(values)
+            return result
+        names = set.intersection(*(set(child) for child in children))
+        return {name: set.union(*(child[name] for child in children)) for name in names}
+    return {}
@@ -0,0 +1,332 @@
+import math
+import os
+import pickle
+import threading
+
+import numpy as np
+
+# faiss needs to be patched for python 3.12 on arm #TODO remove once not needed
+from python.helpers import faiss_monkey_patch
+import faiss
+
+from python.helpers import dotenv
+from python.helpers.print_style import PrintStyle
+
+# memory is searched through pluggable faiss indexes, one per partition (memory area): exact flat search
+# for small partitions, approximate HNSW (or IVF) for large ones, promoted automatically by size and
+# rebuilt in the background, searches filtered to some areas only scan their partitions
+
+ENV_INDEX = "MEMORY_INDEX"  # auto (default), flat, hnsw or ivf
+ENV_HNSW_THRESHOLD = "MEMORY_HNSW_THRESHOLD"  # vectors from which auto uses hnsw
+
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+HNSW_THRESHOLD = 20000
+HNSW_M = 32  # graph neighbours per vector
+HNSW_EF_CONSTRUCTION = 128
+HNSW_EF_SEARCH = 256  # candidates per search, higher is slower with better recall, see tests/memory_index_benchmark.py
+IVF_MIN_VECTORS = 1000  # ivf needs training data, smaller memories stay flat
+IVF_NPROBE = 16  # lists searched per query
+COMPACT_RATIO = 0.2  # share of removed vectors that triggers a rebuild
+
+PARTS_FILE = "index.parts"  # partitions and document positions, index.faiss only carries the dimension
+MAP_FILE = "index.map"  # positions of documents in index.faiss, written before partitioning
+
+
+def get_type(index: faiss.Index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def get_target_type(count: int, current: str = "flat") -> str:
+    configured = (dotenv.get_dotenv_value(ENV_INDEX) or "auto").lower()
+    if configured == "ivf":
+        return "ivf" if count >= IVF_MIN_VECTORS else "flat"
+    if configured in INDEX_TYPES:
+        return configured
+    threshold = int(dotenv.get_dotenv_value(ENV_HNSW_THRESHOLD) or HNSW_THRESHOLD)
+    if count >= threshold:
+        return "hnsw"
+    if count < threshold // 2:
+        return "flat"
+    return current  # in between, no rebuilds back and forth around the threshold
+
+
+def create_index(index_type: str, dim: int, vectors: np.ndarray | None = None) -> faiss.Index:
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif index_type == "ivf" and vectors is not None and len(vectors) >= IVF_MIN_VECTORS:
+        nlist = max(1, min(int(4 * math.sqrt(len(vectors))), len(vectors) // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.nprobe = min(IVF_NPROBE, nlist)
+        index.make_direct_map()  # needed to reconstruct vectors for rebuilds
+    else:
+        index = faiss.IndexFlatIP(dim)
+    if vectors is not None and len(vectors):
+        index.add(vectors)
+    return index
+
+
+class _State:
+    """Partitions and document positions, replaced as a whole so searches never see a partial update."""
+
+    def __init__(self, keys: list, parts: list[faiss.Index], part_of: np.ndarray, phys: np.ndarray):
+        self.keys = keys  # partition key by partition number
+        self.parts = parts
+        self.part_of = part_of  # partition number by document position
+        self.phys = phys  # id in the partition index by document position
+        self.counts = np.bincount(part_of, minlength=len(parts))  # documents by partition number
+        self.lookups = []  # document position by id in the partition index, -1 for removed vectors
+        for number, part in enumerate(parts):
+            lookup = np.full(part.ntotal, -1, dtype=np.int64)
+            positions = np.flatnonzero(part_of == number)
+            lookup[phys[positions]] = positions
+            self.lookups.append(lookup)
+
+
+class MemoryIndex:
+    """Index for langchain FAISS, maps document positions to vectors of per partition faiss indexes.
+    Removed vectors are skipped until the next rebuild, as hnsw and ivf cannot remove in place."""
+
+    def __init__(self, dim: int, key_names: tuple = (), state: _State | None = None):
+        self._lock = threading.Lock()
+        self._rebuild_thread: threading.Thread | None = None
+        self.dim = dim
+        self.key_names = key_names  # metadata fields the partition keys are made of
+        self._state = state or _State([], [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+    @staticmethod
+    def create(dim: int, key_names: tuple = ()) -> "MemoryIndex":
+        return MemoryIndex(dim, key_names)
+
+    @staticmethod
+    def load(index: faiss.Index, folder: str, count: int) -> "MemoryIndex | None":
+        """Index of a checkpoint in folder holding count documents, None if the files do not match."""
+        path = os.path.join(folder, PARTS_FILE)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+            parts = [faiss.deserialize_index(np.frombuffer(part, dtype=np.uint8)) for part in data["parts"]]
+            state = _State(data["keys"], parts, data["part_of"], data["phys"])
+            result = MemoryIndex(index.d, tuple(data["key_names"]), state)
+        else:
+            # single index of earlier versions
+            positions = np.arange(index.ntotal, dtype=np.int64)
+            path = os.path.join(folder, MAP_FILE)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    positions = pickle.load(f)
+            state = _State([()], [index], np.zeros(len(positions), dtype=np.int64), positions)
+            result = MemoryIndex(index.d, (), state)
+        if result.ntotal != count:
+            PrintStyle.error(f"Memory index in {folder} does not match its documents")
+            return None
+        return result
+
+    @property
+    def d(self) -> int:
+        return self.dim
+
+    @property
+    def ntotal(self) -> int:
+        return len(self._state.part_of)
+
+    @property
+    def removed(self) -> int:
+        state = self._state
+        return sum(part.ntotal for part in state.parts) - len(state.part_of)
+
+    def get_partitions(self) -> dict:
+        """Documents and index type by partition key."""
+        state = self._state
+        return {
+            key: {"count": int(state.counts[number]), "type": get_type(state.parts[number])}
+            for number, key in enumerate(state.keys)
+        }
+
+    def memory_size(self) -> int:
+        """Estimated bytes of vectors, graphs and position maps."""
+        state = self._state
+        size = state.part_of.nbytes + state.phys.nbytes + sum(lookup.nbytes for lookup in state.lookups)
+        for part in state.parts:
+            size += part.ntotal * self.dim * 4
+            if isinstance(part, faiss.IndexHNSW):
+                size += part.ntotal * 2 * HNSW_M * 4  # neighbour lists, upper levels are small
+            elif isinstance(part, faiss.IndexIVF):
+                size += part.ntotal * 16 + part.nlist * self.dim * 4  # ids, direct map and centroids
+        return int(size)
+
+    def add(self, vectors: np.ndarray, keys: list | None = None):
+        keys = keys if keys is not None else [()] * len(vectors)
+        with self._lock:
+            state = self._state
+            part_keys, parts = list(state.keys), list(state.parts)
+            part_of = np.empty(len(vectors), dtype=np.int64)
+            phys = np.empty(len(vectors), dtype=np.int64)
+            for key in dict.fromkeys(keys):
+                rows = np.array([i for i, k in enumerate(keys) if k == key], dtype=np.int64)
+                if key not in part_keys:
+                    part_keys.append(key)
+                    parts.append(create_index("flat", self.dim))
+                number = part_keys.index(key)
+                start = parts[number].ntotal
+                parts[number].add(vectors[rows])
+                part_of[rows] = number
+                phys[rows] = np.arange(start, start + len(rows), dtype=np.int64)
+            self._state = _State(
+                part_keys, parts, np.concatenate([state.part_of, part_of]), np.concatenate([state.phys, phys])
+            )
+
+    def remove_ids(self, ids) -> int:
+        # positions of documents, later documents move up like in a flat index
+        remove = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            state = self._state
+            keep = np.ones(len(state.part_of), dtype=bool)
+            keep[remove[(remove >= 0) & (remove < len(keep))]] = False
+            self._state = _State(state.keys, state.parts, state.part_of[keep], state.phys[keep])
+            return int(len(keep) - keep.sum())
+
+    def search(self, x: np.ndarray, k: int, partitions=None, **kwargs):
+        """Best k document positions and scores per query, in all partitions or those with the given keys."""
+        candidates = []  # (scores, positions) per partition, shaped like the result
+        # partitions are extended in place by add, faiss indexes must not be searched meanwhile
+        with self._lock:
+            state = self._state
+            numbers = [n for n, key in enumerate(state.keys) if partitions is None or key in partitions]
+            for number in numbers:
+                part = state.parts[number]
+                fetch = min(k + part.ntotal - int(state.counts[number]), part.ntotal)
+                if fetch <= 0 or not state.counts[number]:
+                    continue
+                found_scores, found = part.search(x, fetch, **kwargs)
+                lookup = state.lookups[number]
+                # vectors added after the lookup was built are not documents of this state yet
+                found = np.where(found < len(lookup), found, -1)
+                positions = np.where(found >= 0, lookup[np.clip(found, 0, None)], -1)
+                candidates.append((np.where(positions >= 0, found_scores, -np.inf), positions))
+
+        scores = np.zeros((len(x), k), dtype=np.float32)
+        result = np.full((len(x), k), -1, dtype=np.int64)
+        if not candidates:
+            return scores, result
+        all_scores = np.hstack([c[0] for c in candidates])
+        all_positions = np.hstack([c[1] for c in candidates])
+        for row in range(len(x)):
+            order = np.argsort(-all_scores[row], kind="stable")
+            order = order[all_positions[row][order] >= 0][:k]
+            scores[row, : len(order)] = all_scores[row][order]
+            result[row, : len(order)] = all_positions[row][order]
+        return scores, result
+
+    def count(self, partitions=None) -> int:
+        state = self._state
+        return int(sum(state.counts[n] for n, key in enumerate(state.keys) if partitions is None or key in partitions))
+
+    def reconstruct(self, key: int) -> np.ndarray:
+        with self._lock:
+            state = self._state
+            return state.parts[state.part_of[key]].reconstruct(int(state.phys[key]))
+
+    def serialize(self) -> dict[str, bytes]:
+        """Files for a checkpoint, index.faiss for load_local and the partitions."""
+        with self._lock:
+            state = self._state
+            data = {
+                "key_names": self.key_names,
+                "keys": state.keys,
+                "parts": [faiss.serialize_index(part).tobytes() for part in state.parts],
+                "part_of": state.part_of,
+                "phys": state.phys,
+            }
+        return {
+            "index.faiss": faiss.serialize_index(faiss.IndexFlatIP(self.dim)).tobytes(),
+            PARTS_FILE: pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL),
+        }
+
+    def partition(self, keys: list, key_names: tuple):
+        """Regroup documents by new partition keys, one per document position, vectors are kept."""
+        with self._lock:
+            state = self._state
+            vectors = np.zeros((len(state.part_of), self.dim), dtype=np.float32)
+            for number, part in enumerate(state.parts):
+                positions = np.flatnonzero(state.part_of == number)
+                vectors[positions] = _reconstruct(part, state.phys[positions])
+            self._state = _State([], [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+            self.key_names = key_names
+        self.add(vectors, keys)
+
+    def _needs_rebuild(self, state: _State, number: int) -> bool:
+        part, count = state.parts[number], int(state.counts[number])
+        if get_target_type(count, get_type(part)) != get_type(part):
+            return True
+        return part.ntotal - count > max(100, COMPACT_RATIO * part.ntotal)
+
+    def needs_rebuild(self) -> bool:
+        state = self._state
+        return any(self._needs_rebuild(state, number) for number in range(len(state.parts)))
+
+    def rebuild_in_background(self):
+        """Rebuild partitions as their target type without removed vectors, searches use the current ones meanwhile."""
+        if self._rebuild_thread and self._rebuild_thread.is_alive():
+            return
+        self._rebuild_thread = threading.Thread(target=self._run_rebuild, daemon=True, name="MemoryIndexRebuild")
+        self._rebuild_thread.start()
+
+    def wait_rebuild(self):
+        thread = self._rebuild_thread
+        if thread:
+            thread.join()
+
+    def _run_rebuild(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            PrintStyle.error(f"Memory index rebuild failed: {e}")
+
+    def rebuild(self):
+        state = self._state
+        for number in range(len(state.parts)):
+            if self._needs_rebuild(state, number):
+                self._rebuild_partition(number)
+
+    def _rebuild_partition(self, number: int):
+        with self._lock:
+            state = self._state
+            part = state.parts[number]
+            built = part.ntotal
+            live = state.phys[state.part_of == number]
+            vectors = _reconstruct(part, live)
+        index_type = get_target_type(len(live), get_type(part))
+        new_part = create_index(index_type, self.dim, vectors)
+
+        with self._lock:
+            # documents added or removed during the build
+            state = self._state
+            mask = state.part_of == number
+            current = state.phys[mask]
+            moved = np.full(part.ntotal, -1, dtype=np.int64)
+            moved[live] = np.arange(len(live), dtype=np.int64)
+            added = current[current >= built]
+            if len(added):
+                new_part.add(_reconstruct(part, added))
+                moved[added] = np.arange(len(live), len(live) + len(added), dtype=np.int64)
+            parts = list(state.parts)
+            parts[number] = new_part
+            phys = state.phys.copy()
+            phys[mask] = moved[current]
+            self._state = _State(state.keys, parts, state.part_of, phys)
+
+
+def _reconstruct(index: faiss.Index, ids: np.ndarray) -> np.ndarray:
+    if not len(ids):
+        return np.zeros((0, index.d), dtype=np.float32)
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_batch(ids)
@@ -0,0 +1,204 @@
+import os
+import pickle
+import shutil
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable, Iterator
+
+from python.helpers.print_style import PrintStyle
+
+# memory writes are appended to a log next to the index instead of rewriting index.faiss and the pickled
+# docstore each time, the full index is written by checkpoints once the log is large or old enough,
+# on load the checkpoint is read and the log replayed on top of it
+
+LOG_FILE = "wal.log"
+SEGMENT_FILE = "wal.checkpoint.log"  # log being folded into a running checkpoint
+CHECKPOINT_DIR = ".checkpoint"
+COMPLETE_MARKER = "complete"  # written once all checkpoint files are on disk
+
+CHECKPOINT_BYTES = 32 * 1024 * 1024  # log size that triggers a checkpoint
+CHECKPOINT_SECONDS = 5 * 60  # age of the oldest logged change that triggers a checkpoint
+
+_HEADER = struct.Struct("<II")  # payload length, crc32
+
+
+class MemoryWal:
+    """Log of one memory folder, use get_wal so every database of the folder shares one instance."""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        # held while changing the index and logging the change, and while a checkpoint takes its snapshot
+        self.lock = threading.RLock()
+        # held for a whole checkpoint, the next one waits instead of removing files being written
+        self._checkpoint_lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._first_change: float | None = None
+        self._checkpoint_thread: threading.Thread | None = None
+        self.recover()
+        if os.path.exists(self._path(LOG_FILE)):
+            self._size = os.path.getsize(self._path(LOG_FILE))
+            self._first_change = time.monotonic() if self._size else None
+
+    def _path(self, *names: str) -> str:
+        return os.path.join(self.folder, *names)
+
+    def recover(self):
+        """Finish a checkpoint interrupted after all its files were written, discard an incomplete one."""
+        with self._checkpoint_lock:
+            tmp_dir = self._path(CHECKPOINT_DIR)
+            if not os.path.isdir(tmp_dir):
+                return
+            if os.path.exists(os.path.join(tmp_dir, COMPLETE_MARKER)):
+                self._publish(tmp_dir)
+            else:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def records(self) -> Iterator[dict[str, Any]]:
+        """Logged changes in order, a torn record at the end of a log (crash while writing) ends it."""
+        for name in (SEGMENT_FILE, LOG_FILE):
+            path = self._path(name)
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                while True:
+                    header = f.read(_HEADER.size)
+                    if len(header) < _HEADER.size:
+                        break
+                    length, crc = _HEADER.unpack(header)
+                    payload = f.read(length)
+                    if len(payload) < length or zlib.crc32(payload) != crc:
+                        PrintStyle.error(f"Memory log {path} ends with a damaged record, ignored")
+                        break
+                    yield pickle.loads(payload)
+
+    def has_records(self) -> bool:
+        return any(
+            os.path.exists(self._path(name)) and os.path.getsize(self._path(name)) > 0
+            for name in (SEGMENT_FILE, LOG_FILE)
+        )
+
+    def append(self, record: dict[str, Any]):
+        """Durably log one change, call with the lock held together with applying it to the index."""
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            if self._file is None:
+                os.makedirs(self.folder, exist_ok=True)
+                self._file = open(self._path(LOG_FILE), "ab")
+            self._file.write(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._size += _HEADER.size + len(payload)
+            if self._first_change is None:
+                self._first_change = time.monotonic()
+
+    def should_checkpoint(self) -> bool:
+        if not self._size:
+            return False
+        age = time.monotonic() - (self._first_change or time.monotonic())
+        return self._size >= CHECKPOINT_BYTES or age >= CHECKPOINT_SECONDS
+
+    def checkpoint(self, snapshot: Callable[[], dict[str, bytes]]):
+        """Write the files returned by snapshot (taken under the lock) and drop the log they include."""
+        with self._checkpoint_lock:
+            self._checkpoint(snapshot)
+
+    def _checkpoint(self, snapshot: Callable[[], dict[str, bytes]]):
+        with self.lock:
+            self._close()
+            log_path, segment_path = self._path(LOG_FILE), self._path(SEGMENT_FILE)
+            if os.path.exists(log_path):
+                if os.path.exists(segment_path):
+                    # a failed checkpoint left its segment, keep both until one succeeds
+                    with open(segment_path, "ab") as segment, open(log_path, "rb") as log:
+                        shutil.copyfileobj(log, segment)
+                    os.remove(log_path)
+                else:
+                    os.replace(log_path, segment_path)
+                _fsync_dir(self.folder)
+            self._size = 0
+            self._first_change = None
+            data = snapshot()
+
+        # writing happens outside the lock, memory changes go to a new log meanwhile
+        tmp_dir = self._path(CHECKPOINT_DIR)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, content in data.items():
+            with open(os.path.join(tmp_dir, name), "wb") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+        with open(os.path.join(tmp_dir, COMPLETE_MARKER), "wb") as f:
+            os.fsync(f.fileno())
+        self._publish(tmp_dir)
+
+    def checkpoint_in_background(self, snapshot: Callable[[], dict[str, bytes]]):
+        if self._checkpoint_thread and self._checkpoint_thread.is_alive():
+            return
+        self._checkpoint_thread = threading.Thread(
+            target=self._run_checkpoint, args=(snapshot,), daemon=True, name="MemoryCheckpoint"
+        )
+        self._checkpoint_thread.start()
+
+    def wait_checkpoint(self):
+        thread = self._checkpoint_thread
+        if thread:
+            thread.join()
+
+    def _run_checkpoint(self, snapshot: Callable[[], dict[str, bytes]]):
+        try:
+            self.checkpoint(snapshot)
+        except Exception as e:
+            PrintStyle.error(f"Memory checkpoint in {self.folder} failed: {e}")
+
+    def _publish(self, tmp_dir: str):
+        # renames are atomic per file, the marker keeps the set complete across a crash in between
+        for name in os.listdir(tmp_dir):
+            if name != COMPLETE_MARKER:
+                os.replace(os.path.join(tmp_dir, name), self._path(name))
+        _fsync_dir(self.folder)  # renames are durable before the log they include is dropped
+        segment_path = self._path(SEGMENT_FILE)
+        if os.path.exists(segment_path):
+            os.remove(segment_path)
+            _fsync_dir(self.folder)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+
+def _fsync_dir(folder: str):
+    # makes renames and removals in the folder durable
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return  # e.g. windows, directories cannot be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_wals: dict[str, MemoryWal] = {}
+_wals_lock = threading.Lock()
+
+
+def get_wal(folder: str) -> MemoryWal:
+    """Log of the folder, one per process so locks and checkpoints of all its databases are shared."""
+    path = os.path.abspath(folder)
+    with _wals_lock:
+        wal = _wals.get(path)
+        if wal is None:
+            wal = _wals[path] = MemoryWal(path)
+        return wal
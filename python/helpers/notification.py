@@ -2,6 +2,7 @@ from dataclasses import dataclass
 import uuid
 from datetime import datetime, timezone, timedelta
 from enum import Enum
+from python.helpers import state_events
 
 
 class NotificationType(Enum):
@@ -110,6 +111,7 @@ class NotificationManager:
 
         # Enforce limit
         self._enforce_limit()
+        state_events.notify(state_events.NOTIFICATIONS)
 
         return item
 
@@ -150,6 +152,7 @@ class NotificationManager:
                 if hasattr(item, key):
                     setattr(item, key, value)
             self.updates.append(no)
+            state_events.notify(state_events.NOTIFICATIONS)
 
     def mark_all_read(self):
         for notification in self.notifications:
@@ -159,6 +162,7 @@ class NotificationManager:
         self.notifications = []
         self.updates = []
         self.guid = str(uuid.uuid4())
+        state_events.notify(state_events.NOTIFICATIONS)
 
     def get_notifications_by_type(self, type: NotificationType) -> list[NotificationItem]:
         return [n for n in self.notifications if n.type == type]
\ No newline at end of file
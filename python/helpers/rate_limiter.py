@@ -1,57 +1,355 @@
 import asyncio
+import random
+import re
+import threading
 import time
-from typing import Callable, Awaitable
+from collections import deque
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Awaitable, Mapping
+
+BUCKETS = 60  # the window is counted in this many buckets, values expire one bucket at a time
+
+# adaptive limits, learned from rate limit headers and 429 responses on top of the configured ones
+LEARNED_SAFETY = 0.9  # share of a provider reported limit that is used
+LEARNED_DECREASE = 0.7  # learned limit factor on a 429 without limit headers
+LEARNED_INCREASE = 1.05  # learned limit factor per successful call, until the provider limit is reached
+BACKOFF_MAX = 60.0  # seconds
+
+# header names by limiter key, openai style and anthropic style, litellm may prefix them with "llm_provider-"
+_LIMIT_HEADERS = {
+    "requests": [
+        ("x-ratelimit-limit-requests", "x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+        ("anthropic-ratelimit-requests-limit", "anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+    ],
+    "input": [
+        ("x-ratelimit-limit-tokens", "x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+        ("anthropic-ratelimit-input-tokens-limit", "anthropic-ratelimit-input-tokens-remaining", "anthropic-ratelimit-input-tokens-reset"),
+    ],
+    "output": [
+        ("anthropic-ratelimit-output-tokens-limit", "anthropic-ratelimit-output-tokens-remaining", "anthropic-ratelimit-output-tokens-reset"),
+    ],
+}
+
+
+class _Window:
+    """Sliding window counter, values are summed per bucket so add and total are O(1)."""
+
+    def __init__(self):
+        self.buckets: deque[list] = deque()  # [bucket number, sum]
+        self.total: float = 0
+
+    def add(self, bucket: int, value: float):
+        if self.buckets and self.buckets[-1][0] == bucket:
+            self.buckets[-1][1] += value
+        else:
+            self.buckets.append([bucket, value])
+        self.total += value
+
+    def expire(self, oldest: int):
+        while self.buckets and self.buckets[0][0] < oldest:
+            self.total -= self.buckets.popleft()[1]
+        if not self.buckets:
+            self.total = 0  # drop float drift
+
+    def subtract(self, bucket: int, value: float):
+        # take back (part of) a value added earlier, if it has not expired yet
+        for entry in self.buckets:
+            if entry[0] == bucket:
+                value = min(value, entry[1])
+                entry[1] -= value
+                self.total -= value
+                return
+
+
+class Reservation:
+    """Amounts booked ahead with RateLimiter.reserve, settle with the real amounts when known."""
+
+    def __init__(self, limiter: "RateLimiter", bucket: int, amounts: dict[str, int]):
+        self.limiter = limiter
+        self.bucket = bucket
+        self.amounts = amounts
+        self.settled = False
+
+    def settle(self, **actual: int):
+        """Replace reserved amounts by actual ones, keys not given are released."""
+        if self.settled:
+            return
+        self.settled = True
+        self.limiter._settle(self, actual)
+
+
+class _Waiter:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.future: asyncio.Future = self.loop.create_future()
+
+    def wake(self):
+        # waiters may belong to event loops of other threads
+        def set_future():
+            if not self.future.done():
+                self.future.set_result(None)
+
+        self.loop.call_soon_threadsafe(set_future)
 
 
 class RateLimiter:
     def __init__(self, seconds: int = 60, **limits: int):
         self.timeframe = seconds
         self.limits = {key: value if isinstance(value, (int, float)) else 0 for key, value in (limits or {}).items()}
-        self.values = {key: [] for key in self.limits.keys()}
-        self._lock = asyncio.Lock()
+        self._bucket_seconds = seconds / BUCKETS
+        self._windows: dict[str, _Window] = {}
+        self._lock = threading.Lock()
+        # callers of wait() in arrival order, the first one checks the limits, the others wait for their turn
+        self._waiters: deque[_Waiter] = deque()
+        # limits learned from the provider, the lower of configured and learned limit applies
+        self.learned: dict[str, float] = {}
+        self._provider_limits: dict[str, float] = {}
+        self.blocked_until: float = 0.0  # monotonic time, set by Retry-After and exhausted limits
+
+    def get_limit(self, key: str) -> int:
+        configured = self.limits.get(key, 0)
+        learned = int(self.learned.get(key, 0))
+        if configured > 0 and learned > 0:
+            return min(configured, learned)
+        return configured or learned
+
+    def get_utilization(self) -> float:
+        """Highest share of a limit used in the window, 1.0 or more while limited or paused."""
+        now = time.monotonic()
+        with self._lock:
+            if self.blocked_until > now:
+                return 1.0
+            self._expire(self._bucket(now))
+            result = 0.0
+            for key in {*self.limits, *self.learned}:
+                limit = self.get_limit(key)
+                if limit > 0:
+                    result = max(result, self._window_total(key) / limit)
+            return result
+
+    def _bucket(self, now: float | None = None) -> int:
+        return int((time.monotonic() if now is None else now) / self._bucket_seconds)
+
+    def _window(self, key: str) -> _Window:
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window()
+        return window
 
     def add(self, **kwargs: int):
-        now = time.time()
-        for key, value in kwargs.items():
-            if not key in self.values:
-                self.values[key] = []
-            self.values[key].append((now, value))
+        # called per streamed chunk, window.add is inlined
+        bucket = int(time.monotonic() / self._bucket_seconds)
+        with self._lock:
+            for key, value in kwargs.items():
+                window = self._windows.get(key) or self._window(key)
+                buckets = window.buckets
+                if buckets and buckets[-1][0] == bucket:
+                    buckets[-1][1] += value
+                else:
+                    buckets.append([bucket, value])
+                window.total += value
+
+    def reserve(self, **kwargs: int) -> Reservation:
+        """Book estimated amounts now (e.g. output tokens), settle them when the real amounts are known."""
+        bucket = self._bucket()
+        with self._lock:
+            for key, value in kwargs.items():
+                self._window(key).add(bucket, value)
+        return Reservation(self, bucket, dict(kwargs))
+
+    def _settle(self, reservation: Reservation, actual: dict[str, int]):
+        bucket = self._bucket()
+        with self._lock:
+            for key in {*reservation.amounts, *actual}:
+                diff = actual.get(key, 0) - reservation.amounts.get(key, 0)
+                if diff > 0:
+                    self._window(key).add(bucket, diff)
+                elif diff < 0:
+                    self._window(key).subtract(reservation.bucket, -diff)
 
     async def cleanup(self):
-        async with self._lock:
-            now = time.time()
-            cutoff = now - self.timeframe
-            for key in self.values:
-                self.values[key] = [(t, v) for t, v in self.values[key] if t > cutoff]
+        with self._lock:
+            self._expire(self._bucket())
+
+    def _expire(self, bucket: int):
+        oldest = bucket - BUCKETS + 1
+        for window in self._windows.values():
+            window.expire(oldest)
 
     async def get_total(self, key: str) -> int:
-        async with self._lock:
-            if not key in self.values:
-                return 0
-            return sum(value for _, value in self.values[key])
+        with self._lock:
+            self._expire(self._bucket())
+            window = self._windows.get(key)
+            return int(window.total) if window else 0
+
+    def _check(self) -> tuple[str, int, int, float] | None:
+        # first exceeded limit as (key, total, limit, seconds until enough of the window expires)
+        now = time.monotonic()
+        bucket = self._bucket(now)
+        with self._lock:
+            if self.blocked_until > now:
+                return "retry", 0, 0, self.blocked_until - now
+            self._expire(bucket)
+            for key in {*self.limits, *self.learned}:
+                limit = self.get_limit(key)
+                if limit <= 0:  # Skip if no limit set
+                    continue
+                window = self._windows.get(key)
+                if not window or window.total <= limit:
+                    continue
+                remaining = window.total
+                for number, value in window.buckets:
+                    remaining -= value
+                    if remaining <= limit:
+                        break
+                # the bucket leaves the window when the window start passes its end
+                release = (number + BUCKETS) * self._bucket_seconds
+                return key, int(window.total), limit, max(release - now, 0.01)
+        return None
 
     async def wait(
         self,
         callback: Callable[[str, str, int, int], Awaitable[bool]] | None = None,
     ):
-        while True:
-            await self.cleanup()
-            should_wait = False
-
-            for key, limit in self.limits.items():
-                if limit <= 0:  # Skip if no limit set
-                    continue
+        waiter = _Waiter()
+        with self._lock:
+            self._waiters.append(waiter)
+            first = self._waiters[0] is waiter
+        try:
+            if not first:
+                await waiter.future
 
-                total = await self.get_total(key)
-                if total > limit:
-                    if callback:
-                        msg = f"Rate limit exceeded for {key} ({total}/{limit}), waiting..."
-                        should_wait = not await callback(msg, key, total, limit)
+            while True:
+                exceeded = self._check()
+                if not exceeded:
+                    break
+                key, total, limit, delay = exceeded
+                if callback:
+                    if key == "retry":
+                        msg = f"Rate limited by provider, retrying in {delay:.0f}s..."
                     else:
-                        should_wait = True
+                        msg = f"Rate limit exceeded for {key} ({total}/{limit}), waiting..."
+                    if await callback(msg, key, total, limit):
+                        break
+                # sleep exactly until enough of the window has expired
+                await asyncio.sleep(delay)
+        finally:
+            with self._lock:
+                head = self._waiters[0] is waiter
+                self._waiters.remove(waiter)
+                if head and self._waiters:
+                    self._waiters[0].wake()
+
+    def learn(self, headers: Mapping[str, Any] | None):
+        """Adjust learned limits after a successful call from rate limit headers, if any."""
+        values = _normalize_headers(headers)
+        now = time.monotonic()
+        with self._lock:
+            for key, names in _LIMIT_HEADERS.items():
+                for limit_name, remaining_name, reset_name in names:
+                    limit = _to_float(values.get(limit_name))
+                    if not limit:
+                        continue
+                    self._provider_limits[key] = limit * LEARNED_SAFETY
+                    # a limit decreased on 429s before the provider reported one is replaced by it
+                    self.learned[key] = max(self.learned.get(key, 0), self._provider_limits[key])
+                    remaining = _to_float(values.get(remaining_name))
+                    if remaining is not None and remaining <= 0:
+                        reset = _parse_reset(values.get(reset_name))
+                        if reset:
+                            self.blocked_until = max(self.blocked_until, now + reset)
                     break
+            # recover after a decrease, up to the provider limit when known
+            for key, learned in list(self.learned.items()):
+                ceiling = self._provider_limits.get(key)
+                increased = learned * LEARNED_INCREASE
+                if ceiling:
+                    self.learned[key] = min(increased, ceiling)
+                elif increased > self._window_total(key) * 2:
+                    # far above what is used, no longer needed
+                    del self.learned[key]
+                else:
+                    self.learned[key] = increased
+
+    def rate_limited(self, headers: Mapping[str, Any] | None = None, attempt: int = 0, base_delay: float = 1.0) -> float:
+        """Record a 429, returns seconds to wait: Retry-After if sent, else jittered exponential backoff."""
+        delay = get_retry_after(headers) or backoff_delay(attempt, base_delay)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(self._bucket(now))
+            self.blocked_until = max(self.blocked_until, now + delay)
+            # without limit headers, decrease to a share of what was used when the provider refused,
+            # a single refused request tells nothing about the limit
+            if self._window_total("requests") <= 1:
+                return delay
+            for key in ("requests", "input"):
+                if key in self._provider_limits:
+                    continue
+                used = self._window_total(key)
+                if used > 0:
+                    current = self.learned.get(key, used)
+                    self.learned[key] = max(1.0, min(current, used) * LEARNED_DECREASE)
+        return delay
+
+    def _window_total(self, key: str) -> float:
+        window = self._windows.get(key)
+        return window.total if window else 0
+
+
+def get_retry_after(headers: Mapping[str, Any] | None) -> float | None:
+    """Seconds from Retry-After (or retry-after-ms) headers, None if not sent."""
+    values = _normalize_headers(headers)
+    return _parse_retry_after(values.get("retry-after-ms"), 0.001) or _parse_retry_after(values.get("retry-after"))
+
+
+def backoff_delay(attempt: int, base_delay: float) -> float:
+    """Jittered exponential backoff for transient errors other than rate limits."""
+    return min(BACKOFF_MAX, base_delay * 2**attempt) * random.uniform(0.5, 1.5)
+
+
+def _normalize_headers(headers: Mapping[str, Any] | None) -> dict[str, str]:
+    result = {}
+    for name, value in (headers or {}).items():
+        name = str(name).lower()
+        if name.startswith("llm_provider-"):
+            name = name[len("llm_provider-") :]
+        result[name] = str(value)
+    return result
+
+
+def _to_float(value: str | None) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_retry_after(value: str | None, scale: float = 1.0) -> float | None:
+    if value is None:
+        return None
+    seconds = _to_float(value)
+    if seconds is not None:
+        return seconds * scale
+    # http date
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
-            if not should_wait:
-                break
 
-            await asyncio.sleep(1)
+def _parse_reset(value: str | None) -> float | None:
+    # openai style durations ("1s", "6m0s", "120ms") or anthropic style timestamps
+    if not value:
+        return None
+    seconds = _to_float(value)
+    if seconds is not None:
+        return seconds
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        factors = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(n) * factors[u] for n, u in parts)
+    try:
+        return max(0.0, datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() - time.time())
+    except ValueError:
+        return None
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from python.helpers import files
+
+# responses of utility calls that are pure functions of their prompt, opt-in per call site with cache_ttl
+# entries live in memory (LRU) and on disk, so they survive chat reloads and restarts
+
+CACHE_DIR = "tmp/llm_cache"
+MEMORY_SIZE = 512  # entries kept in memory
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+DISK_MAX_ENTRIES = 20000  # files kept on disk, least recently used are evicted beyond
+DISK_MAX_BYTES = 256 * 1024 * 1024
+DISK_SWEEP_INTERVAL = 10 * 60  # seconds between sweeps of expired entries, the first runs on the first put
+
+# kwargs that do not change the response
+_IGNORED_KWARGS = {"api_key", "timeout", "stream", "a0_retry_attempts", "a0_retry_delay_seconds", "a0_key_pool"}
+
+_memory: OrderedDict[str, tuple[float, tuple[str, str]]] = OrderedDict()
+_lock = threading.Lock()
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+_disk: dict[str, Any] = {"entries": None, "bytes": 0, "swept_at": 0.0, "sweeping": False}  # entries None until swept
+
+
+def make_key(model: str, kwargs: dict[str, Any], messages: list[dict[str, Any]]) -> str:
+    data = {
+        "model": model,
+        "kwargs": {k: v for k, v in kwargs.items() if k not in _IGNORED_KWARGS},
+        "messages": [_normalize_message(m) for m in messages],
+    }
+    serialized = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def _normalize_message(message: dict[str, Any]) -> dict[str, Any]:
+    content = message.get("content")
+    if isinstance(content, str):
+        content = content.strip()
+    return {"role": message.get("role"), "content": content}
+
+
+def get(key: str) -> tuple[str, str] | None:
+    """Cached (response, reasoning) or None when missing or expired."""
+    now = time.time()
+    with _lock:
+        entry = _memory.get(key)
+        if entry:
+            if entry[0] > now:
+                _memory.move_to_end(key)
+                _stats["memory_hits"] += 1
+                return entry[1]
+            del _memory[key]
+
+    entry = _read_disk(key)
+    with _lock:
+        if entry and entry[0] > now:
+            _memory_set(key, entry)
+            _stats["disk_hits"] += 1
+            _touch_disk(key)  # recently used, evicted last
+            return entry[1]
+        _stats["misses"] += 1
+    if entry:
+        _delete_disk(key)
+    return None
+
+
+def put(key: str, response: str, reasoning: str = "", ttl: float = DEFAULT_TTL):
+    entry = (time.time() + ttl, (response, reasoning))
+    with _lock:
+        _memory_set(key, entry)
+    _write_disk(key, entry)
+    _sweep_if_needed()
+
+
+def clear():
+    with _lock:
+        _memory.clear()
+    folder = files.get_abs_path(CACHE_DIR)
+    if os.path.isdir(folder):
+        for root, _dirs, names in os.walk(folder):
+            for name in names:
+                os.remove(os.path.join(root, name))
+    with _lock:
+        _disk["entries"], _disk["bytes"] = 0, 0
+
+
+def get_stats() -> dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_memory)
+        known = _disk["entries"] is not None
+    if not known:
+        sweep_disk()
+    with _lock:
+        stats["disk_entries"] = _disk["entries"]
+        stats["disk_bytes"] = _disk["bytes"]
+    lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+    return stats
+
+
+def _memory_set(key: str, entry: tuple[float, tuple[str, str]]):
+    _memory[key] = entry
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_SIZE:
+        _memory.popitem(last=False)
+
+
+def _disk_path(key: str) -> str:
+    return files.get_abs_path(CACHE_DIR, key[:2], key + ".json")
+
+
+def _read_disk(key: str) -> tuple[float, tuple[str, str]] | None:
+    try:
+        with open(_disk_path(key), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return (data["expires"], (data["response"], data["reasoning"]))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_disk(key: str, entry: tuple[float, tuple[str, str]]):
+    path = _disk_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        previous = os.path.getsize(path) if os.path.exists(path) else None
+        # write to a temp file first, concurrent readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"expires": entry[0], "response": entry[1][0], "reasoning": entry[1][1]}, f)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        _count_disk(0 if previous is not None else 1, size - (previous or 0))
+    except OSError:
+        pass  # disk tier is best effort
+
+
+def _delete_disk(key: str):
+    try:
+        path = _disk_path(key)
+        size = os.path.getsize(path)
+        os.remove(path)
+        _count_disk(-1, -size)
+    except OSError:
+        pass
+
+
+def _touch_disk(key: str):
+    try:
+        os.utime(_disk_path(key))
+    except OSError:
+        pass
+
+
+def _count_disk(entries: int, size: int):
+    with _lock:
+        if _disk["entries"] is not None:
+            _disk["entries"] += entries
+            _disk["bytes"] += size
+
+
+def _sweep_if_needed():
+    with _lock:
+        entries, size = _disk["entries"], _disk["bytes"]
+        due = (
+            entries is None
+            or entries > DISK_MAX_ENTRIES
+            or size > DISK_MAX_BYTES
+            or time.time() - _disk["swept_at"] >= DISK_SWEEP_INTERVAL
+        )
+        if not due or _disk["sweeping"]:
+            return
+        _disk["sweeping"] = True
+    # off the caller, put runs on the event loop
+    threading.Thread(target=sweep_disk, daemon=True, name="ResponseCacheSweep").start()
+
+
+def sweep_disk():
+    """Delete expired entries, then least recently used ones while over the disk limits."""
+    try:
+        now = time.time()
+        folder = files.get_abs_path(CACHE_DIR)
+        live: list[tuple[float, int, str]] = []  # mtime, size, path
+        for root, _dirs, names in os.walk(folder):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if name.endswith(".tmp"):
+                        if now - stat.st_mtime > 60 * 60:
+                            os.remove(path)  # left by a crashed write
+                        continue
+                    with open(path, "r", encoding="utf-8") as f:
+                        expires = json.load(f)["expires"]
+                    if expires <= now:
+                        os.remove(path)
+                        continue
+                    live.append((stat.st_mtime, stat.st_size, path))
+                except (OSError, ValueError, KeyError, TypeError):
+                    try:
+                        os.remove(path)  # unreadable entry
+                    except OSError:
+                        pass
+
+        live.sort()
+        entries, size = len(live), sum(item[1] for item in live)
+        # evict below the limits, so the next sweep is not due right after
+        for _mtime, item_size, path in live:
+            if entries <= DISK_MAX_ENTRIES * 0.9 and size <= DISK_MAX_BYTES * 0.9:
+                break
+            try:
+                os.remove(path)
+                entries -= 1
+                size -= item_size
+            except OSError:
+                pass
+        with _lock:
+            _disk["entries"], _disk["bytes"] = entries, size
+    finally:
+        with _lock:
+            _disk["swept_at"] = time.time()
+            _disk["sweeping"] = False
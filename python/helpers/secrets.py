@@ -35,75 +35,196 @@ class EnvLine:
     )
 
 
+class SecretsMatcher:
+    """Aho-Corasick automaton over secret values, built once per secrets version.
+
+    Masks all values in a single pass over the text. Overlapping matches are
+    resolved leftmost-longest, which is what replacing longest values first
+    was meant to achieve.
+    """
+
+    # below this many values, C-speed substring checks are faster for texts without secrets
+    PREFILTER_MAX_VALUES = 16
+
+    def __init__(self, replacements: Dict[str, str]):
+        # value -> replacement text
+        self.replacements: Dict[str, str] = {v: r for v, r in replacements.items() if v}
+        self.values: List[str] = list(self.replacements.keys())
+        self.min_len: int = min((len(v) for v in self.values), default=0)
+        self.max_len: int = max((len(v) for v in self.values), default=0)
+        self._build()
+
+    def _build(self):
+        goto: List[Dict[str, int]] = [{}]
+        depth: List[int] = [0]
+        ends: List[int] = [0]  # length of the value ending exactly at the state
+        for value in self.values:
+            state = 0
+            for char in value:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    depth.append(depth[state] + 1)
+                    ends.append(0)
+                    goto[state][char] = nxt
+                state = nxt
+            ends[state] = len(value)
+
+        # breadth-first pass for failure links and outputs (all value lengths ending at the state)
+        fail = [0] * len(goto)
+        outputs: List[Tuple[int, ...]] = [()] * len(goto)
+        order: List[int] = []
+        queue = list(goto[0].values())
+        while queue:
+            order.extend(queue)
+            next_queue = []
+            for state in queue:
+                outputs[state] = ((ends[state],) if ends[state] else ()) + outputs[fail[state]]
+                for char, nxt in goto[state].items():
+                    f = fail[state]
+                    while f and char not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(char, 0)
+                    next_queue.append(nxt)
+            queue = next_queue
+
+        # full transition function, storing only edges that don't fall back to a root edge
+        root = goto[0]
+        delta: List[Dict[str, int]] = [dict() for _ in goto]
+        delta[0] = root
+        for state in order:
+            transitions = delta[state]
+            for char, nxt in delta[fail[state]].items():
+                if root.get(char, 0) != nxt:
+                    transitions[char] = nxt
+            transitions.update(goto[state])
+
+        self._delta = delta
+        self._depth = depth
+        self._outputs = outputs
+
+    def scan(self, text: str, state: int = 0, offset: int = 0) -> Tuple[int, List[Tuple[int, int]]]:
+        """Run the automaton over text, returning the end state and (start, end) of all matches.
+        Positions are offset by `offset` so scanning can continue across chunks."""
+        delta = self._delta
+        root = delta[0]
+        outputs = self._outputs
+        matches: List[Tuple[int, int]] = []
+        pos = offset
+        for char in text:
+            pos += 1
+            nxt = delta[state].get(char)
+            state = root.get(char, 0) if nxt is None else nxt
+            if outputs[state]:
+                for length in outputs[state]:
+                    matches.append((pos - length, pos))
+        return state, matches
+
+    def partial_length(self, state: int) -> int:
+        """Length of the longest text suffix that may still become a match."""
+        return self._depth[state]
+
+    @staticmethod
+    def select(matches: List[Tuple[int, int]], last_end: int = 0) -> List[Tuple[int, int]]:
+        """Pick leftmost-longest non-overlapping matches, skipping those starting before last_end."""
+        selected: List[Tuple[int, int]] = []
+        for start, end in sorted(matches, key=lambda m: (m[0], -m[1])):
+            if start >= last_end:
+                selected.append((start, end))
+                last_end = end
+        return selected
+
+    def replace(self, text: str, selected: List[Tuple[int, int]], offset: int = 0) -> str:
+        """Replace selected matches in text, positions are absolute with text starting at offset."""
+        if not selected:
+            return text
+        parts: List[str] = []
+        cursor = 0
+        for start, end in selected:
+            start -= offset
+            end -= offset
+            parts.append(text[cursor:start])
+            parts.append(self.replacements[text[start:end]])
+            cursor = end
+        parts.append(text[cursor:])
+        return "".join(parts)
+
+    def mask(self, text: str) -> str:
+        if not text or not self.values or len(text) < self.min_len:
+            return text
+        if len(self.values) <= self.PREFILTER_MAX_VALUES and not any(v in text for v in self.values):
+            return text
+        _state, matches = self.scan(text)
+        return self.replace(text, self.select(matches))
+
+
 class StreamingSecretsFilter:
     """Stateful streaming filter that masks secrets on the fly.
 
     - Replaces full secret values with placeholders §§secret(KEY) when detected.
-    - Holds the longest suffix of the current buffer that matches any secret prefix
-      (with minimum trigger length of 3) to avoid leaking partial secrets across chunks.
-    - On finalize(), any unresolved partial is masked with '***'.
+    - Holds back the part of the stream that may still turn into a secret, the automaton
+      state is kept between chunks so every character is only scanned once.
+    - On finalize(), any unresolved partial of min_trigger characters or more is masked with '***'.
     """
 
-    def __init__(self, key_to_value: Dict[str, str], min_trigger: int = 3):
+    def __init__(self, key_to_value: Dict[str, str], min_trigger: int = 3, matcher: Optional[SecretsMatcher] = None):
         self.min_trigger = max(1, int(min_trigger))
-        # Map value -> key for placeholder construction
-        self.value_to_key: Dict[str, str] = {
-            v: k for k, v in key_to_value.items() if isinstance(v, str) and v
-        }
-        # Only keep non-empty values
-        self.secret_values: List[str] = [v for v in self.value_to_key.keys() if v]
-        # Precompute all prefixes for quick suffix matching
-        self.prefixes: Set[str] = set()
-        for v in self.secret_values:
-            for i in range(self.min_trigger, len(v) + 1):
-                self.prefixes.add(v[:i])
-        self.max_len: int = max((len(v) for v in self.secret_values), default=0)
-
-        # Internal buffer of pending text that is not safe to flush yet
+        if matcher is None:
+            replacements: Dict[str, str] = {}
+            for k, v in key_to_value.items():
+                if isinstance(v, str) and v:
+                    replacements.setdefault(v, alias_for_key(k))
+            matcher = SecretsMatcher(replacements)
+        self.matcher = matcher
+
+        # Internal buffer of pending text that is not safe to flush yet, starting at absolute offset
         self.pending: str = ""
-
-    def _replace_full_values(self, text: str) -> str:
-        """Replace all full secret values with placeholders in the given text."""
-        # Sort by length desc to avoid partial overlaps
-        for val in sorted(self.secret_values, key=len, reverse=True):
-            if not val:
-                continue
-            key = self.value_to_key.get(val, "")
-            if key:
-                text = text.replace(val, alias_for_key(key))
-        return text
-
-    def _longest_suffix_prefix(self, text: str) -> int:
-        """Return length of longest suffix of text that is a known secret prefix.
-        Returns 0 if none found (or only shorter than min_trigger)."""
-        max_check = min(len(text), self.max_len)
-        for length in range(max_check, self.min_trigger - 1, -1):
-            suffix = text[-length:]
-            if suffix in self.prefixes:
-                return length
-        return 0
+        self.offset: int = 0
+        self.total: int = 0
+        self.state: int = 0
+        self.last_end: int = 0
+        self.matches: List[Tuple[int, int]] = []
+        self.emitted: List[str] = []
+
+    def _flush(self, limit: int, final: bool = False) -> str:
+        """Emit pending text up to absolute position limit, replacing matches that start before it.
+        When final, all known matches are replaced, even those starting after limit."""
+        ready = [m for m in self.matches if final or m[0] < limit]
+        self.matches = [m for m in self.matches if not final and m[0] >= limit]
+        selected = self.matcher.select(ready, self.last_end)
+        cut = limit
+        if selected:
+            self.last_end = selected[-1][1]
+            cut = max(limit, self.last_end)
+        emit = self.matcher.replace(self.pending[: cut - self.offset], selected, self.offset)
+        self.pending = self.pending[cut - self.offset :]
+        self.offset = cut
+        if emit:
+            self.emitted.append(emit)
+        return emit
 
     def process_chunk(self, chunk: str) -> str:
         if not chunk:
             return ""
 
         self.pending += chunk
-
-        # Replace any full secret occurrences first
-        self.pending = self._replace_full_values(self.pending)
-
-        # Determine the longest suffix that could still form a secret
-        hold_len = self._longest_suffix_prefix(self.pending)
-        if hold_len > 0:
-            # Flush everything except the hold suffix
-            emit = self.pending[:-hold_len]
-            self.pending = self.pending[-hold_len:]
-        else:
-            # Safe to flush everything
-            emit = self.pending
-            self.pending = ""
-
-        return emit
+        self.state, matches = self.matcher.scan(chunk, self.state, self.total)
+        self.total += len(chunk)
+        self.matches.extend(matches)
+
+        # no secret can start before the current partial match, everything up to it is final
+        return self._flush(max(self.offset, self.total - self.matcher.partial_length(self.state)))
+
+    def masked_text(self) -> str:
+        """Masked version of all text processed so far, including the held back part."""
+        if len(self.emitted) > 1:
+            self.emitted[:] = ["".join(self.emitted)]
+        done = self.emitted[0] if self.emitted else ""
+        if not self.pending:
+            return done
+        selected = self.matcher.select(self.matches, self.last_end)
+        return done + self.matcher.replace(self.pending, selected, self.offset)
 
     def finalize(self) -> str:
         """Flush any remaining buffered text. If pending contains an unresolved partial
@@ -111,14 +232,25 @@ class StreamingSecretsFilter:
         if not self.pending:
             return ""
 
-        hold_len = self._longest_suffix_prefix(self.pending)
-        if hold_len > 0:
-            safe = self.pending[:-hold_len]
-            # Mask unresolved partial
-            result = safe + "***"
-        else:
-            result = self.pending
+        partial = self.matcher.partial_length(self.state)
+        if partial < self.min_trigger:
+            partial = 0
+        result = self._flush(max(self.offset, self.total - partial), final=True)
+        if self.pending:
+            # text left after replacements, mask it if it is still an unresolved partial
+            state, _ = self.matcher.scan(self.pending)
+            hold = min(self.matcher.partial_length(state), len(self.pending))
+            tail = self.pending[: len(self.pending) - hold]
+            if hold >= self.min_trigger:
+                tail += "***"
+            else:
+                tail = self.pending
+            result += tail
+            self.emitted.append(tail)
         self.pending = ""
+        self.offset = self.total
+        self.state = 0
+        self.matches = []
         return result
 
 
@@ -141,6 +273,7 @@ class SecretsManager:
 
     def __init__(self, *files: str):
         self._lock = threading.RLock()
+        self._matchers: Dict[Tuple[int, str], SecretsMatcher] = {}
         # instance-level list of secrets files
         self._files: Tuple[str, ...] = tuple(files) if files else (DEFAULT_SECRETS_FILE,)
         self._raw_snapshots: Dict[str, str] = {}
@@ -256,7 +389,23 @@ class SecretsManager:
 
     def create_streaming_filter(self) -> "StreamingSecretsFilter":
         """Create a streaming-aware secrets filter snapshotting current secret values."""
-        return StreamingSecretsFilter(self.load_secrets())
+        return StreamingSecretsFilter(self.load_secrets(), matcher=self.get_matcher(min_length=0))
+
+    def get_matcher(
+        self, min_length: int = 4, placeholder: str = "§§secret({key})"
+    ) -> SecretsMatcher:
+        """Get the compiled matcher for current secret values, rebuilt only when secrets change"""
+        with self._lock:
+            secrets = self.load_secrets()
+            cache_key = (min_length, placeholder)
+            matcher = self._matchers.get(cache_key)
+            if matcher is None:
+                replacements: Dict[str, str] = {}
+                for key, value in secrets.items():
+                    if value and len(value.strip()) >= min_length:
+                        replacements.setdefault(value, alias_for_key(key, placeholder))
+                matcher = self._matchers[cache_key] = SecretsMatcher(replacements)
+            return matcher
 
     def replace_placeholders(self, text: str) -> str:
         """Replace secret placeholders with actual values"""
@@ -302,17 +451,7 @@ class SecretsManager:
         if not text:
             return text
 
-        secrets = self.load_secrets()
-        result = text
-
-        # Sort by length (longest first) to avoid partial replacements
-        for key, value in sorted(
-            secrets.items(), key=lambda x: len(x[1]), reverse=True
-        ):
-            if value and len(value.strip()) >= min_length:
-                result = result.replace(value, alias_for_key(key, placeholder))
-
-        return result
+        return self.get_matcher(min_length, placeholder).mask(text)
 
     def get_masked_secrets(self) -> str:
         """Get content with values masked for frontend display (preserves comments and unrecognized lines)"""
@@ -349,6 +488,7 @@ class SecretsManager:
         """Clear the secrets cache"""
         with self._lock:
             self._secrets_cache = None
+            self._matchers = {}
             self._raw_snapshots = {}
             self._last_raw_text = None
 
@@ -1536,6 +1536,9 @@ def get_default_settings() -> Settings:
     )
 
 
+_MODEL_SETTINGS_PREFIXES = ("chat_model_", "util_model_", "embed_model_", "browser_model_")
+
+
 def _apply_settings(previous: Settings | None):
     global _settings
     if _settings:
@@ -1551,6 +1554,14 @@ def _apply_settings(previous: Settings | None):
                 agent.config = ctx.config
                 agent = agent.get_data(agent.DATA_NAME_SUBORDINATE)
 
+        # rebuild pooled model wrappers if model settings or api keys changed
+        if not previous or any(
+            _settings[key] != previous.get(key)  # type: ignore[misc]
+            for key in _settings
+            if key.startswith(_MODEL_SETTINGS_PREFIXES) or key in ("api_keys", "litellm_global_kwargs")
+        ):
+            models.clear_model_pool()
+
         # reload whisper model if necessary
         if not previous or _settings["stt_model_size"] != previous["stt_model_size"]:
             task = defer.DeferredTask().start_task(
@@ -1564,8 +1575,10 @@ def _apply_settings(previous: Settings | None):
             or _settings["embed_model_kwargs"] != previous["embed_model_kwargs"]
         ):
             from python.helpers.memory import reload as memory_reload
+            from python.helpers import embedding_registry
 
             memory_reload()
+            embedding_registry.unload()  # free the previous local model, the new one loads on first use
 
         # update mcp settings if necessary
         if not previous or _settings["mcp_servers"] != previous["mcp_servers"]:
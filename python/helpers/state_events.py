@@ -0,0 +1,47 @@
+import threading
+from collections import deque
+
+# process-wide change counter, state producers (logs, contexts, notifications, tasks) call notify()
+# and event streams block in wait() instead of rebuilding their output on every poll,
+# changes() tells them what changed so they only rebuild the affected parts
+
+LOG = "log"  # with the id of the context the log belongs to
+CONTEXTS = "contexts"
+NOTIFICATIONS = "notifications"
+TASKS = "tasks"
+
+HISTORY = 1024  # recent changes kept for changes()
+
+_condition = threading.Condition()
+_version: int = 0
+_events: deque[tuple[int, str, str]] = deque(maxlen=HISTORY)  # version, kind, context id
+
+
+def notify(kind: str = "", context_id: str = ""):
+    """Signal a change, without a kind anything may have changed."""
+    global _version
+    with _condition:
+        _version += 1
+        _events.append((_version, kind, context_id))
+        _condition.notify_all()
+
+
+def version() -> int:
+    return _version
+
+
+def wait(since: int, timeout: float | None = None) -> int:
+    """Block until the version differs from since or timeout elapses, return current version."""
+    with _condition:
+        _condition.wait_for(lambda: _version != since, timeout=timeout)
+        return _version
+
+
+def changes(since: int) -> list[tuple[str, str]] | None:
+    """Kind and context id of changes after version since, None if they are no longer all known."""
+    with _condition:
+        if _version == since:
+            return []
+        if not _events or _events[0][0] > since + 1:
+            return None
+        return [(kind, context_id) for number, kind, context_id in _events if number > since]
@@ -22,7 +22,7 @@ from python.helpers.print_style import PrintStyle
 from python.helpers.defer import DeferredTask
 from python.helpers.files import get_abs_path, make_dirs, read_file, write_file
 from python.helpers.localization import Localization
-from python.helpers import projects
+from python.helpers import projects, state_events
 import pytz
 from typing import Annotated
 
@@ -536,6 +536,7 @@ class SchedulerTaskList(BaseModel):
                         "ERROR: Null token persisted in JSON file for an adhoc task"
                     )
 
+        state_events.notify(state_events.TASKS)
         return self
 
     async def update_task_by_uuid(
@@ -1,30 +1,111 @@
-from typing import Literal
+from collections import OrderedDict
+from functools import lru_cache
+import math
+import threading
+from typing import Literal, Sequence
 import tiktoken
 
 APPROX_BUFFER = 1.1
 TRIM_BUFFER = 0.8
+CHARS_PER_TOKEN = 4  # rough ratio for estimate_tokens, fine for English text and code
+
+MEMO_MIN_LENGTH = 256  # shorter texts are cheaper to encode than to memoize
+MEMO_SIZE = 4096  # number of memoized counts
+BATCH_THREADS = 8
+
+_memo: OrderedDict[tuple[str, int, int], int] = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name="cl100k_base") -> tiktoken.Encoding:
+    return tiktoken.get_encoding(encoding_name)
+
+
+def _memo_key(text: str, encoding_name: str) -> tuple[str, int, int]:
+    # str hash is cached on the object, length makes collisions even less likely
+    return (encoding_name, len(text), hash(text))
+
+
+def _memo_get(key: tuple[str, int, int]) -> int | None:
+    with _memo_lock:
+        count = _memo.get(key)
+        if count is not None:
+            _memo.move_to_end(key)
+        return count
+
+
+def _memo_set(key: tuple[str, int, int], count: int):
+    with _memo_lock:
+        _memo[key] = count
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
 
 
 def count_tokens(text: str, encoding_name="cl100k_base") -> int:
     if not text:
         return 0
 
-    # Get the encoding
-    encoding = tiktoken.get_encoding(encoding_name)
+    key = None
+    if len(text) >= MEMO_MIN_LENGTH:
+        key = _memo_key(text, encoding_name)
+        count = _memo_get(key)
+        if count is not None:
+            return count
 
     # Encode the text and count the tokens
-    tokens = encoding.encode(text, disallowed_special=())
+    tokens = get_encoding(encoding_name).encode(text, disallowed_special=())
     token_count = len(tokens)
 
+    if key:
+        _memo_set(key, token_count)
     return token_count
 
 
+def count_tokens_many(texts: Sequence[str], encoding_name="cl100k_base") -> list[int]:
+    """Count tokens of multiple texts, memoized texts are skipped and the rest encoded in one batch."""
+    counts = [0] * len(texts)
+    missing: list[int] = []
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        if len(text) >= MEMO_MIN_LENGTH:
+            count = _memo_get(_memo_key(text, encoding_name))
+            if count is not None:
+                counts[i] = count
+                continue
+        missing.append(i)
+
+    if missing:
+        encoded = get_encoding(encoding_name).encode_batch(
+            [texts[i] for i in missing], num_threads=BATCH_THREADS, disallowed_special=()
+        )
+        for i, tokens in zip(missing, encoded):
+            counts[i] = len(tokens)
+            if len(texts[i]) >= MEMO_MIN_LENGTH:
+                _memo_set(_memo_key(texts[i], encoding_name), counts[i])
+
+    return counts
+
+
 def approximate_tokens(
     text: str,
 ) -> int:
     return int(count_tokens(text) * APPROX_BUFFER)
 
 
+def approximate_tokens_many(texts: Sequence[str]) -> list[int]:
+    return [int(count * APPROX_BUFFER) for count in count_tokens_many(texts)]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap estimate from character count without encoding, for hot paths where exactness does not matter."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN * APPROX_BUFFER)
+
+
 def trim_to_tokens(
     text: str,
     max_tokens: int,
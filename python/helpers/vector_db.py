@@ -35,6 +35,7 @@ class MyFaiss(FAISS):
 class VectorDB:
 
     _cached_embeddings: dict[str, CacheBackedEmbeddings] = {}
+    _dimensions: dict[str, int] = {}  # embedding size by model name
 
     @staticmethod
     def _get_embeddings(agent: Agent, cache: bool = True):
@@ -57,11 +58,26 @@ class VectorDB:
             )
         return VectorDB._cached_embeddings[namespace]
 
+    @staticmethod
+    def _get_dimension(embeddings) -> int:
+        # probing the size costs an embedding call, once per model is enough
+        model = getattr(embeddings, "underlying_embeddings", embeddings)
+        name = getattr(model, "model_name", None)
+        if name:
+            # same model with other arguments (e.g. dimensions) may differ in size
+            name = f"{name}:{getattr(model, 'kwargs', '')}"
+        if name and name in VectorDB._dimensions:
+            return VectorDB._dimensions[name]
+        dimension = len(embeddings.embed_query("example"))
+        if name:
+            VectorDB._dimensions[name] = dimension
+        return dimension
+
     def __init__(self, agent: Agent, cache: bool = True):
         self.agent = agent
         self.cache = cache  # store cache preference
         self.embeddings = self._get_embeddings(agent, cache=cache)
-        self.index = faiss.IndexFlatIP(len(self.embeddings.embed_query("example")))
+        self.index = faiss.IndexFlatIP(self._get_dimension(self.embeddings))
 
         self.db = MyFaiss(
             embedding_function=self.embeddings,
@@ -105,7 +121,7 @@ class VectorDB:
             for doc, id in zip(docs, ids):
                 doc.metadata["id"] = id  # add ids to documents metadata
 
-            self.db.add_documents(documents=docs, ids=ids)
+            await self.db.aadd_documents(documents=docs, ids=ids)
         return ids
 
     async def delete_documents_by_ids(self, ids: list[str]):
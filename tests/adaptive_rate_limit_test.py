@@ -0,0 +1,164 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from python.helpers import rate_limiter
+from python.helpers.rate_limiter import RateLimiter
+
+
+def test_learns_limits_from_openai_headers():
+    limiter = RateLimiter(seconds=60, requests=0, input=0)
+    limiter.learn({"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "99",
+                   "llm_provider-x-ratelimit-limit-tokens": "10000"})
+    assert limiter.get_limit("requests") == 90
+    assert limiter.get_limit("input") == 9000
+
+
+def test_configured_limit_wins_when_lower():
+    limiter = RateLimiter(seconds=60, requests=10)
+    limiter.learn({"x-ratelimit-limit-requests": "100"})
+    assert limiter.get_limit("requests") == 10
+
+
+def test_exhausted_limit_blocks_until_reset(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now[0])
+    limiter = RateLimiter(seconds=60)
+    limiter.learn({"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "0",
+                   "x-ratelimit-reset-requests": "1m30s"})
+    assert limiter.blocked_until == 1090.0
+
+
+def test_retry_after_is_honoured():
+    limiter = RateLimiter(seconds=60)
+    assert limiter.rate_limited({"Retry-After": "7"}) == 7
+    assert limiter.rate_limited({"retry-after-ms": "250"}) == 0.25
+    assert rate_limiter.get_retry_after({}) is None
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = {rate_limiter.backoff_delay(3, 1.0) for _ in range(20)}
+    assert all(4 <= d <= 12 for d in delays) and len(delays) > 1
+    assert rate_limiter.backoff_delay(20, 1.0) <= rate_limiter.BACKOFF_MAX * 1.5
+
+
+def test_429_without_headers_decreases_then_recovers():
+    limiter = RateLimiter(seconds=60)
+    limiter.add(requests=10)
+    limiter.rate_limited(attempt=0, base_delay=0.01)
+    assert limiter.get_limit("requests") == 7
+    for _ in range(5):
+        limiter.learn({})
+    assert 7 < limiter.get_limit("requests") < 10
+    for _ in range(50):
+        limiter.learn({})
+    assert limiter.get_limit("requests") == 0  # far above usage, dropped
+
+
+def test_single_refused_request_keeps_limits():
+    limiter = RateLimiter(seconds=60)
+    limiter.add(requests=1, input=500)
+    limiter.rate_limited(attempt=0, base_delay=0.01)
+    assert limiter.get_limit("requests") == 0
+    assert limiter.get_limit("input") == 0
+
+
+def test_provider_limit_replaces_decreased_limit():
+    limiter = RateLimiter(seconds=60)
+    limiter.add(requests=10)
+    limiter.rate_limited(attempt=0, base_delay=0.01)
+    assert limiter.get_limit("requests") == 7
+    limiter.learn({"x-ratelimit-limit-requests": "50"})
+    assert limiter.get_limit("requests") == 45
+
+
+def test_utilization():
+    limiter = RateLimiter(seconds=60, requests=10, input=1000)
+    limiter.add(requests=2, input=800)
+    assert limiter.get_utilization() == 0.8
+    limiter.rate_limited({"retry-after": "5"})
+    assert limiter.get_utilization() == 1.0
+
+
+def test_wait_pauses_after_429():
+    limiter = RateLimiter(seconds=60)
+    limiter.rate_limited({"retry-after": "0.2"})
+    messages = []
+
+    async def callback(msg, key, total, limit):
+        messages.append(key)
+        return False
+
+    start = time.monotonic()
+    asyncio.run(limiter.wait(callback))
+    assert time.monotonic() - start >= 0.19
+    assert messages == ["retry"]
+
+
+class _MockOpenAI(BaseHTTPRequestHandler):
+    """OpenAI compatible chat completions, the first request of each server is refused with a 429."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        server.calls += 1  # type: ignore[attr-defined]
+        if server.calls == 1:  # type: ignore[attr-defined]
+            self._send(429, {"error": {"message": "rate limited", "type": "rate_limit_error"}},
+                       {"Retry-After": "0.3"})
+            return
+        body = {
+            "id": "chatcmpl-1", "object": "chat.completion", "created": int(time.time()), "model": "mock",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+        }
+        self._send(200, body, {"x-ratelimit-limit-requests": "50", "x-ratelimit-remaining-requests": "49",
+                               "x-ratelimit-reset-requests": "1s"})
+
+    def _send(self, status, body, headers):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_mock_server_retry_and_learning():
+    pytest.importorskip("litellm")
+    import models
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockOpenAI)
+    server.calls = 0  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        config = models.ModelConfig(type=models.ModelType.CHAT, provider="openai", name="mock-adaptive",
+                                    api_base=f"http://127.0.0.1:{server.server_port}/v1")
+        wrapper = models.LiteLLMChatWrapper(
+            model="mock-adaptive", provider="openai", model_config=config,
+            api_base=config.api_base, api_key="sk-test", max_retries=0,
+        )
+        start = time.monotonic()
+        response, _ = asyncio.run(wrapper.unified_call(user_message="hi"))
+        assert response == "ok"
+        assert server.calls == 2  # type: ignore[attr-defined]
+        elapsed = time.monotonic() - start
+        assert elapsed >= 0.29  # Retry-After honoured
+        assert elapsed < 3  # the retry is not held back by the limiter
+        limiter = models.get_rate_limiter("openai", "mock-adaptive", 0, 0, 0, "sk-test")
+        assert limiter.get_limit("requests") == 45
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,93 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from python.helpers import api_key_pool
+from python.helpers.api_key_pool import ApiKeyPool
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(api_key_pool.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_least_loaded_key_is_leased():
+    pool = ApiKeyPool(["key-a", "key-b", "key-c"])
+    first = pool.acquire()
+    second = pool.acquire()
+    third = pool.acquire()
+    assert {first.key, second.key, third.key} == {"key-a", "key-b", "key-c"}
+    second.release()
+    assert pool.acquire().key == second.key
+
+
+def test_rate_limit_headroom_wins_over_in_flight():
+    pool = ApiKeyPool(["key-a", "key-b"])
+    pool.acquire(lambda key: 0.0)  # key-a busy
+    loads = {"key-a": 0.2, "key-b": 1.0}
+    assert pool.acquire(loads.__getitem__).key == "key-a"
+
+
+def test_failing_key_is_ejected_and_readmitted(clock):
+    pool = ApiKeyPool(["key-a", "key-b"])
+    lease = pool.acquire()
+    assert lease.key == "key-a"
+    lease.failure(429, retry_after=5)
+    assert [pool.acquire().key for _ in range(3)] == ["key-b"] * 3
+    clock[0] += 6
+    leases = [pool.acquire() for _ in range(4)]
+    assert "key-a" in [lease.key for lease in leases]
+
+
+def test_repeated_failures_double_ejection(clock):
+    pool = ApiKeyPool(["key-a"])
+    pool.acquire().failure(500)
+    assert pool.get_stats()[0]["ejected_for"] == api_key_pool.EJECT_SERVER
+    clock[0] += api_key_pool.EJECT_SERVER
+    pool.acquire().failure(503)
+    assert pool.get_stats()[0]["ejected_for"] == api_key_pool.EJECT_SERVER * 2
+    clock[0] += api_key_pool.EJECT_SERVER * 2
+    pool.acquire().success(100)
+    pool.acquire().failure(502)
+    assert pool.get_stats()[0]["ejected_for"] == api_key_pool.EJECT_SERVER
+
+
+def test_request_errors_do_not_eject():
+    pool = ApiKeyPool(["key-a", "key-b"])
+    pool.acquire().failure(400)
+    stats = pool.get_stats()
+    assert stats[0]["errors"] == 1 and stats[0]["ejected_for"] == 0
+
+
+def test_all_ejected_uses_first_readmitted(clock):
+    pool = ApiKeyPool(["key-a", "key-b"])
+    pool.acquire().failure(401)
+    pool.acquire().failure(429, retry_after=3)
+    assert pool.acquire().key == "key-b"
+
+
+def test_stats_report_throughput(clock):
+    pool = ApiKeyPool(["sk-1234567890abcd", "sk-abcdefghijklmn"])
+    for tokens in (100, 200):
+        lease = pool.acquire()
+        clock[0] += 0.5
+        lease.success(tokens)
+    stats = {s["key"]: s for s in pool.get_stats()}
+    assert stats["sk-...abcd"]["tokens_per_minute"] == 100
+    assert stats["sk-...klmn"]["requests_per_minute"] == 1
+    assert stats["sk-...abcd"]["avg_latency"] == 0.5
+    clock[0] += api_key_pool.STATS_WINDOW + 1
+    assert all(s["requests_per_minute"] == 0 for s in pool.get_stats())
+
+
+def test_registry_recreates_pool_on_key_change():
+    pool = api_key_pool.get_pool("registry-test", ["a", "b"])
+    assert api_key_pool.get_pool("registry-test", ["a", "b"]) is pool
+    assert api_key_pool.get_pool("registry-test", ["a", "c"]) is not pool
+    assert "registry-test" in api_key_pool.get_stats()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,107 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import pytest
+from python.helpers import call_scheduler
+from python.helpers.call_scheduler import CallScheduler, Priority, PriorityScope
+
+
+async def _hold(gate: asyncio.Event):
+    await gate.wait()
+
+
+def test_foreground_runs_before_background():
+    async def run():
+        scheduler = CallScheduler(concurrency=1)
+        gate = asyncio.Event()
+        order = []
+
+        async def call(name):
+            order.append(name)
+
+        blocker = asyncio.create_task(scheduler.run(lambda: _hold(gate), PriorityScope(Priority.NORMAL)))
+        await asyncio.sleep(0)
+        tasks = [
+            asyncio.create_task(scheduler.run(lambda: call("background"), PriorityScope(Priority.BACKGROUND))),
+            asyncio.create_task(scheduler.run(lambda: call("normal"), PriorityScope(Priority.NORMAL))),
+            asyncio.create_task(scheduler.run(lambda: call("foreground"), PriorityScope(Priority.FOREGROUND))),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.get_stats()["queued"] == {"foreground": 1, "normal": 1, "background": 1}
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+        assert order == ["foreground", "normal", "background"]
+        assert scheduler.running == 0
+
+    asyncio.run(run())
+
+
+def test_escalated_scope_moves_ahead():
+    async def run():
+        scheduler = CallScheduler(concurrency=1)
+        gate = asyncio.Event()
+        order = []
+
+        async def call(name):
+            order.append(name)
+
+        blocker = asyncio.create_task(scheduler.run(lambda: _hold(gate), PriorityScope(Priority.NORMAL)))
+        await asyncio.sleep(0)
+        scope = PriorityScope(Priority.BACKGROUND)
+        tasks = [
+            asyncio.create_task(scheduler.run(lambda: call("normal"), PriorityScope(Priority.NORMAL))),
+            asyncio.create_task(scheduler.run(lambda: call("escalated"), scope)),
+        ]
+        await asyncio.sleep(0)
+        scope.escalate(Priority.FOREGROUND)
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+        assert order == ["escalated", "normal"]
+
+    asyncio.run(run())
+
+
+def test_background_dropped_when_queue_full():
+    async def run():
+        scheduler = CallScheduler(concurrency=1, max_queue=1)
+        gate = asyncio.Event()
+
+        async def call():
+            return "done"
+
+        blocker = asyncio.create_task(scheduler.run(lambda: _hold(gate), PriorityScope(Priority.NORMAL)))
+        await asyncio.sleep(0)
+        background = asyncio.create_task(scheduler.run(call, PriorityScope(Priority.BACKGROUND)))
+        await asyncio.sleep(0)
+        foreground = asyncio.create_task(scheduler.run(call, PriorityScope(Priority.FOREGROUND)))
+        await asyncio.sleep(0)
+        with pytest.raises(call_scheduler.CallDropped):
+            await scheduler.run(call, PriorityScope(Priority.BACKGROUND))
+        gate.set()
+        await blocker
+        assert await foreground == "done"
+        with pytest.raises(call_scheduler.CallDropped):
+            await background
+        assert scheduler.get_stats()["dropped"] == 2
+
+    asyncio.run(run())
+
+
+def test_scope_applies_to_created_tasks():
+    async def run():
+        with call_scheduler.priority_scope(Priority.FOREGROUND) as scope:
+            task = asyncio.create_task(asyncio.sleep(0, result=None))
+            inner = await asyncio.create_task(_get_scope())
+        await task
+        assert inner is scope
+        assert call_scheduler.get_scope(background=True).priority == Priority.BACKGROUND
+
+    async def _get_scope():
+        return call_scheduler.get_scope()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,33 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from python.helpers.extract_tools import load_classes_from_file_cached
+from python.helpers.files import VariablesPlugin as Base
+
+
+def write(path, value):
+    path.write_text(
+        f"from python.helpers.files import VariablesPlugin\nclass Impl(VariablesPlugin):\n    value = {value}\n"
+    )
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_classes_are_cached_until_file_changes(tmp_path):
+    file = tmp_path / "impl.py"
+    write(file, 1)
+    first = load_classes_from_file_cached(str(file), Base)
+    assert first[0].value == 1
+    assert load_classes_from_file_cached(str(file), Base)[0] is first[0]
+    write(file, 2)
+    assert load_classes_from_file_cached(str(file), Base)[0].value == 2
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_classes_from_file_cached(str(tmp_path / "missing.py"), Base)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
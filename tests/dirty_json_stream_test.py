@@ -0,0 +1,81 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import random
+import pytest
+from python.helpers.dirty_json import DirtyJson, stringify
+
+examples = [
+    '{"thoughts": ["a", "b\\n c"], "headline": "x", "tool_name": "response", "tool_args": {"text": "hello \\"w\\" \\u00e9 end"}}',
+    'text before {"a": 1, "b": -2.5e3, "c": true, "d": null, "e": undefined, "f": False, g: unq , "h": [1, 2,], "i": {}}',
+    "{'a': 'b', 'c': \"\"\"multi\nline \"\"\", // comment\n \"d\": /* c */ [1 2], \"e\": \"\\q\"}",
+    '{{"a": 1}}',
+    '{"a": {"b": x}, "c": 1}',
+    '["a", {"b": [1, [2, 3]]}, "c"]  trailing',
+    '{"a" "b", "c":}',
+    '{"x": "\\u00zz more"}',
+    '{"a": ```code```, "b": `x`}',
+]
+
+
+def response_json(size: int) -> str:
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "\\n", "\\\"quoted\\\"", "{braces}", "[list]"]
+    text = []
+    length = 0
+    while length < size:
+        word = random.choice(words)
+        text.append(word)
+        length += len(word) + 1
+    return (
+        '{"thoughts": ["streaming a long answer"], "headline": "Responding", '
+        '"tool_name": "response", "tool_args": {"text": "' + " ".join(text) + '"}}'
+    )
+
+
+def feed_chunks(text: str, chunk_size: int):
+    parser = DirtyJson()
+    result = None
+    for i in range(0, len(text), chunk_size):
+        result = parser.feed(text[i : i + chunk_size])
+    return result
+
+
+@pytest.mark.parametrize("example", examples)
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_feed_matches_parse(example: str, chunk_size: int):
+    # trailing space lets the parser resolve lookahead at the very end of the input
+    assert feed_chunks(example + " ", chunk_size) == DirtyJson.parse_string(example)
+
+
+def test_feed_updates_in_place():
+    text = response_json(2000)
+    parser = DirtyJson()
+    first = parser.feed(text[:150])
+    assert isinstance(first, dict)
+    partial = first["tool_args"]["text"]
+    last = parser.feed(text[150:])
+    assert last is first
+    assert first["tool_args"]["text"].startswith(partial)
+    assert first == DirtyJson.parse_string(text)
+
+
+def benchmark(sizes=(50_000, 100_000, 150_000, 200_000, 250_000), chunk_size=16):
+    # reparsing the whole text on every chunk is quadratic, it is only measured on a small sample
+    sample = response_json(10_000)
+    start = time.perf_counter()
+    for i in range(chunk_size, len(sample) + chunk_size, chunk_size):
+        DirtyJson.parse_string(sample[:i])
+    print(f"reparse per chunk, {len(sample)} chars: {time.perf_counter() - start:.3f}s")
+
+    print(f"{'size':>8} {'incremental':>12} {'ms per KB':>10}")
+    for size in sizes:
+        text = response_json(size)
+        start = time.perf_counter()
+        feed_chunks(text, chunk_size)
+        incremental = time.perf_counter() - start
+        print(f"{size:>8} {incremental:>11.3f}s {incremental / size * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,80 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import threading
+import pytest
+from python.helpers.embedding_batcher import EmbeddingBatcher
+
+
+def make_batcher(**kwargs):
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    return EmbeddingBatcher(embed, **kwargs), calls
+
+
+def test_concurrent_requests_are_coalesced_and_deduped():
+    batcher, calls = make_batcher(max_wait=0.05)
+    results = {}
+
+    def request(i):
+        results[i] = batcher.embed(["same", "x" * i])
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(1, 6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(results[i] == [[4.0], [float(i)]] for i in range(1, 6))
+    embedded = [text for call in calls for text in call]
+    assert embedded.count("same") == 1
+    assert len(calls) < 5
+
+
+def test_batches_respect_max_size():
+    batcher, calls = make_batcher(max_batch=3, max_wait=0.01)
+    texts = [str(i) * (i + 1) for i in range(7)]
+    assert batcher.embed(texts) == [[float(len(t))] for t in texts]
+    assert all(len(call) <= 3 for call in calls)
+
+
+def test_errors_reach_all_callers():
+    def embed(texts):
+        raise ValueError("provider down")
+
+    batcher = EmbeddingBatcher(embed, max_wait=0.001)
+    with pytest.raises(ValueError):
+        batcher.embed(["a", "b"])
+
+
+def test_missing_vectors_fail_the_batch():
+    batcher = EmbeddingBatcher(lambda texts: [[1.0]] * (len(texts) - 1), max_wait=0.01)
+    with pytest.raises(ValueError):
+        batcher.embed(["a", "b"])
+
+
+def test_async_batches_run_off_the_callers_loop():
+    threads = []
+
+    async def aembed(texts):
+        threads.append(threading.current_thread().name)
+        await asyncio.sleep(0)
+        return [[float(len(t))] for t in texts]
+
+    batcher = EmbeddingBatcher(lambda texts: [], max_wait=0.01, aembed=aembed)
+
+    async def run():
+        return await asyncio.gather(batcher.aembed(["a", "bb"]), batcher.aembed(["bb", "ccc"]))
+
+    assert asyncio.run(run()) == [[[1.0], [2.0]], [[2.0], [3.0]]]
+    assert threads and all(name != threading.current_thread().name for name in threads)
+    assert batcher.embed(["dddd"]) == [[4.0]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
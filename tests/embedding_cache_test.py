@@ -0,0 +1,79 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
+import uuid
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+from python.helpers import embedding_cache
+from python.helpers.embedding_cache import EmbeddingStore
+from python.helpers.print_style import PrintStyle
+
+
+@pytest.fixture(autouse=True)
+def log_file(tmp_path_factory, monkeypatch):
+    # printed errors go to a temporary log instead of the logs folder
+    monkeypatch.setattr(PrintStyle, "log_file_path", str(tmp_path_factory.mktemp("logs") / "log.html"))
+
+
+@pytest.fixture
+def dtype(monkeypatch):
+    def set_dtype(value):
+        monkeypatch.setattr(embedding_cache.dotenv, "get_dotenv_value", lambda key, default=None: value)
+
+    set_dtype("float32")
+    return set_dtype
+
+
+def test_batched_get_and_set_survive_reopen(tmp_path, dtype):
+    store = EmbeddingStore(str(tmp_path), "model")
+    store.mset([("a", [1.0, 2.0, 3.0]), ("b", [4.0, 5.0, 6.0])])
+    assert store.mget(["b", "missing", "a"]) == [[4.0, 5.0, 6.0], None, [1.0, 2.0, 3.0]]
+    store.mset([("a", [7.0, 8.0, 9.0])])  # replaced
+    store.mdelete(["b"])
+    reopened = EmbeddingStore(str(tmp_path), "model")
+    assert reopened.mget(["a", "b"]) == [[7.0, 8.0, 9.0], None]
+    assert len(reopened) == 1
+    assert os.listdir(tmp_path) == ["model" + embedding_cache.FILE_SUFFIX]
+
+
+def test_torn_last_row_is_dropped(tmp_path, dtype):
+    store = EmbeddingStore(str(tmp_path), "model")
+    store.mset([("a", [1.0, 2.0]), ("b", [3.0, 4.0])])
+    path = tmp_path / ("model" + embedding_cache.FILE_SUFFIX)
+    path.write_bytes(path.read_bytes()[:-3])  # crash while appending
+    assert EmbeddingStore(str(tmp_path), "model").mget(["a", "b"]) == [[1.0, 2.0], None]
+
+
+def test_compaction_drops_dead_rows_and_converts_dtype(tmp_path, dtype, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "COMPACT_MIN_ROWS", 2)
+    store = EmbeddingStore(str(tmp_path), "model")
+    for value in range(4):
+        store.mset([("a", [float(value), 0.5])])
+    path = tmp_path / ("model" + embedding_cache.FILE_SUFFIX)
+    size = path.stat().st_size
+    reopened = EmbeddingStore(str(tmp_path), "model")
+    assert path.stat().st_size < size
+    assert reopened.mget(["a"]) == [[3.0, 0.5]]
+    dtype("float16")
+    half = EmbeddingStore(str(tmp_path), "model")
+    assert half.mget(["a"]) == [[3.0, 0.5]]
+    assert path.stat().st_size == embedding_cache._HEADER_SIZE + 16 + 2 * 2
+
+
+def test_migrates_local_file_store(tmp_path, dtype):
+    # files of LocalFileStore behind CacheBackedEmbeddings.from_bytes_store with the default key encoder
+    for text, vector in (("hello", [0.1, 0.2]), ("world", [0.3, 0.4])):
+        name = "model" + str(uuid.UUID(bytes=embedding_cache.text_key(text)))
+        (tmp_path / name).write_text(json.dumps(vector))
+    other = tmp_path / ("other_model" + str(uuid.uuid4()))
+    other.write_text("[1.0]")
+    store = EmbeddingStore(str(tmp_path), "model")
+    assert np.allclose(store.mget(["hello", "world"]), [[0.1, 0.2], [0.3, 0.4]])
+    assert sorted(os.listdir(tmp_path)) == sorted(["model" + embedding_cache.FILE_SUFFIX, other.name])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,52 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from python.helpers import embedding_registry
+
+
+@pytest.fixture(autouse=True)
+def fake_loader(monkeypatch):
+    loads = []
+
+    def load(name, kwargs):
+        loads.append((name, dict(kwargs)))
+        return object()
+
+    monkeypatch.setattr(embedding_registry, "_load", load)
+    monkeypatch.setattr(embedding_registry, "_threads_applied", True)
+    monkeypatch.delenv(embedding_registry.ENV_DEVICE, raising=False)
+    monkeypatch.delenv(embedding_registry.ENV_IDLE_TTL, raising=False)
+    embedding_registry.unload()
+    yield loads
+    embedding_registry.unload()
+
+
+def test_model_loaded_once(fake_loader):
+    a = embedding_registry.get_model("all-MiniLM-L6-v2")
+    b = embedding_registry.get_model("all-MiniLM-L6-v2")
+    assert a is b
+    assert len(fake_loader) == 1
+    assert embedding_registry.get_model("all-MiniLM-L6-v2", device="cpu") is not a
+    assert len(fake_loader) == 2
+
+
+def test_device_from_env(fake_loader, monkeypatch):
+    monkeypatch.setenv(embedding_registry.ENV_DEVICE, "cuda")
+    embedding_registry.get_model("model")
+    assert fake_loader[-1] == ("model", {"device": "cuda"})
+
+
+def test_idle_models_evicted(fake_loader, monkeypatch):
+    a = embedding_registry.get_model("model")
+    monkeypatch.setenv(embedding_registry.ENV_IDLE_TTL, "0.0001")
+    import time
+
+    time.sleep(0.01)
+    b = embedding_registry.get_model("model")
+    assert a is not b
+    assert len(fake_loader) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,89 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import pytest
+from python.helpers import extension
+from python.helpers.extension import ExtensionPipeline
+
+EXTENSION = """
+from python.helpers.extension import Extension
+
+class Ext(Extension):
+    stateless = {stateless}
+
+    async def execute(self, calls: list, **kwargs):
+        calls.append(({name!r}, id(self)))
+"""
+
+
+def write(folder, name, stateless=False):
+    path = folder / f"{name}.py"
+    path.write_text(EXTENSION.format(name=name, stateless=stateless))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def pipeline(*folders) -> ExtensionPipeline:
+    result = ExtensionPipeline("_test_missing_point", None)
+    result.folders = [str(folder) for folder in folders]
+    result._load()
+    return result
+
+
+class Agent:
+    pass
+
+
+def run(pipe, agent):
+    calls = []
+    asyncio.run(pipe.execute(agent, calls=calls))
+    return calls
+
+
+def test_order_and_profile_override(tmp_path):
+    default, profile = tmp_path / "default", tmp_path / "profile"
+    default.mkdir()
+    profile.mkdir()
+    write(default, "_20_b")
+    write(default, "_10_a")
+    write(profile, "_15_c")
+    write(profile, "_20_b")
+    pipe = pipeline(default, profile)
+    assert [name for name, _ in run(pipe, Agent())] == ["_10_a", "_15_c", "_20_b"]
+    assert [cls.__module__ for cls in pipe.classes][2] == "_20_b"
+
+
+def test_stateless_instances_are_reused(tmp_path):
+    write(tmp_path, "_10_stateless", stateless=True)
+    write(tmp_path, "_20_stateful")
+    pipe = pipeline(tmp_path)
+    agent = Agent()
+    first, second = run(pipe, agent), run(pipe, agent)
+    assert first[0][1] == second[0][1]
+    assert run(pipe, Agent())[0][1] != first[0][1]
+
+
+def test_changes_reload_pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(extension, "PIPELINE_CHECK_INTERVAL", 0)
+    write(tmp_path, "_10_a")
+    pipe = pipeline(tmp_path)
+    assert len(run(pipe, Agent())) == 1
+    write(tmp_path, "_20_b")
+    assert len(run(pipe, Agent())) == 2
+
+
+def test_timing(tmp_path):
+    write(tmp_path, "_10_a")
+    pipe = pipeline(tmp_path)
+    extension.set_timing(True)
+    try:
+        run(pipe, Agent())
+        run(pipe, Agent())
+        assert extension.get_timing()[("_test_missing_point", "_10_a")][0] == 2
+    finally:
+        extension.set_timing(False)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
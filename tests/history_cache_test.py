@@ -0,0 +1,59 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from python.helpers import history
+
+
+def make_history():
+    hist = history.History(agent=None)
+    hist.add_message(False, "first", tokens=10)
+    hist.add_message(True, "second", tokens=20)
+    return hist
+
+
+def test_output_is_reused_until_change():
+    hist = make_history()
+    first = hist.output()
+    again = hist.output()
+    assert first == again
+    assert all(a is b for a, b in zip(first, again))
+
+    hist.add_message(False, "third", tokens=5)
+    changed = hist.output()
+    assert len(changed) == 3
+    assert changed[0] is first[0] and changed[1] is first[1]
+
+
+def test_tokens_follow_changes():
+    hist = make_history()
+    assert hist.get_tokens() == 30
+    msg = hist.add_message(True, "fourth", tokens=7)
+    assert hist.get_tokens() == 37
+    msg.summary = "short"
+    assert hist.output()[-1]["content"] == "short"
+
+
+def test_new_topic_invalidates_output():
+    hist = make_history()
+    before = hist.output()
+    hist.new_topic()
+    hist.add_message(False, "next topic", tokens=3)
+    assert len(hist.output()) == len(before) + 1
+    assert hist.get_tokens() == 33
+
+
+def test_langchain_cache_reuses_messages():
+    hist = make_history()
+    first = history.output_langchain(hist.output(), cache=hist.langchain_cache)
+    again = history.output_langchain(hist.output(), cache=hist.langchain_cache)
+    assert all(a is b for a, b in zip(first, again))
+
+    hist.current.messages[0].summary = "summarized"
+    changed = history.output_langchain(hist.output(), cache=hist.langchain_cache)
+    assert changed[0] is not first[0]
+    assert changed[1] is first[1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,50 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import pytest
+from python.helpers import history
+
+
+def test_gather_limited_bounds_concurrency():
+    running = 0
+    peak = 0
+
+    async def work(i):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return i
+
+    results = asyncio.run(history.gather_limited([work(i) for i in range(10)], limit=3))
+    assert results == list(range(10))
+    assert peak == 3
+
+
+def test_compress_topics_plans_for_excess():
+    hist = history.History(agent=None)
+    for i in range(4):
+        hist.add_message(False, f"topic {i}", tokens=100)
+        hist.new_topic()
+
+    summarized = []
+
+    def fake_summarize(topic):
+        async def summarize():
+            summarized.append(topic)
+            topic.summary = "summary"
+            return topic.summary
+
+        return summarize
+
+    for topic in hist.topics:
+        topic.summarize = fake_summarize(topic)
+
+    assert asyncio.run(hist.compress_topics(excess=250))
+    assert summarized == hist.topics[:3]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,80 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from python.helpers import files  # imported first to avoid circular import with strings
+from python.helpers.log import Log
+
+
+def merge(client: dict, logs: list[dict]):
+    # same merging as mergeLogDelta in webui/index.js
+    for log in logs:
+        prev = client.get(log["no"])
+        delta = log.get("delta")
+        if prev is None or delta is None:
+            client[log["no"]] = {k: v for k, v in log.items() if k != "delta"}
+            continue
+        prev["heading"] = log["heading"]
+        if "content" in delta:
+            prev["content"] = prev["content"][: delta["content"]] + log["content"]
+        if "kvps" not in delta:
+            prev["kvps"] = dict(log["kvps"])
+            continue
+        for key, offset in delta["kvps"].items():
+            value = log["kvps"][key]
+            if offset and isinstance(value, str):
+                value = prev["kvps"].get(key, "")[:offset] + value
+            prev["kvps"][key] = value
+
+
+def poll(log: Log, client: dict, version: int) -> int:
+    log.flush()
+    end = len(log.updates)
+    merge(client, log.output(start=version, end=end))
+    return end
+
+
+@pytest.mark.parametrize("window", [0, 0.05, 10])
+@pytest.mark.parametrize("poll_every", [1, 7, 50])
+def test_deltas_reconstruct_items(window, poll_every):
+    log = Log(update_window=window)
+    client, version = {}, 0
+    item = log.log("agent", heading="thinking", content="")
+    for i in range(120):
+        item.stream(content=f"token{i} ", reasoning=f"r{i}")
+        if i == 60:
+            log.log("tool", heading="tool", kvps={"a": 1})
+            item.update(heading="still thinking")
+        if i % poll_every == 0:
+            version = poll(log, client, version)
+    item.update(kvps={"replaced": "yes"})
+    version = poll(log, client, version)
+
+    for it in log.logs:
+        assert client[it.no] == {k: v for k, v in it.output().items()}
+
+
+def test_updates_are_coalesced():
+    log = Log(update_window=10)
+    item = log.log("agent", heading="h")
+    for i in range(100):
+        item.stream(content="x")
+    assert item._pending is not None
+    assert item.content == "x" * 100  # reading flushes pending updates
+    assert item._pending is None
+    assert len(log.updates) == 1  # nobody polled in between, merged into the first update
+
+
+def test_delta_sends_only_appended_part():
+    log = Log(update_window=0)
+    item = log.log("agent", content="hello")
+    version = len(log.updates)
+    log.output()
+    item.stream(content=" world")
+    out = log.output(start=version)
+    assert out[0]["content"] == " world"
+    assert out[0]["delta"]["content"] == len("hello")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,107 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from python.helpers import memory_cache
+from python.helpers.memory_cache import MemoryCache
+
+
+class Db:
+    def __init__(self, size):
+        self.size = size
+        self.unloaded = False
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(memory_cache, "MIN_IDLE", 0)
+
+    def set_limits(max_dbs=100, max_mb=1000):
+        env = {memory_cache.ENV_MAX_DBS: str(max_dbs), memory_cache.ENV_MAX_MB: str(max_mb)}
+        monkeypatch.setattr(memory_cache.dotenv, "get_dotenv_value", lambda key, default=None: env.get(key, default))
+
+    set_limits()
+    return set_limits
+
+
+def make_cache(pinned=()):
+    def evict(key, db):
+        db.unloaded = True
+
+    return MemoryCache(
+        size_fn=lambda db: db.size,
+        pinned_fn=lambda: set(pinned),
+        evict_fn=evict,
+        in_use_fn=lambda db: getattr(db, "in_use", False),
+    )
+
+
+def test_evicts_least_recently_used(limits):
+    limits(max_dbs=2)
+    cache = make_cache()
+    a, b, c = Db(1), Db(1), Db(1)
+    cache["a"], cache["b"] = a, b
+    cache.get("a")
+    cache["c"] = c
+    assert cache.keys() == ["a", "c"]
+    assert b.unloaded and not a.unloaded
+    assert cache.get("b") is None  # loaded again by the caller on next access
+    assert cache.evictions == 1
+
+
+def test_evicts_by_size(limits):
+    limits(max_mb=1)
+    cache = make_cache()
+    big = Db(800 * 1024)
+    cache["big"] = big
+    cache["small"] = Db(100 * 1024)
+    assert "big" in cache
+    big.size = 1000 * 1024  # grew by writes
+    cache["other"] = Db(100 * 1024)
+    assert "big" not in cache and big.unloaded
+
+
+def test_pinned_and_recent_stay_loaded(limits, monkeypatch):
+    limits(max_dbs=1)
+    cache = make_cache(pinned=["running"])
+    cache["running"] = Db(1)
+    cache["other"] = Db(1)
+    assert cache.keys() == ["running"]  # least recently used, but in use by a running context
+    monkeypatch.setattr(memory_cache, "MIN_IDLE", 60)
+    cache["new"] = Db(1)
+    cache["newer"] = Db(1)
+    assert len(cache) == 3  # just used, requests may still hold them
+
+
+def test_in_use_stays_loaded_and_lookups_enforce_limits(limits, monkeypatch):
+    limits(max_dbs=1)
+    cache = make_cache()
+    held = Db(1)
+    held.in_use = True  # e.g. a memorizing task still holds it
+    cache["held"] = held
+    cache["other"] = Db(1)
+    assert cache.keys() == ["held"]
+    monkeypatch.setattr(memory_cache, "MIN_IDLE", 60)
+    cache["recent"] = Db(1)
+    held.in_use = False
+    assert len(cache) == 2  # recent is too recent, held no longer in use but not checked yet
+    monkeypatch.setattr(memory_cache, "MIN_IDLE", 0)
+    monkeypatch.setattr(memory_cache, "ENFORCE_INTERVAL", 0)
+    cache.get("recent")
+    assert cache.keys() == ["recent"] and held.unloaded
+
+
+def test_usage_and_clear(limits):
+    cache = make_cache(pinned=["a"])
+    a = Db(10)
+    cache["a"] = a
+    cache["b"] = Db(5)
+    usage = cache.get_usage()
+    assert usage["bytes"] == 15
+    assert [(db["memory_subdir"], db["pinned"]) for db in usage["dbs"]] == [("b", False), ("a", True)]
+    cache.clear()
+    assert len(cache) == 0 and a.unloaded
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,50 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from python.helpers.memory_filter import compile_filter
+from python.helpers.print_style import PrintStyle
+
+
+@pytest.fixture(autouse=True)
+def log_file(tmp_path_factory, monkeypatch):
+    # printed errors go to a temporary log instead of the logs folder
+    monkeypatch.setattr(PrintStyle, "log_file_path", str(tmp_path_factory.mktemp("logs") / "log.html"))
+
+
+@pytest.mark.parametrize(
+    "condition, metadata, expected",
+    [
+        ("area == 'main'", {"area": "main"}, True),
+        ("area == 'main'", {"area": "fragments"}, False),
+        ("area == 'main' or area == 'fragments'", {"area": "fragments"}, True),
+        ("area in ['main', 'solutions'] and not knowledge_source", {"area": "main", "knowledge_source": False}, True),
+        ("timestamp >= '2024-01-01' and 0 < int(score) <= 5", {"timestamp": "2024-02-01", "score": "3"}, True),
+        ("area == 'main'", {}, False),  # missing field
+    ],
+)
+def test_matches_like_simpleeval(condition, metadata, expected):
+    assert compile_filter(condition)(metadata) is expected
+
+
+def test_partition_values():
+    assert compile_filter("area == 'main'").get_values("area") == {"main"}
+    assert compile_filter("'main' == area or area in ('fragments',)").get_values("area") == {"main", "fragments"}
+    assert compile_filter("area in ['main', 'fragments'] and area != 'x' and area == 'main'").get_values("area") == {"main"}
+    # not every match is restricted
+    assert compile_filter("area == 'main' or knowledge_source").get_values("area") is None
+    assert compile_filter("area != 'main'").get_values("area") is None
+
+
+def test_other_syntax_falls_back_to_simpleeval():
+    condition = compile_filter("'mem' in area.lower()")
+    assert condition({"area": "MEMORY"})
+    assert condition.get_values("area") is None
+
+
+def test_invalid_condition_matches_nothing():
+    assert not compile_filter("area ==")({"area": "main"})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,72 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import numpy as np
+from python.helpers import memory_index
+
+# recall@k against exact flat search and latency per query of the memory index types,
+# on normalized random vectors clustered like embeddings of related texts
+# run: python tests/memory_index_benchmark.py [vectors] [dimensions]
+
+QUERIES = 200
+K = 10
+
+
+def make_vectors(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, count // 100), dim)).astype(np.float32)
+    data = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+# search effort settings to sweep per type, the defaults of memory_index are marked
+SWEEPS = {
+    "flat": [None],
+    "hnsw": [32, 64, 128, 256, 512],  # efSearch
+    "ivf": [4, 8, 16, 32, 64],  # nprobe
+}
+
+
+def measure(index, queries: np.ndarray, truth: np.ndarray):
+    start = time.perf_counter()
+    found = np.vstack([index.search(query[None, :], K)[1] for query in queries])
+    latency = (time.perf_counter() - start) / len(queries)
+    recall = np.mean([len(set(f) & set(t)) / K for f, t in zip(found, truth)])
+    return latency, recall
+
+
+def set_effort(index, index_type: str, value):
+    if index_type == "hnsw":
+        index.hnsw.efSearch = value
+        return value == memory_index.HNSW_EF_SEARCH
+    if index_type == "ivf":
+        index.nprobe = value
+        return value == memory_index.IVF_NPROBE
+    return True
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    data = make_vectors(count, dim)
+    # queries near stored vectors, like recall queries near related memories
+    rng = np.random.default_rng(1)
+    queries = data[rng.integers(0, count, QUERIES)] + 0.3 * rng.standard_normal((QUERIES, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = memory_index.create_index("flat", dim, data).search(queries, K)[1]
+
+    print(f"{count} vectors, {dim} dimensions, {QUERIES} queries, recall@{K}")
+    for index_type in memory_index.INDEX_TYPES:
+        start = time.perf_counter()
+        index = memory_index.create_index(index_type, dim, data)
+        print(f"{index_type}: build {time.perf_counter() - start:.2f} s")
+        for value in SWEEPS[index_type]:
+            default = set_effort(index, index_type, value)
+            latency, recall = measure(index, queries, truth)
+            setting = "" if value is None else f"{value:>4}"
+            print(f"  {setting} query {latency * 1000:7.3f} ms, recall {recall:.3f}{' (default)' if default else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+from python.helpers import memory_index
+from python.helpers.memory_index import MemoryIndex
+from python.helpers.print_style import PrintStyle
+
+
+@pytest.fixture(autouse=True)
+def log_file(tmp_path_factory, monkeypatch):
+    # printed errors go to a temporary log instead of the logs folder
+    monkeypatch.setattr(PrintStyle, "log_file_path", str(tmp_path_factory.mktemp("logs") / "log.html"))
+
+
+def vectors(count, dim=16, seed=0):
+    data = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def index_type(monkeypatch):
+    def set_type(value, threshold=None):
+        env = {memory_index.ENV_INDEX: value, memory_index.ENV_HNSW_THRESHOLD: threshold}
+        monkeypatch.setattr(memory_index.dotenv, "get_dotenv_value", lambda key, default=None: env.get(key) or default)
+
+    set_type("auto")
+    return set_type
+
+
+def test_auto_type_by_size(index_type):
+    index_type("auto", "1000")
+    assert memory_index.get_target_type(10) == "flat"
+    assert memory_index.get_target_type(1000) == "hnsw"
+    assert memory_index.get_target_type(700, "hnsw") == "hnsw"  # no demotion right below the threshold
+    assert memory_index.get_target_type(400, "hnsw") == "flat"
+    index_type("ivf")
+    assert memory_index.get_target_type(10) == "flat"  # too few vectors to train
+
+
+def test_search_skips_removed_positions(index_type):
+    data = vectors(50)
+    index = MemoryIndex.create(16)
+    index.add(data)
+    assert index.remove_ids(np.array([0, 1])) == 2
+    assert index.ntotal == 48 and index.removed == 2
+    _, found = index.search(data[2:3], 1)
+    assert found[0][0] == 0  # former position 2 moved up like in a flat index
+    _, found = index.search(data[0:1], 5)
+    assert -1 not in found[0] and all(i < 48 for i in found[0])
+    assert np.allclose(index.reconstruct(0), data[2])
+
+
+def test_promotion_rebuild_keeps_positions(index_type):
+    index_type("auto", "200")
+    data = vectors(300)
+    index = MemoryIndex.create(16)
+    index.add(data[:250])
+    index.remove_ids(np.array([3]))
+    assert index.needs_rebuild()
+    index.rebuild_in_background()
+    index.add(data[250:])  # may land before or during the rebuild
+    index.wait_rebuild()
+    assert index.get_partitions()[()]["type"] == "hnsw"
+    assert index.removed == 0 and index.ntotal == 299
+    for position, original in ((0, 0), (3, 4), (298, 299)):
+        _, found = index.search(data[original : original + 1], 1)
+        assert found[0][0] == position
+
+
+def test_ivf_index(index_type):
+    index_type("ivf")
+    data = vectors(2000, dim=8)
+    index = MemoryIndex.create(8)
+    index.add(data)
+    index.rebuild()
+    assert index.get_partitions()[()]["type"] == "ivf"
+    _, found = index.search(data[10:11], 1)
+    assert found[0][0] == 10
+
+
+def test_serialize_and_load(tmp_path, index_type):
+    data = vectors(20)
+    index = MemoryIndex.create(16, ("area",))
+    index.add(data, [("main",)] * 10 + [("fragments",)] * 10)
+    index.remove_ids(np.array([5]))
+    for name, content in index.serialize().items():
+        (tmp_path / name).write_bytes(content)
+    raw = memory_index.faiss.read_index(str(tmp_path / "index.faiss"))
+    loaded = MemoryIndex.load(raw, str(tmp_path), 19)
+    assert loaded.key_names == ("area",)
+    assert loaded.get_partitions()[("fragments",)]["count"] == 10
+    _, found = loaded.search(data[6:7], 1)
+    assert found[0][0] == 5
+    # files of another state
+    assert MemoryIndex.load(raw, str(tmp_path), 7) is None
+
+
+def test_load_single_index_of_earlier_versions(tmp_path, index_type):
+    data = vectors(10)
+    raw = memory_index.create_index("flat", 16, data)
+    loaded = MemoryIndex.load(raw, str(tmp_path), 10)
+    assert loaded.key_names == () and loaded.ntotal == 10
+    loaded.partition([("main",)] * 5 + [("solutions",)] * 5, ("area",))
+    assert loaded.key_names == ("area",)
+    _, found = loaded.search(data[7:8], 1, partitions=[("solutions",)])
+    assert found[0][0] == 7
+
+
+def test_search_in_partitions(index_type):
+    data = vectors(40)
+    index = MemoryIndex.create(16, ("area",))
+    keys = [("main",) if i % 2 else ("fragments",) for i in range(40)]
+    index.add(data, keys)
+    assert index.count([("main",)]) == 20
+    assert index.memory_size() >= 40 * 16 * 4
+    _, found = index.search(data[4:5], 3, partitions=[("main",)])
+    assert all(keys[i] == ("main",) for i in found[0])
+    _, found = index.search(data[4:5], 1)
+    assert found[0][0] == 4  # all partitions merged by score
+    index.remove_ids(np.array([1]))  # positions after it move up across partitions
+    _, found = index.search(data[3:4], 1, partitions=[("main",)])
+    assert found[0][0] == 2
+    _, found = index.search(data[0:1], 5, partitions=[("other",)])
+    assert (found == -1).all()
+
+
+@pytest.mark.parametrize("kind", ["flat", "hnsw"])
+def test_search_while_adding(index_type, kind):
+    index_type(kind)
+    data = vectors(2000)
+    index = MemoryIndex.create(16)
+    index.add(data[:50])
+    errors = []
+
+    def add():
+        try:
+            for start in range(50, 2000, 10):
+                index.add(data[start : start + 10])
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=add)
+    thread.start()
+    while thread.is_alive():
+        try:
+            _, found = index.search(data[:64], 10)
+            assert (found < index.ntotal).all()
+        except Exception as e:
+            errors.append(e)
+            break
+    thread.join()
+    assert not errors
+    assert index.ntotal == 2000
+    _, found = index.search(data[1500:1501], 1)
+    assert found[0][0] == 1500
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,152 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+import pytest
+from python.helpers import memory_wal
+from python.helpers.memory_wal import MemoryWal
+from python.helpers.print_style import PrintStyle
+
+
+@pytest.fixture(autouse=True)
+def log_file(tmp_path_factory, monkeypatch):
+    # printed errors go to a temporary log instead of the logs folder
+    monkeypatch.setattr(PrintStyle, "log_file_path", str(tmp_path_factory.mktemp("logs") / "log.html"))
+
+
+def read(folder, name):
+    with open(os.path.join(folder, name), "rb") as f:
+        return f.read()
+
+
+def test_records_are_replayed_in_order(tmp_path):
+    wal = MemoryWal(str(tmp_path))
+    wal.append({"op": "add", "ids": ["a"]})
+    wal.append({"op": "delete", "ids": ["a"]})
+    wal.close()
+    assert [r["op"] for r in MemoryWal(str(tmp_path)).records()] == ["add", "delete"]
+
+
+def test_torn_record_ends_the_log(tmp_path):
+    wal = MemoryWal(str(tmp_path))
+    wal.append({"op": "add", "ids": ["a"]})
+    wal.append({"op": "add", "ids": ["b"]})
+    wal.close()
+    path = tmp_path / memory_wal.LOG_FILE
+    path.write_bytes(path.read_bytes()[:-3])  # crash while writing the last record
+    assert [r["ids"] for r in MemoryWal(str(tmp_path)).records()] == [["a"]]
+
+
+def test_checkpoint_writes_snapshot_and_drops_log(tmp_path):
+    wal = MemoryWal(str(tmp_path))
+    wal.append({"op": "add", "ids": ["a"]})
+    assert wal.has_records()
+    wal.checkpoint(lambda: {"index.faiss": b"index", "index.pkl": b"docs"})
+    assert read(tmp_path, "index.faiss") == b"index"
+    assert read(tmp_path, "index.pkl") == b"docs"
+    assert not wal.has_records()
+    assert not (tmp_path / memory_wal.CHECKPOINT_DIR).exists()
+
+
+def test_changes_during_checkpoint_stay_logged(tmp_path):
+    wal = MemoryWal(str(tmp_path))
+    wal.append({"op": "add", "ids": ["a"]})
+    taken = threading.Event()
+    resume = threading.Event()
+
+    def snapshot():
+        taken.set()
+        return {"index.faiss": b"with a"}
+
+    original_publish = wal._publish
+
+    def slow_publish(tmp_dir):
+        resume.wait(5)
+        original_publish(tmp_dir)
+
+    wal._publish = slow_publish  # type: ignore[method-assign]
+    wal.checkpoint_in_background(snapshot)
+    assert taken.wait(5)
+    wal.append({"op": "add", "ids": ["b"]})  # after the snapshot
+    resume.set()
+    wal.wait_checkpoint()
+    assert [r["ids"] for r in wal.records()] == [["b"]]
+
+
+def test_failed_checkpoint_keeps_changes(tmp_path):
+    wal = MemoryWal(str(tmp_path))
+    wal.append({"op": "add", "ids": ["a"]})
+
+    def failing():
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        wal.checkpoint(failing)
+    wal.append({"op": "add", "ids": ["b"]})
+    assert [r["ids"] for r in MemoryWal(str(tmp_path)).records()] == [["a"], ["b"]]
+    wal.checkpoint(lambda: {"index.faiss": b"ab"})
+    assert list(wal.records()) == []
+
+
+def test_recovery_finishes_complete_checkpoint(tmp_path):
+    (tmp_path / "index.faiss").write_bytes(b"old")
+    MemoryWal(str(tmp_path)).append({"op": "add", "ids": ["a"]})
+    os.replace(tmp_path / memory_wal.LOG_FILE, tmp_path / memory_wal.SEGMENT_FILE)
+    tmp_dir = tmp_path / memory_wal.CHECKPOINT_DIR
+    tmp_dir.mkdir()
+    (tmp_dir / "index.faiss").write_bytes(b"new")
+    (tmp_dir / memory_wal.COMPLETE_MARKER).write_bytes(b"")
+    wal = MemoryWal(str(tmp_path))  # crashed before renaming
+    assert read(tmp_path, "index.faiss") == b"new"
+    assert not wal.has_records()
+
+
+def test_recovery_discards_incomplete_checkpoint(tmp_path):
+    (tmp_path / "index.faiss").write_bytes(b"old")
+    tmp_dir = tmp_path / memory_wal.CHECKPOINT_DIR
+    tmp_dir.mkdir()
+    (tmp_dir / "index.faiss").write_bytes(b"partial")
+    MemoryWal(str(tmp_path))
+    assert read(tmp_path, "index.faiss") == b"old"
+    assert not tmp_dir.exists()
+
+
+def test_checkpoint_due_by_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory_wal, "CHECKPOINT_BYTES", 100)
+    wal = MemoryWal(str(tmp_path))
+    assert not wal.should_checkpoint()
+    wal.append({"op": "add", "texts": ["x" * 200]})
+    assert wal.should_checkpoint()
+
+
+def test_one_log_per_folder(tmp_path):
+    wal = memory_wal.get_wal(str(tmp_path))
+    assert memory_wal.get_wal(os.path.join(str(tmp_path), ".")) is wal
+
+
+def test_checkpoints_do_not_overlap(tmp_path):
+    wal = MemoryWal(str(tmp_path))
+    wal.append({"op": "add", "ids": ["a"]})
+    writing = threading.Event()
+    resume = threading.Event()
+    original_publish = wal._publish
+
+    def slow_publish(tmp_dir):
+        writing.set()
+        resume.wait(5)
+        original_publish(tmp_dir)
+
+    wal._publish = slow_publish  # type: ignore[method-assign]
+    wal.checkpoint_in_background(lambda: {"index.faiss": b"first"})
+    assert writing.wait(5)
+    second = threading.Thread(target=wal.checkpoint, args=(lambda: {"index.faiss": b"second"},))
+    second.start()
+    second.join(0.1)
+    assert second.is_alive()  # waits for the running checkpoint instead of removing its files
+    resume.set()
+    second.join(5)
+    assert read(tmp_path, "index.faiss") == b"second"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,29 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+import models
+
+
+def config(name="gpt-4.1", **kwargs):
+    return models.ModelConfig(type=models.ModelType.CHAT, provider="openai", name=name, kwargs=kwargs)
+
+
+def test_same_config_returns_pooled_wrapper():
+    models.clear_model_pool()
+    a = models.get_chat_model("openai", "gpt-4.1", model_config=config())
+    b = models.get_chat_model("openai", "gpt-4.1", model_config=config())
+    assert a is b
+
+
+def test_different_config_or_cleared_pool_builds_new_wrapper():
+    models.clear_model_pool()
+    a = models.get_chat_model("openai", "gpt-4.1", model_config=config())
+    assert models.get_chat_model("openai", "gpt-4.1", model_config=config(temperature=0)) is not a
+    assert models.get_browser_model("openai", "gpt-4.1", model_config=config()) is not a
+    models.clear_model_pool()
+    assert models.get_chat_model("openai", "gpt-4.1", model_config=config()) is not a
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,45 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+import models
+
+
+def convert(provider, name, messages):
+    wrapper = models.LiteLLMChatWrapper(model=name, provider=provider)
+    return wrapper._convert_messages(messages)
+
+
+messages = [
+    SystemMessage(content="system prompt"),
+    HumanMessage(content="question"),
+    AIMessage(content="answer"),
+    HumanMessage(content="extras and new question"),
+]
+
+
+def test_breakpoints_for_anthropic():
+    result = convert("anthropic", "claude-sonnet-4", messages)
+    assert result[0]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert result[2]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    # volatile tail and other messages untouched
+    assert result[3]["content"] == "extras and new question"
+    assert result[1]["content"] == "question"
+
+
+def test_no_breakpoints_for_other_providers():
+    result = convert("openai", "gpt-4.1", messages)
+    assert [m["content"] for m in result] == [m.content for m in messages]
+
+
+def test_parse_usage():
+    usage = models._parse_usage(
+        {"usage": {"prompt_tokens": 100, "completion_tokens": 5, "prompt_tokens_details": {"cached_tokens": 80}}}
+    )
+    assert usage == {"input_tokens": 100, "output_tokens": 5, "cache_read_tokens": 80, "cache_write_tokens": 0}
+    assert models._parse_usage({"choices": []}) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,59 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+from python.helpers import files
+
+
+def write(path, content):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    # make sure the modification time differs from the previous write
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_placeholders_and_includes(tmp_path):
+    write(tmp_path / "main.md", "Hello {{name}}! {{ include 'part.md' }} {{missing}}")
+    write(tmp_path / "part.md", "part of {{name}}")
+    out = files.read_prompt_file("main.md", [str(tmp_path)], name="x")
+    assert out == "Hello x! part of x {{missing}}"
+
+
+def test_edits_are_reloaded(tmp_path):
+    write(tmp_path / "main.md", "one {{ include 'part.md' }}")
+    write(tmp_path / "part.md", "a")
+    assert files.read_prompt_file("main.md", [str(tmp_path)]) == "one a"
+    write(tmp_path / "part.md", "b")
+    assert files.read_prompt_file("main.md", [str(tmp_path)]) == "one b"
+    write(tmp_path / "main.md", "two {{ include 'part.md' }}")
+    assert files.read_prompt_file("main.md", [str(tmp_path)]) == "two b"
+
+
+def test_new_file_in_preferred_directory(tmp_path):
+    profile, default = tmp_path / "profile", tmp_path / "default"
+    profile.mkdir()
+    default.mkdir()
+    write(default / "main.md", "default")
+    dirs = [str(profile), str(default)]
+    assert files.read_prompt_file("main.md", dirs) == "default"
+    write(profile / "main.md", "profile")
+    os.utime(profile, ns=(time.time_ns(), os.stat(profile).st_mtime_ns + 1_000_000))
+    assert files.read_prompt_file("main.md", dirs) == "profile"
+
+
+def test_variables_plugin_and_json(tmp_path):
+    write(tmp_path / "data.md", '```json\n{"value": {{value}}, "extra": {{extra}}}\n```')
+    write(
+        tmp_path / "data.py",
+        "from python.helpers.files import VariablesPlugin\n"
+        "class Data(VariablesPlugin):\n"
+        "    def get_variables(self, file, backup_dirs=None, **kwargs):\n"
+        "        return {'extra': [1, 2]}\n",
+    )
+    assert files.parse_file("data.md", [str(tmp_path)], value="v") == {"value": "v", "extra": [1, 2]}
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
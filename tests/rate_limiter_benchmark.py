@@ -0,0 +1,87 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import time
+from typing import Callable, Awaitable
+from python.helpers.rate_limiter import RateLimiter
+
+# micro-benchmark of the sliding window RateLimiter against the previous list based implementation,
+# simulating a streamed response adding output tokens per chunk and checking limits per request
+# run: python tests/rate_limiter_benchmark.py
+
+CHUNKS = 100_000
+REQUESTS = 200
+
+
+class ListRateLimiter:
+    """Previous implementation, kept here as the baseline."""
+
+    def __init__(self, seconds: int = 60, **limits: int):
+        self.timeframe = seconds
+        self.limits = {key: value if isinstance(value, (int, float)) else 0 for key, value in (limits or {}).items()}
+        self.values = {key: [] for key in self.limits.keys()}
+        self._lock = asyncio.Lock()
+
+    def add(self, **kwargs: int):
+        now = time.time()
+        for key, value in kwargs.items():
+            if not key in self.values:
+                self.values[key] = []
+            self.values[key].append((now, value))
+
+    async def cleanup(self):
+        async with self._lock:
+            now = time.time()
+            cutoff = now - self.timeframe
+            for key in self.values:
+                self.values[key] = [(t, v) for t, v in self.values[key] if t > cutoff]
+
+    async def get_total(self, key: str) -> int:
+        async with self._lock:
+            if not key in self.values:
+                return 0
+            return sum(value for _, value in self.values[key])
+
+    async def wait(self, callback: Callable[[str, str, int, int], Awaitable[bool]] | None = None):
+        while True:
+            await self.cleanup()
+            should_wait = False
+            for key, limit in self.limits.items():
+                if limit <= 0:
+                    continue
+                total = await self.get_total(key)
+                if total > limit:
+                    should_wait = True
+                    break
+            if not should_wait:
+                break
+            await asyncio.sleep(1)
+
+
+async def run(limiter) -> tuple[float, float]:
+    start = time.perf_counter()
+    for _ in range(CHUNKS):
+        limiter.add(output=3)
+    added = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        limiter.add(input=1000, requests=1)
+        await limiter.wait()
+    waited = time.perf_counter() - start
+    return added, waited
+
+
+def main():
+    limits = dict(requests=10_000, input=10_000_000, output=10_000_000)
+    for name, limiter in (("list", ListRateLimiter(**limits)), ("window", RateLimiter(**limits))):
+        added, waited = asyncio.run(run(limiter))
+        print(
+            f"{name:>6}: {CHUNKS} chunk adds {added * 1000:8.1f} ms, "
+            f"{REQUESTS} request checks {waited * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import time
+import pytest
+from python.helpers import rate_limiter
+from python.helpers.rate_limiter import RateLimiter
+
+
+def test_totals_and_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now[0])
+    limiter = RateLimiter(seconds=60, input=100)
+    limiter.add(input=30, requests=1)
+    now[0] += 30
+    limiter.add(input=50)
+    assert asyncio.run(limiter.get_total("input")) == 80
+    now[0] += 31
+    assert asyncio.run(limiter.get_total("input")) == 50
+    assert asyncio.run(limiter.get_total("requests")) == 0
+
+
+def test_reservation_settles_to_actual():
+    limiter = RateLimiter(seconds=60, output=1000)
+    reservation = limiter.reserve(output=500)
+    assert asyncio.run(limiter.get_total("output")) == 500
+    reservation.settle(output=120)
+    assert asyncio.run(limiter.get_total("output")) == 120
+    reservation.settle(output=900)  # settles only once
+    assert asyncio.run(limiter.get_total("output")) == 120
+
+
+def test_wait_sleeps_until_capacity_frees():
+    limiter = RateLimiter(seconds=1, requests=1)
+    limiter.add(requests=2)
+    messages = []
+
+    async def callback(msg, key, total, limit):
+        messages.append(msg)
+        return False
+
+    start = time.monotonic()
+    asyncio.run(limiter.wait(callback))
+    elapsed = time.monotonic() - start
+    assert messages and "requests (2/1)" in messages[0]
+    assert 0.5 < elapsed < 1.5
+    assert len(messages) <= 2  # no polling
+
+
+def test_waiters_are_served_in_order():
+    limiter = RateLimiter(seconds=1, requests=1)
+    limiter.add(requests=2)
+    order = []
+
+    async def waiter(name):
+        await limiter.wait()
+        order.append(name)
+
+    async def run():
+        tasks = []
+        for name in ("first", "second", "third"):
+            tasks.append(asyncio.create_task(waiter(name)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["first", "second", "third"]
+
+
+def test_callback_can_skip_waiting():
+    limiter = RateLimiter(seconds=60, requests=1)
+    limiter.add(requests=5)
+
+    async def callback(msg, key, total, limit):
+        return True
+
+    asyncio.run(asyncio.wait_for(limiter.wait(callback), 1))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,64 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import pytest
+from python.helpers import response_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_cache, "CACHE_DIR", str(tmp_path))
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "question "}]
+
+
+def test_key_ignores_whitespace_and_api_key():
+    a = response_cache.make_key("model", {"temperature": 0, "api_key": "a"}, messages)
+    b = response_cache.make_key(
+        "model", {"temperature": 0, "api_key": "b"}, [messages[0], {"role": "user", "content": "question"}]
+    )
+    assert a == b
+    assert a != response_cache.make_key("model", {"temperature": 1}, messages)
+    assert a != response_cache.make_key("other", {"temperature": 0}, messages)
+
+
+def test_memory_and_disk_tiers():
+    key = response_cache.make_key("model", {}, messages)
+    assert response_cache.get(key) is None
+    response_cache.put(key, "answer", "thoughts")
+    assert response_cache.get(key) == ("answer", "thoughts")
+
+    # drop memory tier, disk tier still serves
+    response_cache._memory.clear()
+    assert response_cache.get(key) == ("answer", "thoughts")
+    stats = response_cache.get_stats()
+    assert stats["memory_hits"] >= 1 and stats["disk_hits"] >= 1 and stats["misses"] >= 1
+
+
+def test_expired_entries_are_removed():
+    key = response_cache.make_key("model", {}, messages)
+    response_cache.put(key, "answer", ttl=-1)
+    assert response_cache.get(key) is None
+    assert not os.path.exists(response_cache._disk_path(key))
+
+
+def test_sweep_removes_expired_and_least_recently_used(monkeypatch):
+    monkeypatch.setattr(response_cache, "DISK_MAX_ENTRIES", 3)
+    keys = [response_cache.make_key("model", {}, [{"role": "user", "content": str(i)}]) for i in range(5)]
+    for i, key in enumerate(keys):
+        response_cache._write_disk(key, (time.time() + (-1 if i == 0 else 60), (str(i), "")))
+        os.utime(response_cache._disk_path(key), (1000 + i, 1000 + i))
+    response_cache._touch_disk(keys[1])  # used recently
+    response_cache.sweep_disk()
+    remaining = [i for i, key in enumerate(keys) if os.path.exists(response_cache._disk_path(key))]
+    assert remaining == [1, 4]  # expired and oldest gone, to below the limit
+    assert response_cache.get_stats()["disk_entries"] == len(remaining)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
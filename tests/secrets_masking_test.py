@@ -0,0 +1,63 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import random
+import pytest
+from python.helpers.secrets import SecretsMatcher, StreamingSecretsFilter, alias_for_key
+
+secrets = {
+    "API_KEY": "sk-abc123",
+    "SHORT": "abc",
+    "LONG": "sk-abc123-extended",
+    "PASSWORD": "hunter22",
+}
+
+
+def replace_longest_first(text: str) -> str:
+    for key, value in sorted(secrets.items(), key=lambda x: len(x[1]), reverse=True):
+        text = text.replace(value, alias_for_key(key))
+    return text
+
+
+def matcher() -> SecretsMatcher:
+    return SecretsMatcher({v: alias_for_key(k) for k, v in secrets.items()})
+
+
+examples = [
+    "",
+    "nothing to see here",
+    "key sk-abc123 and sk-abc123-extended, pass hunter22",
+    "abcabc sk-abc12 sk-abc123-ext",
+    "hunter22hunter22abc",
+]
+
+
+@pytest.mark.parametrize("text", examples)
+def test_mask_matches_replace(text: str):
+    assert matcher().mask(text) == replace_longest_first(text)
+
+
+@pytest.mark.parametrize("text", examples)
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 100])
+def test_streaming_filter(text: str, chunk_size: int):
+    filter = StreamingSecretsFilter(secrets, matcher=matcher())
+    out = []
+    for i in range(0, len(text), chunk_size):
+        out.append(filter.process_chunk(text[i : i + chunk_size]))
+        assert filter.masked_text() == replace_longest_first(text[: i + chunk_size])
+        # held back text never contains the start of a leaked secret
+        assert "hunter22" not in "".join(out)
+    out.append(filter.finalize())
+    assert "".join(out) == replace_longest_first(text)
+
+
+def test_streaming_filter_masks_partial_at_end():
+    filter = StreamingSecretsFilter(secrets, matcher=matcher())
+    out = filter.process_chunk("password is hunt")
+    out += filter.finalize()
+    assert out == "password is ***"
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    test_mask_matches_replace(examples[2])
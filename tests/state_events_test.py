@@ -0,0 +1,48 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+import time
+from python.helpers import state_events
+
+
+def test_wait_times_out_without_change():
+    version = state_events.version()
+    start = time.monotonic()
+    assert state_events.wait(version, timeout=0.05) == version
+    assert time.monotonic() - start >= 0.05
+
+
+def test_wait_wakes_on_notify():
+    version = state_events.version()
+    threading.Timer(0.01, state_events.notify).start()
+    start = time.monotonic()
+    assert state_events.wait(version, timeout=5) > version
+    assert time.monotonic() - start < 1
+
+
+def test_wait_returns_immediately_after_missed_change():
+    version = state_events.version()
+    state_events.notify()
+    assert state_events.wait(version, timeout=5) == version + 1
+
+
+def test_changes_tell_kind_and_context():
+    version = state_events.version()
+    assert state_events.changes(version) == []
+    state_events.notify(state_events.LOG, "ctx1")
+    state_events.notify(state_events.TASKS)
+    assert state_events.changes(version) == [(state_events.LOG, "ctx1"), (state_events.TASKS, "")]
+    assert state_events.changes(version + 1) == [(state_events.TASKS, "")]
+
+
+def test_changes_unknown_after_history_overflow():
+    version = state_events.version()
+    for _ in range(state_events.HISTORY + 1):
+        state_events.notify(state_events.LOG, "ctx")
+    assert state_events.changes(version) is None
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,27 @@
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from python.helpers import tokens
+
+texts = ["", "hello world", "lorem ipsum dolor sit amet " * 50, "def f(x):\n    return x * 2\n" * 30]
+
+
+def test_count_tokens_many_matches_count_tokens():
+    assert tokens.count_tokens_many(texts) == [tokens.count_tokens(t) for t in texts]
+
+
+def test_memoized_counts_are_stable():
+    text = "memoized text " * 100
+    assert tokens.count_tokens(text) == tokens.count_tokens(text) == tokens.count_tokens_many([text])[0]
+
+
+def test_estimate_is_in_range():
+    for text in texts[1:]:
+        exact = tokens.approximate_tokens(text)
+        assert exact / 3 <= tokens.estimate_tokens(text) <= exact * 3
+    assert tokens.estimate_tokens("") == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -5,6 +5,7 @@ const model = {
   isLoading: false,
   contextData: null,
   tokenCount: 0,
+  usage: null,
   error: null,
   editor: null,
   closePromise: null,
@@ -17,6 +18,7 @@ const model = {
     this.error = null;
     this.contextData = null;
     this.tokenCount = 0;
+    this.usage = null;
 
     try {
       // Open modal FIRST (immediate UI feedback, but DON'T await)
@@ -40,6 +42,7 @@ const model = {
       // Update state with data
       this.contextData = response.content;
       this.tokenCount = response.tokens || 0;
+      this.usage = response.usage || null;
       this.isLoading = false;
       this.updateModalTitle(); // Update with token count
       
@@ -114,7 +117,12 @@ const model = {
       } else if (this.isLoading) {
         title.textContent = "Context Window (loading…)";
       } else {
-        title.textContent = `Context Window ~${this.tokenCount} tokens`;
+        let text = `Context Window ~${this.tokenCount} tokens`;
+        // prompt cache reads and writes reported by the provider for the last call
+        if (this.usage && (this.usage.cache_read_tokens || this.usage.cache_write_tokens)) {
+          text += ` (cached ${this.usage.cache_read_tokens}, written ${this.usage.cache_write_tokens})`;
+        }
+        title.textContent = text;
       }
     });
   },
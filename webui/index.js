@@ -253,6 +253,36 @@ function setConnectionStatus(connected) {
 let lastLogVersion = 0;
 let lastLogGuid = "";
 let lastSpokenNo = 0;
+// full state of log items, the backend sends only changed parts of items already sent
+const logCache = new Map();
+
+// merge log item delta into cached item, strings with offset are appended from that position
+function mergeLogDelta(log) {
+  const prev = logCache.get(log.no);
+  const delta = log.delta;
+  if (!prev || !delta) {
+    const { delta: _, ...full } = log;
+    logCache.set(log.no, full);
+    return full;
+  }
+  const merged = { ...prev, id: log.id, type: log.type, heading: log.heading, temp: log.temp };
+  if (delta.content !== undefined)
+    merged.content = (prev.content || "").slice(0, delta.content) + log.content;
+  if (delta.kvps === undefined) {
+    merged.kvps = log.kvps;
+  } else {
+    merged.kvps = { ...(prev.kvps || {}) };
+    for (const [key, from] of Object.entries(delta.kvps)) {
+      const value = log.kvps[key];
+      merged.kvps[key] =
+        from && typeof value === "string"
+          ? String(merged.kvps[key] ?? "").slice(0, from) + value
+          : value;
+    }
+  }
+  logCache.set(log.no, merged);
+  return merged;
+}
 
 export async function poll() {
   let updated = false;
@@ -268,126 +298,143 @@ export async function poll() {
       timezone: timezone,
     });
 
-    // Check if the response is valid
-    if (!response) {
-      console.error("Invalid response from poll endpoint");
-      return false;
-    }
+    updated = await applyPollResponse(response);
+  } catch (error) {
+    console.error("Error:", error);
+    setConnectionStatus(false);
+  }
 
-    // deselect chat if it is requested by the backend
-    if (response.deselect_chat) {
-      chatsStore.deselectChat();
-      return
-    }
+  return updated;
+}
+globalThis.poll = poll;
 
-    if (
-      response.context != context &&
-      !(response.context === null && context === null) &&
-      context !== null
-    ) {
-      return;
-    }
+// apply state from /poll or /poll_stream, the stream omits contexts and tasks when unchanged
+async function applyPollResponse(response) {
+  let updated = false;
+
+  // Check if the response is valid
+  if (!response) {
+    console.error("Invalid response from poll endpoint");
+    return false;
+  }
+
+  // deselect chat if it is requested by the backend
+  if (response.deselect_chat) {
+    chatsStore.deselectChat();
+    return false;
+  }
+
+  if (
+    response.context != context &&
+    !(response.context === null && context === null) &&
+    context !== null
+  ) {
+    return false;
+  }
 
-    // if the chat has been reset, restart this poll as it may have been called with incorrect log_from
-    if (lastLogGuid != response.log_guid) {
-      const chatHistoryEl = document.getElementById("chat-history");
-      if (chatHistoryEl) chatHistoryEl.innerHTML = "";
-      lastLogVersion = 0;
-      lastLogGuid = response.log_guid;
+  // if the chat has been reset, restart this poll as it may have been called with incorrect log_from
+  // logs sent from the start (log_from 0) can be applied right away
+  if (lastLogGuid != response.log_guid) {
+    const chatHistoryEl = document.getElementById("chat-history");
+    if (chatHistoryEl) chatHistoryEl.innerHTML = "";
+    lastLogVersion = 0;
+    lastLogGuid = response.log_guid;
+    logCache.clear();
+    if (response.log_from !== 0) {
       await poll();
-      return;
+      return false;
     }
+  }
 
-    if (lastLogVersion != response.log_version) {
-      updated = true;
-      for (const log of response.logs) {
-        const messageId = log.id || log.no; // Use log.id if available
-        setMessage(
-          messageId,
-          log.type,
-          log.heading,
-          log.content,
-          log.temp,
-          log.kvps
-        );
-      }
-      afterMessagesUpdate(response.logs);
+  if (lastLogVersion != response.log_version) {
+    updated = true;
+    const logs = response.logs.map(mergeLogDelta);
+    for (const log of logs) {
+      const messageId = log.id || log.no; // Use log.id if available
+      setMessage(
+        messageId,
+        log.type,
+        log.heading,
+        log.content,
+        log.temp,
+        log.kvps
+      );
     }
+    afterMessagesUpdate(logs);
+  }
 
-    lastLogVersion = response.log_version;
-    lastLogGuid = response.log_guid;
+  lastLogVersion = response.log_version;
+  lastLogGuid = response.log_guid;
 
-    updateProgress(response.log_progress, response.log_progress_active);
+  updateProgress(response.log_progress, response.log_progress_active);
 
-    // Update notifications from response
-    notificationStore.updateFromPoll(response);
+  // Update notifications from response
+  notificationStore.updateFromPoll(response);
 
-    //set ui model vars from backend
-    inputStore.paused = response.paused;
+  //set ui model vars from backend
+  inputStore.paused = response.paused;
 
-    // Update status icon state
-    setConnectionStatus(true);
+  // Update status icon state
+  setConnectionStatus(true);
 
-    // Update chats list using store
-    let contexts = response.contexts || [];
-    chatsStore.applyContexts(contexts);
+  // context and task lists are not sent by the stream when unchanged
+  if (response.contexts === undefined) return updated;
 
-    // Update tasks list using store
-    let tasks = response.tasks || [];
-    tasksStore.applyTasks(tasks);
+  // Update chats list using store
+  let contexts = response.contexts || [];
+  chatsStore.applyContexts(contexts);
 
-    // Make sure the active context is properly selected in both lists
-    if (context) {
-      // Update selection in both stores
-      chatsStore.setSelected(context);
+  // Update tasks list using store
+  let tasks = response.tasks || [];
+  tasksStore.applyTasks(tasks);
 
-      const contextInChats = chatsStore.contains(context);
-      const contextInTasks = tasksStore.contains(context);
+  // Make sure the active context is properly selected in both lists
+  if (context) {
+    // Update selection in both stores
+    chatsStore.setSelected(context);
 
-      if (contextInTasks) {
-        tasksStore.setSelected(context);
-      }
+    const contextInChats = chatsStore.contains(context);
+    const contextInTasks = tasksStore.contains(context);
 
-      if (!contextInChats && !contextInTasks) {
-        if (chatsStore.contexts.length > 0) {
-          // If it doesn't exist in the list but other contexts do, fall back to the first
-          const firstChatId = chatsStore.firstId();
-          if (firstChatId) {
-            setContext(firstChatId);
-            chatsStore.setSelected(firstChatId);
-          }
-        } else if (typeof deselectChat === "function") {
-          // No contexts remain – clear state so the welcome screen can surface
-          deselectChat();
-        }
-      }
-    } else {
-      const welcomeStore =
-        globalThis.Alpine && typeof globalThis.Alpine.store === "function"
-          ? globalThis.Alpine.store("welcomeStore")
-          : null;
-      const welcomeVisible = Boolean(welcomeStore && welcomeStore.isVisible);
-
-      // No context selected, try to select the first available item unless welcome screen is active
-      if (!welcomeVisible && contexts.length > 0) {
+    if (contextInTasks) {
+      tasksStore.setSelected(context);
+    }
+
+    if (!contextInChats && !contextInTasks) {
+      if (chatsStore.contexts.length > 0) {
+        // If it doesn't exist in the list but other contexts do, fall back to the first
         const firstChatId = chatsStore.firstId();
         if (firstChatId) {
           setContext(firstChatId);
           chatsStore.setSelected(firstChatId);
         }
+      } else if (typeof deselectChat === "function") {
+        // No contexts remain – clear state so the welcome screen can surface
+        deselectChat();
+      }
+    }
+  } else {
+    const welcomeStore =
+      globalThis.Alpine && typeof globalThis.Alpine.store === "function"
+        ? globalThis.Alpine.store("welcomeStore")
+        : null;
+    const welcomeVisible = Boolean(welcomeStore && welcomeStore.isVisible);
+
+    // No context selected, try to select the first available item unless welcome screen is active
+    if (!welcomeVisible && contexts.length > 0) {
+      const firstChatId = chatsStore.firstId();
+      if (firstChatId) {
+        setContext(firstChatId);
+        chatsStore.setSelected(firstChatId);
       }
     }
-
-    lastLogVersion = response.log_version;
-    lastLogGuid = response.log_guid;
-  } catch (error) {
-    console.error("Error:", error);
-    setConnectionStatus(false);
   }
 
+  lastLogVersion = response.log_version;
+  lastLogGuid = response.log_guid;
+
   return updated;
 }
-globalThis.poll = poll;
 
 function afterMessagesUpdate(logs) {
   if (localStorage.getItem("speech") == "true") {
@@ -478,6 +525,10 @@ export const setContext = function (id) {
   lastLogGuid = "";
   lastLogVersion = 0;
   lastSpokenNo = 0;
+  logCache.clear();
+
+  // the event stream is bound to a context, reopen it for the new one
+  if (eventSource) openEventStream();
 
   // Stop speech when switching chats
   speechStore.stopAudio();
@@ -598,6 +649,61 @@ async function startPolling() {
   _doPoll();
 }
 
+// server-sent events replace polling, the server pushes state only when something changes
+let eventSource = null;
+let eventSourceFailures = 0;
+const maxEventSourceFailures = 3;
+
+function openEventStream() {
+  if (eventSource) eventSource.close();
+
+  const params = new URLSearchParams({
+    context: context || "",
+    log_guid: lastLogGuid,
+    log_from: lastLogVersion,
+    notifications_guid: notificationStore.lastNotificationGuid || "",
+    notifications_from: notificationStore.lastNotificationVersion || 0,
+    timezone: Intl.DateTimeFormat().resolvedOptions().timeZone,
+  });
+  const source = new EventSource(`/poll_stream?${params}`);
+  let received = false;
+  let pending = Promise.resolve();
+
+  source.addEventListener("state", (event) => {
+    received = true;
+    eventSourceFailures = 0;
+    const response = JSON.parse(event.data);
+    // apply events in order, applying one may await a full poll
+    pending = pending
+      .then(() => applyPollResponse(response))
+      .catch((error) => console.error("Error:", error));
+  });
+
+  source.onerror = () => {
+    setConnectionStatus(false);
+    // on network errors the browser reconnects by itself and resumes from the last event id
+    if (source.readyState !== EventSource.CLOSED) return;
+    source.close();
+    eventSource = null;
+    // fall back to polling if the stream never worked (e.g. blocked by a proxy)
+    if (!received && ++eventSourceFailures >= maxEventSourceFailures) {
+      startPolling();
+      return;
+    }
+    // stream was refused (e.g. csrf token changed by a restart), poll to renew it and reopen
+    setTimeout(startUpdates, 1000);
+  };
+
+  eventSource = source;
+}
+
+async function startUpdates() {
+  // initial poll also sets the csrf cookie the stream is authenticated with
+  await poll();
+  if (typeof EventSource === "function") openEventStream();
+  else startPolling();
+}
+
 // All initializations and event listeners are now consolidated here
 document.addEventListener("DOMContentLoaded", function () {
   // Assign DOM elements to variables now that the DOM is ready
@@ -619,8 +725,8 @@ document.addEventListener("DOMContentLoaded", function () {
     chatHistory.addEventListener("scroll", updateAfterScroll);
   }
 
-  // Start polling for updates
-  startPolling();
+  // Start receiving updates
+  startUpdates();
 });
 
 /*